@@ -0,0 +1,382 @@
+"""
+Benchmarks dos caminhos quentes: leitura do banco, funções de análise, construção
+dos gráficos e cada página inteira rodando sem navegador (AppTest).
+
+Uso:
+    python benchmarks/run.py --sizes 10k,100k,1m
+    python benchmarks/run.py --compare benchmarks/results/antes.json benchmarks/results/depois.json
+
+Cada tamanho roda num processo próprio, com um banco sintético (benchmarks/synthetic.py)
+guardado em benchmarks/.data para ser reaproveitado. O resultado é um JSON com os
+metadados do commit e uma linha por medição, para comparar commits com --compare.
+"""
+import argparse
+import inspect
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+DEFAULT_SIZES = "10k,100k"
+DATA_DIR = os.path.join(ROOT, "benchmarks", ".data")
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+PAGES = ["home_page", "dashboard_page", "bank_page", "historic_page"]
+GROUP_COLUMNS = ("banco", "conta", "subconta")
+
+
+def measure(fn, repeat, setup=None):
+    """
+    Roda `fn` `repeat` vezes (chamando `setup` antes de cada uma, fora da medição)
+    e retorna o menor tempo e a mediana, em segundos.
+    """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {"min_s": min(times), "median_s": statistics.median(times), "repeat": repeat}
+
+
+def clear_streamlit_caches():
+    import streamlit as st
+    from utils.db_utils import clear_tenant_caches
+    from utils.visualization_utils import clear_chart_cache
+
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    clear_tenant_caches()
+    clear_chart_cache()
+
+
+def bench_db(db_path, repeat):
+    """
+    Leitura e agregação no SQLite e no snapshot Parquet, com cache frio e quente.
+    """
+    from utils.db_utils import TransactionFilter, aggregate_transactions, connect, get_db_fingerprint, load_data_from_db, query_transaction_page, query_transactions
+    from utils.parquet_store import export_snapshot
+
+    march = TransactionFilter(start_date=date(2023, 3, 1), end_date=date(2023, 3, 31))
+    cases = {
+        "load_data_from_db": lambda: load_data_from_db(db_path),
+        "aggregate_transactions[month, banco/conta/subconta]": lambda: aggregate_transactions(
+            None, "month", GROUP_COLUMNS, db_path
+        ),
+        "aggregate_transactions[day]": lambda: aggregate_transactions(None, "day", (), db_path),
+        "aggregate_transactions[descricao]": lambda: aggregate_transactions(
+            TransactionFilter(descricao="pix"), None, (), db_path
+        ),
+        "query_transactions[1 mês]": lambda: query_transactions(march, db_path),
+        "query_transaction_page[última página]": lambda: query_transaction_page(
+            None, None, "previous", False, 100, db_path
+        ),
+    }
+
+    store_path = tempfile.mkdtemp(prefix="bench-parquet-")
+    try:
+        def export():
+            conn = connect(db_path)
+            try:
+                export_snapshot(conn, store_path, get_db_fingerprint(db_path))
+            finally:
+                conn.close()
+
+        results = [{"name": "export_snapshot", "mode": None, **measure(export, 1)}]
+        cases["load_data_from_db[parquet]"] = lambda: load_data_from_db(backend="parquet", store_path=store_path)
+        cases["load_data_from_db[parquet, INTER 2023, 3 colunas]"] = lambda: load_data_from_db(
+            backend="parquet", store_path=store_path, columns=["data", "credito", "debito"],
+            bancos=["INTER"], years=[2023],
+        )
+        for name, fn in cases.items():
+            results.append({"name": name, "mode": "cold", **measure(fn, repeat, clear_streamlit_caches)})
+            fn()
+            results.append({"name": name, "mode": "warm", **measure(fn, repeat)})
+        return results
+    finally:
+        shutil.rmtree(store_path, ignore_errors=True)
+
+
+def sample_forecasts(frame):
+    """
+    Previsões de exemplo (os três meses seguintes ao último do livro), no formato de
+    get_forecasts, para medir a preparação e o gráfico de previsão sem ajustar modelos.
+    """
+    import pandas as pd
+
+    months = pd.date_range(frame["data"].max().to_period("M").to_timestamp(), periods=4, freq="MS")[1:]
+    mean = int(frame["credito"].sum()) // max(1, frame["data"].dt.to_period("M").nunique())
+    return pd.DataFrame({"data": months, "previsto": mean, "inferior": mean // 2, "superior": mean * 3 // 2})
+
+
+def analysis_cases(frame, ledger):
+    """
+    Uma chamada representativa de cada função pública de utils/analysis_utils.py.
+    """
+    from utils import analysis_utils as au
+
+    first_day, last_day = frame["data"].min(), frame["data"].max()
+    forecasts = sample_forecasts(frame)
+    return {
+        "clean_balance_column": lambda: au.clean_balance_column(frame),
+        "aggregate_by_period": lambda: au.aggregate_by_period(ledger, "M"),
+        "format_period_labels": lambda: au.format_period_labels(ledger.period_codes("M")[:1000], "M"),
+        "calculate_salary_expenses": lambda: au.calculate_salary_expenses(ledger),
+        "calculate_monthly_profit": lambda: au.calculate_monthly_profit(ledger),
+        "analyze_bank_transactions": lambda: au.analyze_bank_transactions(ledger, first_day, last_day),
+        "analyze_for_bank": lambda: au.analyze_for_bank(ledger),
+        "prepare_credit_debit_data": lambda: au.prepare_credit_debit_data(ledger),
+        "prepare_account_data": lambda: au.prepare_account_data(ledger),
+        "prepare_profit_data": lambda: au.prepare_profit_data(ledger),
+        "prepare_yearly_account_data": lambda: au.prepare_yearly_account_data(ledger),
+        "prepare_yearly_subaccount_data": lambda: au.prepare_yearly_subaccount_data(ledger, "Salário"),
+        "convert_date_column": lambda: au.convert_date_column(frame, "data"),
+        "add_month_and_year_columns": lambda: au.add_month_and_year_columns(frame, "data"),
+        "transform_data_for_display_in_table": lambda: au.transform_data_for_display_in_table(ledger),
+        "calcular_totais_ultimos_periodos": lambda: au.calcular_totais_ultimos_periodos(ledger, "W", 12),
+        "comparar_calcular_total": lambda: au.comparar_calcular_total(ledger, 12),
+        "get_yearly_summary": lambda: au.get_yearly_summary(ledger, "credito"),
+        "get_monthly_summary": lambda: au.get_monthly_summary(ledger, "credito"),
+        "prepare_monthly_data_for_line_chart": lambda: au.prepare_monthly_data_for_line_chart(ledger, "credito"),
+        "prepare_yearly_data_for_line_chart": lambda: au.prepare_yearly_data_for_line_chart(ledger, "credito"),
+        "analyze_supplier_profitability": lambda: au.analyze_supplier_profitability(ledger),
+        "prepare_forecast_data": lambda: au.prepare_forecast_data(ledger, forecasts, "credito"),
+    }
+
+
+# Funções de apoio de visualization_utils que não constroem gráficos
+CHART_HELPERS = (
+    "spec_size", "chart_builder", "clear_chart_cache", "chart_cache_info", "to_long_format", "downsample",
+    "chart_spec", "render_chart",
+)
+
+
+def chart_cases(frame, ledger):
+    """
+    Cada construtor de utils/visualization_utils.py, alimentado pela função de análise
+    correspondente. Os dados são preparados antes; mede-se a construção e a serialização.
+    """
+    from utils import analysis_utils as au
+    from utils import visualization_utils as vu
+
+    banco = frame["banco"].iloc[0]
+    semana, mes, ano = au.comparar_calcular_total(ledger, 12)
+    inputs = {
+        "create_salary_chart": (au.calculate_salary_expenses(ledger),),
+        "create_profit_chart": (au.calculate_monthly_profit(ledger),),
+        "create_bank_analysis_chart": (au.analyze_bank_transactions(ledger, frame["data"].min(), frame["data"].max()),),
+        "create_for_one_bank_chart": (au.analyze_for_bank(ledger.where(ledger.column("banco") == banco)), banco),
+        "create_credit_debit_chart": (au.prepare_credit_debit_data(ledger),),
+        "create_account_chart": (au.prepare_account_data(ledger),),
+        "create_yearly_account_chart": (au.prepare_yearly_account_data(ledger),),
+        "create_yearly_subaccount_chart": (au.prepare_yearly_subaccount_data(ledger, "Salário"), "Salário"),
+        "create_yearly_summary_chart": (au.get_yearly_summary(ledger, "credito"), "credito"),
+        "create_monthly_summary_chart": (au.get_monthly_summary(ledger, "credito"), "credito"),
+        "create_monthly_line_chart": (au.prepare_monthly_data_for_line_chart(ledger, "credito"), "credito"),
+        "create_yearly_line_chart": (au.prepare_yearly_data_for_line_chart(ledger, "credito"), "credito"),
+        "comparar_semanal": (semana,),
+        "comparar_mensal": (mes,),
+        "comparar_anual": (ano,),
+        "create_supplier_profit_chart": (au.analyze_supplier_profitability(ledger),),
+        "create_forecast_chart": (au.prepare_forecast_data(ledger, sample_forecasts(frame), "credito"),),
+    }
+    return {
+        name: (lambda builder=getattr(vu, name), args=args: vu.chart_spec(builder(*args)))
+        for name, args in inputs.items()
+    }
+
+
+def uncovered(module, cases, ignore=()):
+    """
+    Funções públicas do módulo sem benchmark (para não esquecer funções novas).
+    """
+    return sorted(
+        name for name, member in inspect.getmembers(module, inspect.isfunction)
+        if member.__module__ == module.__name__ and not name.startswith("_")
+        and name not in cases and name not in ignore
+    )
+
+
+def bench_pages(repeat):
+    """
+    Cada página inteira via AppTest: com os caches do Streamlit vazios e já aquecidos.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    def run(page):
+        app = AppTest.from_file(os.path.join(ROOT, "src", "pages", f"{page}.py"), default_timeout=600).run()
+        if app.exception:
+            raise RuntimeError(f"{page}: {app.exception[0].value}")
+
+    results = []
+    for page in PAGES:
+        results.append({"name": page, "mode": "cold", **measure(lambda: run(page), repeat, clear_streamlit_caches)})
+        results.append({"name": page, "mode": "warm", **measure(lambda: run(page), repeat)})
+    return results
+
+
+def run_size(size, db_path, repeat, seed, skip_pages):
+    """
+    Executa todas as medições de um tamanho (chamado no processo filho).
+    """
+    from synthetic import build_database
+    from utils import analysis_utils, visualization_utils
+    from utils.db_utils import load_data_from_db
+    from utils.ledger import PreparedLedger
+
+    results = []
+    if not os.path.exists(db_path):
+        start = time.perf_counter()
+        build_database(db_path, SIZES[size], seed=seed)
+        results.append({"group": "ingest", "name": "build_database", "mode": None,
+                        "min_s": time.perf_counter() - start, "median_s": time.perf_counter() - start, "repeat": 1})
+
+    results += [{"group": "db", **row} for row in bench_db(db_path, repeat)]
+
+    frame = load_data_from_db(db_path)
+    results.append({"group": "analysis", "name": "PreparedLedger", "mode": None,
+                    **measure(lambda: PreparedLedger(frame), repeat)})
+    ledger = PreparedLedger(frame)
+    for module, cases, group, ignore in (
+        (analysis_utils, analysis_cases(frame, ledger), "analysis", ()),
+        (visualization_utils, chart_cases(frame, ledger), "charts", CHART_HELPERS),
+    ):
+        for name in uncovered(module, cases, ignore):
+            print(f"Aviso: {module.__name__}.{name} não tem benchmark", file=sys.stderr)
+        for name, fn in cases.items():
+            if group != "charts":
+                results.append({"group": group, "name": name, "mode": None, **measure(fn, repeat)})
+                continue
+            # Gráficos: montagem do zero e reaproveitada do cache de gráficos. O tamanho da
+            # especificação é medido numa montagem à parte, fora dos tempos.
+            timings = {
+                mode: measure(fn, repeat, setup)
+                for mode, setup in (("cold", visualization_utils.clear_chart_cache), ("warm", None))
+            }
+            visualization_utils.clear_chart_cache()
+            visualization_utils.RECORD_SPEC_SIZES = True
+            try:
+                fn()
+            finally:
+                visualization_utils.RECORD_SPEC_SIZES = False
+            for mode, timing in timings.items():
+                results.append({"group": group, "name": name, "mode": mode, **timing,
+                                "spec_bytes": visualization_utils.SPEC_SIZES.get(name)})
+
+    if not skip_pages:
+        results += [{"group": "pages", **row} for row in bench_pages(repeat)]
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    for row in results:
+        row.update(size=size, rows=SIZES[size])
+    results.append({"size": size, "rows": SIZES[size], "group": "process", "name": "peak_rss_mb",
+                    "mode": None, "value": peak_mb})
+    return results
+
+
+def metadata():
+    import numpy
+    import pandas
+    import streamlit
+
+    def git(*args):
+        completed = subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True)
+        return completed.stdout.strip() if completed.returncode == 0 else None
+
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "versions": {"pandas": pandas.__version__, "numpy": numpy.__version__, "streamlit": streamlit.__version__},
+    }
+
+
+def compare(before_path, after_path):
+    """
+    Imprime, para cada medição presente nos dois arquivos, as medianas e a razão depois/antes.
+    """
+    def index(path):
+        with open(path, encoding="utf-8") as handle:
+            rows = json.load(handle)["results"]
+        return {(row["size"], row["group"], row["name"], row["mode"]): row for row in rows}
+
+    before, after = index(before_path), index(after_path)
+    print(f"{'tamanho':>8}  {'grupo':<9} {'medição':<60} {'antes':>10} {'depois':>10} {'razão':>7}")
+    for key in sorted(set(before) & set(after), key=lambda key: (SIZES.get(key[0], 0), *map(str, key[1:]))):
+        field = "value" if "value" in after[key] else "median_s"
+        old, new = before[key][field], after[key][field]
+        label = key[2] + (f" ({key[3]})" if key[3] else "")
+        ratio = new / old if old else float("nan")
+        print(f"{key[0]:>8}  {key[1]:<9} {label:<60} {old:>10.4f} {new:>10.4f} {ratio:>6.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks das análises e das páginas.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"tamanhos do livro sintético ({', '.join(SIZES)})")
+    parser.add_argument("--repeat", type=int, default=3, help="repetições por medição")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-pages", action="store_true", help="não roda as páginas via AppTest")
+    parser.add_argument("--output", default=None, help="arquivo JSON de saída (padrão: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("ANTES", "DEPOIS"), help="compara dois resultados e sai")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    if args.child:
+        import logging
+
+        logging.getLogger("streamlit").setLevel(logging.ERROR)
+        db_path = os.environ["BANK_DB_PATH"]
+        os.chdir(ROOT)
+        print(json.dumps(run_size(args.child, db_path, args.repeat, args.seed, args.skip_pages)))
+        return 0
+
+    sizes = [size.strip().lower() for size in args.sizes.split(",")]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        parser.error(f"tamanhos desconhecidos: {unknown}")
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    results = []
+    for size in sizes:
+        # Um processo por tamanho: caches, memória e DB_PATH isolados
+        db_path = os.path.join(DATA_DIR, f"ledger_{size}_seed{args.seed}.db")
+        command = [sys.executable, os.path.abspath(__file__), "--child", size,
+                   "--repeat", str(args.repeat), "--seed", str(args.seed)]
+        if args.skip_pages:
+            command.append("--skip-pages")
+        print(f"Rodando {size} ({SIZES[size]} linhas)...", file=sys.stderr)
+        completed = subprocess.run(
+            command, env={**os.environ, "BANK_DB_PATH": db_path}, stdout=subprocess.PIPE, text=True, check=True
+        )
+        results += json.loads(completed.stdout.strip().splitlines()[-1])
+
+    meta = metadata()
+    output = args.output or os.path.join(RESULTS_DIR, f"{(meta['commit'] or 'local')[:12]}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as handle:
+        json.dump({"meta": meta, "results": results}, handle, indent=1, ensure_ascii=False)
+    print(f"Resultados gravados em: {output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
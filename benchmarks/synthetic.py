@@ -0,0 +1,130 @@
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+
+from utils.db_loader import STORED_COLUMNS, to_stored_format, upsert_source
+from utils.db_utils import connect
+from utils.lookups import TRANSACTIONS_VIEW
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PLANO_CONTA_PATH = os.path.join(ROOT, "data", "raw", "PLANO_CONTA.xlsx")
+PROFILE_DB_PATH = os.path.join(ROOT, "bank_data_csv.db")
+
+BANKS = ["CAIXA", "CRED CREA", "INTER"]
+
+
+def load_chart_of_accounts(path=PLANO_CONTA_PATH):
+    """
+    Lê o plano de contas: uma linha por conta, com o tipo (Receitas/Despesas).
+    """
+    plano = pd.read_excel(path)
+    return pd.DataFrame({
+        "conta": plano["Descrição"].astype(str).str.strip(),
+        "is_credit": plano["Tipo"].astype(str).str.strip().eq("Receitas"),
+    })
+
+
+def load_templates(profile_db=PROFILE_DB_PATH, plano_path=PLANO_CONTA_PATH):
+    """
+    Modelos de lançamento (banco, conta, subconta, descrição, sentido e valor) com a
+    distribuição conjunta do banco real, lido em modo somente leitura. Contas do plano
+    que não aparecem no banco entram com subconta "Outras", para cobrir o plano todo.
+    """
+    plano = load_chart_of_accounts(plano_path)
+    templates = pd.DataFrame(columns=["banco", "conta", "subconta", "descricao", "is_credit", "valor"])
+    if os.path.exists(profile_db):
+        conn = sqlite3.connect(f"file:{profile_db}?mode=ro", uri=True)
+        try:
+            # Bancos já migrados guardam banco/conta/subconta como ids; a visão traz os textos
+            has_view = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'view' AND name = ?", (TRANSACTIONS_VIEW,)
+            ).fetchone()
+            templates = pd.read_sql(
+                f"""
+                SELECT banco, conta, subconta, descricao, credito > 0 AS is_credit,
+                       CASE WHEN credito > 0 THEN credito ELSE debito END AS valor
+                FROM {TRANSACTIONS_VIEW if has_view else "bank_transactions"}
+                """,
+                conn,
+            )
+        finally:
+            conn.close()
+        # Bancos ainda no formato original guardam reais; no formato atual, centavos
+        if pd.api.types.is_integer_dtype(templates["valor"]):
+            templates["valor"] = templates["valor"] / 100
+        templates["is_credit"] = templates["is_credit"].astype(bool)
+
+    missing = plano[~plano["conta"].isin(templates["conta"])]
+    if len(missing):
+        extra = pd.DataFrame({
+            "banco": np.resize(BANKS, len(missing)),
+            "conta": missing["conta"].to_numpy(),
+            "subconta": "Outras",
+            "descricao": "LANCAMENTO " + missing["conta"].str.upper().to_numpy(),
+            "is_credit": missing["is_credit"].to_numpy(),
+            "valor": 500.0,
+        })
+        templates = pd.concat([templates, extra], ignore_index=True)
+    return templates.reset_index(drop=True)
+
+
+def generate_ledger(rows, start="2022-01-01", years=3, seed=0, templates=None):
+    """
+    Gera `rows` transações sintéticas no formato de load_data_from_db (datas em
+    datetime, valores em reais), espalhadas por `years` anos a partir de `start`.
+    Banco, conta, subconta e descrição seguem a distribuição real (load_templates);
+    datas, documentos e valores são sorteados. O saldo é acumulado por banco.
+    """
+    rng = np.random.default_rng(seed)
+    templates = load_templates() if templates is None else templates
+    picked = templates.iloc[rng.integers(0, len(templates), rows)].reset_index(drop=True)
+
+    first_day = pd.Timestamp(start)
+    span = (first_day + pd.DateOffset(years=years) - first_day).days
+    dates = first_day + pd.to_timedelta(np.sort(rng.integers(0, span, rows)), unit="D")
+
+    amounts = np.round(
+        picked["valor"].to_numpy(dtype="float64").clip(min=1.0) * rng.uniform(0.5, 1.5, rows), 2
+    )
+    is_credit = picked["is_credit"].to_numpy(dtype=bool)
+    documento = rng.integers(10_000_000, 99_999_999, rows).astype(str).astype(object)
+    documento[rng.random(rows) < 0.5] = None
+
+    ledger = pd.DataFrame({
+        "data": dates,
+        "descricao": picked["descricao"].to_numpy(),
+        "documento": documento,
+        "credito": np.where(is_credit, amounts, 0.0),
+        "debito": np.where(is_credit, 0.0, amounts),
+        "banco": picked["banco"].to_numpy(),
+        "conta": picked["conta"].to_numpy(),
+        "subconta": picked["subconta"].to_numpy(),
+    })
+    ledger["saldo"] = (ledger["credito"] - ledger["debito"]).groupby(ledger["banco"]).cumsum().round(2)
+    ledger["file_path"] = (
+        "synthetic/BANCO " + ledger["banco"] + " - " + ledger["data"].dt.year.astype(str) + ".xlsx"
+    )
+    return ledger[STORED_COLUMNS]
+
+
+def build_database(db_path, rows, seed=0, years=3):
+    """
+    Cria (ou reaproveita) um banco SQLite com `rows` transações sintéticas, gravadas
+    pelo carregador incremental, um arquivo de origem por banco e ano.
+    Retorna o caminho do banco.
+    """
+    if os.path.exists(db_path):
+        return db_path
+    ledger = to_stored_format(generate_ledger(rows, seed=seed, years=years))
+    partial_path = f"{db_path}.partial"
+    if os.path.exists(partial_path):
+        os.remove(partial_path)
+    conn = connect(partial_path)
+    try:
+        for file_path, source in ledger.groupby("file_path", sort=False):
+            upsert_source(conn, file_path, source, f"synthetic-{seed}-{rows}")
+    finally:
+        conn.close()
+    os.replace(partial_path, db_path)
+    return db_path
@@ -1,5 +1,6 @@
 import streamlit as st
 from streamlit_extras.app_logo import add_logo
+from utils.tenants import select_tenant
 
 home = st.Page("pages/home_page.py", title="Inicio", icon="🏠")
 dashboard = st.Page("pages/dashboard_page.py", title="Dashboard", icon="📊")
@@ -22,6 +23,9 @@ st.markdown(
 )
 
 
+# Empresa atendida: cada uma tem seu banco e seus caches (ver utils/tenants.py)
+select_tenant()
+
 # Configuração do menu manual
 pg = st.navigation([home, dashboard, bank, historic])
 pg.run()
\ No newline at end of file
@@ -1,54 +1,53 @@
-import sqlite3
+import sys
 import pandas as pd
 import os
 
-# Caminho do banco de dados SQLite
-csv_database_path = "bank_data_csv.db"
+# Permite importar os módulos de src/utils ao rodar este arquivo como script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db_loader import STORED_COLUMNS, frame_content_hash, source_key, to_stored_format, upsert_source
+from utils.db_utils import DB_PATH, PROJECT_ROOT, connect
+from utils.tenants import get_tenant
+
+# Uso: python src/database/db_creation.py [<empresa> [<csv>]]
+# Caminho do banco de dados SQLite: o da empresa passada como argumento
+# ou, sem argumento, o da empresa original
+csv_database_path = get_tenant(sys.argv[1]).db_path if len(sys.argv) > 1 else DB_PATH
 csv_database_path = os.path.abspath(csv_database_path)  # Caminho absoluto
 
 # Garantir que o diretório do banco de dados exista
 os.makedirs(os.path.dirname(csv_database_path), exist_ok=True)
 
-# Conectar ao banco de dados
-conn = sqlite3.connect(csv_database_path)
-
-# Criar a tabela se ainda não existir
-schema = """
-CREATE TABLE IF NOT EXISTS bank_transactions (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    data DATE NOT NULL,
-    descricao TEXT NOT NULL,
-    documento TEXT,
-    credito REAL DEFAULT 0,
-    debito REAL DEFAULT 0,
-    saldo REAL DEFAULT 0,
-    banco TEXT NOT NULL,
-    conta TEXT,
-    subconta TEXT,
-    file_path TEXT
-);
-"""
-cursor = conn.cursor()
-cursor.execute(schema)
+# Conectar ao banco de dados (cria a tabela ou atualiza um banco antigo até a versão atual)
+conn = connect(csv_database_path)
 
 # Caminho do CSV
-csv_path = "./data/processed/df_concat.csv"  # Atualize o caminho, se necessário
-csv_path = os.path.abspath(csv_path)
+csv_path = os.path.join(PROJECT_ROOT, "data", "processed", "df_concat.csv")  # Atualize o caminho, se necessário
+csv_path = os.path.abspath(sys.argv[2]) if len(sys.argv) > 2 else csv_path
 
 # Carregar os dados do CSV
 df = pd.read_csv(csv_path)
 
-# Verificar e ajustar o formato das colunas, se necessário
-df['data'] = pd.to_datetime(df['DATA'], errors='coerce')  # Converte a data para o formato correto
-df['saldo'] = pd.to_numeric(df['SALDO'], errors='coerce')  # Garante que o saldo seja numérico
+# Converter para o formato gravado: datas em dias desde 1970-01-01 e valores em centavos
 df = df.rename(columns=str.lower)  # Normaliza os nomes das colunas
+df = to_stored_format(df)
+
+# Os FILE_PATH do CSV são relativos à pasta do notebook que o gerou
+notebook_dir = os.path.join(PROJECT_ROOT, "notebook")
+
+# Popular o banco de dados de forma incremental: cada arquivo de origem (FILE_PATH)
+# só é regravado se o seu conteúdo mudou desde a última execução
+for file_path, rows in df[STORED_COLUMNS].groupby('file_path', sort=False):
+    file_path = source_key(file_path, notebook_dir)  # mesma chave usada por `python -m ingest`
+    result = upsert_source(conn, file_path, rows, frame_content_hash(rows))
+    if result['skipped']:
+        print(f"Sem alterações: {file_path}")
+    else:
+        print(
+            f"{file_path}: {result['inserted']} inseridas, "
+            f"{result['updated']} atualizadas, {result['deleted']} removidas"
+        )
 
-# Popular o banco de dados
-df[['data', 'descricao', 'documento', 'credito', 'debito', 'saldo', 'banco','conta','subconta', 'file_path']].to_sql(
-    'bank_transactions', conn, if_exists='append', index=False
-)
-
-conn.commit()
 conn.close()
 
 print(f"Banco de dados populado com sucesso a partir do CSV em: {csv_database_path}")
@@ -0,0 +1,34 @@
+import argparse
+import sys
+from forecast.engine import refresh_forecasts
+from utils.db_utils import DB_PATH
+from utils.tenants import get_tenant
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m forecast",
+        description="Ajusta os modelos SARIMAX das séries mensais e grava as previsões no banco.",
+    )
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--db", default=DB_PATH, help=f"caminho do banco (padrão: {DB_PATH})")
+    target.add_argument("--empresa", metavar="SLUG", help="usa o banco da empresa (ver utils/tenants.py)")
+    parser.add_argument("--workers", type=int, default=None, help="processos em paralelo (padrão: nº de CPUs)")
+    parser.add_argument(
+        "--force", action="store_true",
+        help="reajusta todas as séries, mesmo as que não mudaram desde o último ajuste",
+    )
+    args = parser.parse_args(argv)
+    if args.empresa:
+        args.db = get_tenant(args.empresa).db_path
+
+    summary = refresh_forecasts(args.db, max_workers=args.workers, force=args.force)
+    print(
+        f"{summary['ajustadas']} séries ajustadas, {summary['mantidas']} mantidas, "
+        f"{summary['ignoradas']} sem dados suficientes, {summary['removidas']} removidas"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+from concurrent.futures import ProcessPoolExecutor
+from forecast.models import fit_series
+from forecast.series import series_signature
+from forecast.store import save_results, stale_series
+from utils.db_utils import DB_PATH, connect
+
+
+def _tasks(series, models, keys):
+    """
+    Monta as tarefas de fit_series das séries em `keys`, com o modelo anterior de
+    cada uma (quando houver) para recomeçar a busca dele.
+    """
+    tasks = []
+    for key in keys:
+        first, values = series[key]
+        previous = models.get(key)
+        tasks.append({
+            "key": key,
+            "inicio": first,
+            "values": values,
+            "assinatura": series_signature(first, values),
+            "previous": previous if previous and previous["order"] else None,
+        })
+    return tasks
+
+
+def fit_many(tasks, max_workers=None):
+    """
+    Ajusta as séries em paralelo num pool de processos (cada ajuste é independente).
+    Com max_workers=1 não há pool: as séries são ajustadas uma a uma no processo atual.
+    """
+    if max_workers == 1 or len(tasks) <= 1:
+        return [fit_series(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        # Lotes de várias séries por processo: cada ajuste leva de milissegundos a décimos de segundo
+        return list(pool.map(fit_series, tasks, chunksize=max(1, len(tasks) // 32)))
+
+
+def refresh_forecasts(db_path=DB_PATH, max_workers=None, force=False):
+    """
+    Reajusta os modelos das séries desatualizadas (ver store.stale_series) e grava as
+    novas previsões; as séries cujos dados não mudaram são mantidas. Com force=True,
+    reajusta todas. Retorna as contagens 'ajustadas', 'ignoradas' (sem dados
+    suficientes), 'mantidas' e 'removidas'.
+    """
+    conn = connect(db_path)
+    try:
+        series, models, stale = stale_series(conn)
+        keys = list(series) if force else stale
+        results = fit_many(_tasks(series, models, keys), max_workers)
+        removed = [key for key in models if key not in series]
+        save_results(conn, results, removed)
+    finally:
+        conn.close()
+    skipped = sum("skipped" in result for result in results)
+    return {
+        "ajustadas": len(results) - skipped,
+        "ignoradas": skipped,
+        "mantidas": len(series) - len(keys),
+        "removidas": len(removed),
+    }
@@ -0,0 +1,124 @@
+import warnings
+import numpy as np
+from statsmodels.tsa.statespace.sarimax import SARIMAX
+from statsmodels.tsa.stattools import adfuller
+
+# Ajuste de um SARIMAX por série, no fluxo do notebook prevision (teste de Dickey-Fuller
+# para escolher a diferenciação, modelo sazonal de 12 meses), com busca dos parâmetros
+# numa grade pequena escolhida pelo AIC.
+
+SEASONAL_PERIOD = 12
+FORECAST_MONTHS = 3
+CONFIDENCE = 0.95
+
+# Séries mais curtas (ou com poucos meses com movimento) não são previstas
+MIN_MONTHS = 12
+# A parte sazonal (diferença de 12 meses) só entra com duas temporadas e meia de dados
+MIN_SEASONAL_MONTHS = 30
+
+# Grade de busca: (p, q) da parte regular e (P, Q) da sazonal
+ORDERS = ((0, 1), (1, 0), (1, 1))
+SEASONAL_ORDERS = ((0, 1), (1, 1))
+
+
+def is_stationary(values, alpha=0.05):
+    """
+    Teste de Dickey-Fuller aumentado (test_stationarity do notebook): a série é
+    estacionária quando o valor-p fica abaixo de `alpha`. Séries constantes contam como estacionárias.
+    """
+    if np.ptp(values) == 0:
+        return True
+    return adfuller(values)[1] <= alpha
+
+
+def candidate_orders(n_months, d, previous=None):
+    """
+    Combinações (order, seasonal_order) a testar numa série de `n_months` meses.
+    Com o modelo anterior da série (`previous`, uma combinação), a busca recomeça
+    dele e testa só os vizinhos na grade (um parâmetro a mais ou a menos).
+    """
+    seasonal = n_months >= MIN_SEASONAL_MONTHS
+    grid = [
+        ((p, d, q), (P, 1, Q, SEASONAL_PERIOD) if seasonal else (0, 0, 0, 0))
+        for p, q in ORDERS
+        for P, Q in (SEASONAL_ORDERS if seasonal else ((0, 0),))
+    ]
+    if previous is None or previous not in grid:
+        return grid
+
+    def distance(candidate):
+        (p, _, q), (P, _, Q, _) = candidate
+        (p0, _, q0), (P0, _, Q0, _) = previous
+        return abs(p - p0) + abs(q - q0) + abs(P - P0) + abs(Q - Q0)
+
+    return [previous] + [candidate for candidate in grid if distance(candidate) == 1]
+
+
+def fit_series(task):
+    """
+    Ajusta e prevê uma série (executado nos processos do pool, ver engine.py).
+    `task` tem 'key', 'inicio', 'values' (centavos), 'assinatura' e 'previous' (order,
+    seasonal_order e params do último ajuste, ou None). O ajuste da combinação anterior
+    parte dos parâmetros guardados, o que costuma convergir em poucas iterações.
+
+    Retorna um dict com a combinação escolhida, os parâmetros, o AIC e as previsões
+    (mes, previsto, inferior, superior) em centavos; ou com 'skipped' (o motivo) quando
+    a série não tem dados suficientes.
+    """
+    values = np.asarray(task["values"], dtype="int64")
+    result = {
+        "key": task["key"],
+        "inicio": task["inicio"],
+        "ultimo_mes": task["inicio"] + len(values) - 1,
+        "assinatura": task["assinatura"],
+    }
+    if len(values) < MIN_MONTHS or np.count_nonzero(values) < MIN_MONTHS // 2:
+        return {**result, "skipped": "poucos meses com movimento"}
+
+    reais = values / 100
+    previous = task.get("previous")
+    previous_orders = (previous["order"], previous["seasonal_order"]) if previous else None
+
+    best = None
+    with warnings.catch_warnings():
+        # Séries curtas geram avisos de convergência e de parâmetros iniciais em todo ajuste
+        warnings.simplefilter("ignore")
+        d = 0 if is_stationary(reais) else 1
+        for order, seasonal_order in candidate_orders(len(values), d, previous_orders):
+            start_params = None
+            if previous and (order, seasonal_order) == previous_orders:
+                start_params = previous["params"]
+            try:
+                fitted = SARIMAX(reais, order=order, seasonal_order=seasonal_order).fit(
+                    disp=False, start_params=start_params
+                )
+            except (ValueError, np.linalg.LinAlgError):
+                continue
+            if not np.isfinite(fitted.aic) or not np.isfinite(fitted.params).all():
+                continue
+            if best is None or fitted.aic < best[2].aic:
+                best = (order, seasonal_order, fitted)
+        if best is None:
+            return {**result, "skipped": "nenhum modelo convergiu"}
+
+        order, seasonal_order, fitted = best
+        prediction = fitted.get_forecast(FORECAST_MONTHS)
+        mean = np.asarray(prediction.predicted_mean)
+        bounds = np.asarray(prediction.conf_int(alpha=1 - CONFIDENCE))
+    if not (np.isfinite(mean).all() and np.isfinite(bounds).all()):
+        return {**result, "skipped": "previsão inválida"}
+
+    # Crédito e débito nunca são negativos; o líquido pode ser
+    if task["key"][3] != "liquido":
+        mean, bounds = np.maximum(mean, 0), np.maximum(bounds, 0)
+    forecast = np.rint(np.column_stack([mean, bounds]) * 100).astype("int64")
+    return {
+        **result,
+        "order": order,
+        "seasonal_order": seasonal_order,
+        "params": [float(param) for param in np.asarray(fitted.params)],
+        "aic": float(fitted.aic),
+        "forecast": [
+            (result["ultimo_mes"] + step, *row) for step, row in enumerate(forecast.tolist(), start=1)
+        ],
+    }
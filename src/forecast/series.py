@@ -0,0 +1,98 @@
+import hashlib
+import numpy as np
+import pandas as pd
+from utils.ledger import PERIOD_CODES, PERIOD_STARTS
+
+# Séries mensais previstas: o total do livro e cada banco, conta e subconta (dentro da
+# sua conta). Cada série é identificada por (nivel, conta, chave, medida): 'conta' só é
+# preenchida nas subcontas e 'chave' é o banco, a conta ou a subconta ('' no total).
+LEVELS = {
+    "total": (),
+    "banco": ("banco",),
+    "conta": ("conta",),
+    "subconta": ("conta", "subconta"),
+}
+
+# Crédito, débito e líquido (crédito - débito) de cada série
+MEASURES = ("credito", "debito", "liquido")
+
+
+def read_monthly_totals(conn):
+    """
+    Lê as somas mensais por banco/conta/subconta (em centavos) dos totais
+    pré-agregados de transaction_rollups, com o código inteiro do mês em 'mes'.
+    """
+    monthly = pd.read_sql(
+        "SELECT r.data, b.valor AS banco, c.valor AS conta, s.valor AS subconta, r.credito, r.debito"
+        " FROM transaction_rollups r"
+        " JOIN lookup_banco b ON b.id = r.banco_id"
+        " LEFT JOIN lookup_conta c ON c.id = r.conta_id"
+        " LEFT JOIN lookup_subconta s ON s.id = r.subconta_id"
+        " WHERE r.granularity = 'month'",
+        conn,
+    )
+    monthly["mes"] = PERIOD_CODES["M"](monthly["data"].to_numpy(dtype="int64"))
+    return monthly
+
+
+def _series_key(nivel, values, medida):
+    """
+    Monta a chave (nivel, conta, chave, medida) a partir dos valores agrupados.
+    """
+    if nivel == "total":
+        return (nivel, "", "", medida)
+    if nivel == "subconta":
+        return (nivel, values[0], values[1], medida)
+    return (nivel, "", values[0], medida)
+
+
+def build_series(monthly):
+    """
+    Monta todas as séries mensais a partir de read_monthly_totals. Retorna um dict
+    chave -> (inicio, valores): o código do primeiro mês com transações da série e os
+    totais em centavos (int64) de cada mês desde ele até o último mês com transações
+    da própria série, com zero nos meses sem transações entre os dois.
+    """
+    series = {}
+    if monthly.empty:
+        return series
+    for nivel, keys in LEVELS.items():
+        frame = monthly.dropna(subset=list(keys))
+        sums = frame.groupby([*keys, "mes"])[["credito", "debito"]].sum()
+        if not keys:
+            groups = [((), sums)]
+        elif len(keys) == 1:
+            groups = (((value,), group) for value, group in sums.groupby(level=keys[0]))
+        else:
+            groups = sums.groupby(level=list(keys))
+        for values, group in groups:
+            months = group.index.get_level_values("mes").to_numpy()
+            first, last = int(months.min()), int(months.max())
+            positions = months - first
+            totals = {}
+            for column in ("credito", "debito"):
+                totals[column] = np.zeros(last - first + 1, dtype="int64")
+                totals[column][positions] = group[column].to_numpy(dtype="int64")
+            totals["liquido"] = totals["credito"] - totals["debito"]
+            for medida in MEASURES:
+                series[_series_key(nivel, values, medida)] = (first, totals[medida])
+    return series
+
+
+def series_signature(first, values):
+    """
+    Assinatura dos dados de uma série: muda quando chega um mês novo ou quando um
+    mês já conhecido é regravado. Um modelo com outra assinatura está desatualizado.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.int64(first).tobytes())
+    digest.update(np.ascontiguousarray(values, dtype="int64").tobytes())
+    return digest.hexdigest()
+
+
+def month_start_days(codes):
+    """
+    Converte códigos de mês no primeiro dia do mês, em dias desde 1970-01-01
+    (o formato de 'data' nas tabelas).
+    """
+    return PERIOD_STARTS["M"](np.asarray(codes, dtype="int64")).astype("int64")
@@ -0,0 +1,94 @@
+import json
+from datetime import datetime
+import pandas as pd
+from forecast.series import build_series, month_start_days, read_monthly_totals, series_signature
+
+# Modelos e previsões ficam no próprio banco (tabelas forecast_models e forecasts, ver
+# a versão 8 em utils/db_migrations.py). De cada modelo guardam-se a combinação e os
+# parâmetros ajustados, o suficiente para reconstruí-lo e para recomeçar a busca dele.
+KEY_COLUMNS = ("nivel", "conta", "chave", "medida")
+
+
+def read_models(conn):
+    """
+    Retorna os modelos gravados: dict chave -> {'assinatura', 'order', 'seasonal_order',
+    'params'}, com None nos três últimos para as séries que não puderam ser previstas.
+    """
+    rows = conn.execute(
+        f"SELECT {', '.join(KEY_COLUMNS)}, assinatura, ordem, ordem_sazonal, params FROM forecast_models"
+    ).fetchall()
+    models = {}
+    for *key, assinatura, ordem, ordem_sazonal, params in rows:
+        models[tuple(key)] = {
+            "assinatura": assinatura,
+            "order": tuple(json.loads(ordem)) if ordem else None,
+            "seasonal_order": tuple(json.loads(ordem_sazonal)) if ordem_sazonal else None,
+            "params": json.loads(params) if params else None,
+        }
+    return models
+
+
+def stale_series(conn):
+    """
+    Compara as séries atuais com os modelos gravados. Retorna (series, models, stale):
+    as séries de build_series, os modelos de read_models e as chaves cujo modelo falta
+    ou foi ajustado com outros dados (mês novo ou mês regravado).
+    """
+    series = build_series(read_monthly_totals(conn))
+    models = read_models(conn)
+    stale = [
+        key for key, (first, values) in series.items()
+        if models.get(key, {}).get("assinatura") != series_signature(first, values)
+    ]
+    return series, models, stale
+
+
+def save_results(conn, results, removed=()):
+    """
+    Grava, numa transação, os resultados de models.fit_series (modelo e previsões de
+    cada série, substituindo os anteriores) e apaga as séries em `removed`, que não
+    existem mais no livro.
+    """
+    where = " AND ".join(f"{column} = ?" for column in KEY_COLUMNS)
+    fitted_at = datetime.now().isoformat(timespec="seconds")
+    with conn:
+        for key in [*removed, *(result["key"] for result in results)]:
+            conn.execute(f"DELETE FROM forecast_models WHERE {where}", key)
+            conn.execute(f"DELETE FROM forecasts WHERE {where}", key)
+        for result in results:
+            skipped = "skipped" in result
+            conn.execute(
+                "INSERT INTO forecast_models"
+                f" ({', '.join(KEY_COLUMNS)}, inicio, ultimo_mes, assinatura, ordem, ordem_sazonal, params, aic, ajustado_em)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    *result["key"], result["inicio"], result["ultimo_mes"], result["assinatura"],
+                    None if skipped else json.dumps(result["order"]),
+                    None if skipped else json.dumps(result["seasonal_order"]),
+                    None if skipped else json.dumps(result["params"]),
+                    None if skipped else result["aic"],
+                    fitted_at,
+                ),
+            )
+            if skipped:
+                continue
+            conn.executemany(
+                f"INSERT INTO forecasts ({', '.join(KEY_COLUMNS)}, data, previsto, inferior, superior)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (*result["key"], int(month_start_days(mes)), previsto, inferior, superior)
+                    for mes, previsto, inferior, superior in result["forecast"]
+                ],
+            )
+
+
+def read_forecasts(conn):
+    """
+    Retorna todas as previsões gravadas, com 'data' (primeiro dia do mês, em dias
+    desde 1970-01-01) e 'previsto', 'inferior' e 'superior' em centavos.
+    """
+    return pd.read_sql(
+        f"SELECT {', '.join(KEY_COLUMNS)}, data, previsto, inferior, superior FROM forecasts"
+        f" ORDER BY {', '.join(KEY_COLUMNS)}, data",
+        conn,
+    )
@@ -0,0 +1,53 @@
+import argparse
+import sys
+from ingest.pipeline import ingest_statements
+from utils.db_utils import DB_PATH
+from utils.tenants import get_tenant
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ingest",
+        description="Carrega extratos bancários (.xlsx) no banco SQLite.",
+    )
+    parser.add_argument("files", nargs="+", help="extratos .xlsx a carregar")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--db", default=DB_PATH, help=f"caminho do banco (padrão: {DB_PATH})")
+    target.add_argument("--empresa", metavar="SLUG", help="usa o banco da empresa (ver utils/tenants.py)")
+    parser.add_argument("--workers", type=int, default=None, help="processos em paralelo (padrão: nº de CPUs); com 1, cada extrato é lido e gravado em blocos, com memória constante")
+    parser.add_argument(
+        "--parquet", metavar="DIR", default=None,
+        help="ao final, regrava o snapshot Parquet particionado neste diretório",
+    )
+    args = parser.parse_args(argv)
+    if args.empresa:
+        args.db = get_tenant(args.empresa).db_path
+
+    failed = False
+    for result in ingest_statements(args.files, db_path=args.db, max_workers=args.workers):
+        if "error" in result:
+            failed = True
+            print(f"Erro ao processar {result['file_path']}: {result['error']}")
+        elif result["skipped"]:
+            print(f"Sem alterações: {result['file_path']}")
+        else:
+            print(
+                f"{result['file_path']}: {result['inserted']} inseridas, "
+                f"{result['updated']} atualizadas, {result['deleted']} removidas"
+            )
+
+    if args.parquet:
+        from utils.db_utils import connect, get_db_fingerprint
+        from utils.parquet_store import export_snapshot
+
+        conn = connect(args.db)
+        try:
+            rows = export_snapshot(conn, args.parquet, get_db_fingerprint(args.db))
+        finally:
+            conn.close()
+        print(f"Snapshot Parquet com {rows} transações gravado em: {args.parquet}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
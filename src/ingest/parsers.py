@@ -0,0 +1,209 @@
+import os
+import pandas as pd
+from utils.money_utils import parse_brl_number
+
+# Colunas produzidas por todos os parsers, na mesma forma do df_concat.csv (em minúsculas)
+OUTPUT_COLUMNS = [
+    "data", "descricao", "documento", "credito", "debito", "saldo",
+    "banco", "conta", "subconta", "file_path",
+]
+
+
+def parse_amount(values):
+    """
+    Converte valores de extrato em float. Aceita números, texto no formato brasileiro
+    ("1.234,56", "R$ -1.234,56") e o sufixo C/D da Caixa ("822,25 D" é negativo).
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float)
+    text = values.astype("string").str.strip().str.upper()
+    is_debit = text.str.endswith("D", na=False).to_numpy(dtype=bool)
+    digits = text.str.replace(r"[^\d.,-]", "", regex=True)
+    number = parse_brl_number(digits.mask(digits == ""))
+    return number.where(~is_debit, -number.abs())
+
+
+class StatementParser:
+    """
+    Base dos parsers de extrato. Cada banco informa o texto do cabeçalho da coluna
+    de data e como os cabeçalhos do extrato se traduzem nas colunas internas;
+    o reconhecimento do cabeçalho e a limpeza das linhas são comuns a todos
+    (o extrato é lido em blocos por ingest/reader.py).
+    """
+
+    bank = None
+    header_label = None
+    column_map = {}
+
+    @classmethod
+    def matches(cls, file_path):
+        return cls.bank in os.path.basename(file_path).upper()
+
+    def select_columns(self, header, body):
+        """
+        Monta um DataFrame com as colunas internas a partir dos rótulos do cabeçalho.
+        Quando um rótulo se repete, vale a primeira ocorrência.
+        """
+        selected = {}
+        for position, label in enumerate(header):
+            target = self.column_map.get(str(label).strip()) if label is not None else None
+            if target is not None and target not in selected and position < body.shape[1]:
+                selected[target] = body.iloc[:, position].to_numpy()
+        return pd.DataFrame(selected, index=range(len(body)))
+
+    def is_header(self, row):
+        """
+        Indica se uma linha (sequência de células) é o cabeçalho deste extrato.
+        """
+        label = self.header_label.casefold()
+        return any(cell is not None and str(cell).strip().casefold() == label for cell in row)
+
+    def drop_junk_rows(self, statement):
+        """
+        Mantém apenas lançamentos: linhas com data válida, com descrição e que não são
+        "SALDO ANTERIOR". Isso descarta, de uma vez, títulos de mês, cabeçalhos repetidos,
+        observações, rodapés e linhas vazias.
+        """
+        dates = pd.to_datetime(statement["data"], errors="coerce", format="mixed", dayfirst=True)
+        descricao = statement["descricao"].astype("string").str.strip()
+        is_previous_balance = descricao.str.contains("SALDO ANTERIOR", case=False, na=False)
+        keep = (
+            dates.notna().to_numpy()
+            & (descricao.fillna("") != "").to_numpy(dtype=bool)
+            & ~is_previous_balance.to_numpy(dtype=bool)
+        )
+        statement = statement.loc[keep].reset_index(drop=True)
+        statement["data"] = dates[keep].reset_index(drop=True)
+        return statement
+
+    def convert_amounts(self, statement):
+        """
+        Preenche 'credito' e 'debito' (positivos, em reais) e 'saldo'.
+        """
+        statement["credito"] = parse_amount(statement["credito"]).fillna(0.0)
+        statement["debito"] = parse_amount(statement["debito"]).fillna(0.0)
+        statement["saldo"] = parse_amount(statement["saldo"])
+        return statement
+
+    def parse_rows(self, header, body, file_path):
+        """
+        Limpa um bloco de linhas abaixo do cabeçalho (DataFrame sem cabeçalho) e devolve
+        as colunas de OUTPUT_COLUMNS. A limpeza olha só para cada linha, então o extrato
+        pode ser processado em blocos (ver ingest/reader.py).
+        """
+        statement = self.drop_junk_rows(self.select_columns(header, body))
+        statement = self.convert_amounts(statement)
+        statement["descricao"] = statement["descricao"].astype("string").str.strip()
+        for column in ("documento", "conta", "subconta"):
+            if column not in statement:
+                statement[column] = None
+            else:
+                text = statement[column].astype("string").str.strip()
+                statement[column] = text.astype(object).where(text.fillna("") != "", None)
+        statement["banco"] = self.bank
+        statement["file_path"] = file_path
+        return statement[OUTPUT_COLUMNS]
+
+
+class CredCreaParser(StatementParser):
+    """
+    Extrato da Cred Crea: débitos vêm negativos na coluna DÉBITO.
+    """
+
+    bank = "CRED CREA"
+    header_label = "DATA"
+    column_map = {
+        "DATA": "data",
+        "DESCRIÇÃO": "descricao",
+        "DOCUMENTO": "documento",
+        "CRÉDITO": "credito",
+        "DÉBITO": "debito",
+        "SALDO": "saldo",
+        "CONTA": "conta",
+        "SUBCONTA": "subconta",
+    }
+
+    def convert_amounts(self, statement):
+        statement = super().convert_amounts(statement)
+        statement["debito"] = statement["debito"].abs()
+        return statement
+
+
+class CaixaParser(StatementParser):
+    """
+    Extrato da Caixa: valor e saldo em texto com sufixo C/D, e colunas CRÉDITO/DÉBITO
+    preenchidas à mão. Quando as duas estão vazias, o valor vem da coluna Valor.
+    """
+
+    bank = "CAIXA"
+    header_label = "Data Mov."
+    column_map = {
+        "Data Mov.": "data",
+        "Nr. Doc.": "documento",
+        "Histórico": "descricao",
+        "Valor": "valor",
+        "Saldo": "saldo",
+        "CRÉDITO": "credito",
+        "DÉBITO": "debito",
+        "CONTA": "conta",
+        "SUBCONTA": "subconta",
+    }
+
+    def convert_amounts(self, statement):
+        valor = parse_amount(statement.pop("valor")).fillna(0.0)
+        statement = super().convert_amounts(statement)
+        missing = (statement["credito"] == 0) & (statement["debito"] == 0)
+        statement.loc[missing, "credito"] = valor[missing].clip(lower=0)
+        statement.loc[missing, "debito"] = (-valor[missing]).clip(lower=0)
+        return statement
+
+
+class InterParser(StatementParser):
+    """
+    Extrato do Inter: um único VALOR com sinal, separado aqui em crédito e débito.
+    """
+
+    bank = "INTER"
+    header_label = "DATA LANÇAMENTO"
+    column_map = {
+        "DATA LANÇAMENTO": "data",
+        "HISTÓRICO": "descricao",
+        "VALOR": "valor",
+        "SALDO": "saldo",
+        "CONTA": "conta",
+        "SUBCONTA": "subconta",
+    }
+
+    def convert_amounts(self, statement):
+        valor = parse_amount(statement.pop("valor")).fillna(0.0)
+        statement["credito"] = valor.clip(lower=0)
+        statement["debito"] = (-valor).clip(lower=0)
+        statement["saldo"] = parse_amount(statement["saldo"])
+        return statement
+
+
+PARSERS = [CredCreaParser, CaixaParser, InterParser]
+
+
+def get_parser(file_path):
+    """
+    Retorna o parser do banco indicado no nome do arquivo.
+    """
+    for parser in PARSERS:
+        if parser.matches(file_path):
+            return parser()
+    raise ValueError(f"Nenhum parser reconhece o arquivo: {file_path}")
+
+
+def parse_statement(file_path, chunk_size=5000):
+    """
+    Lê e limpa um extrato .xlsx (primeira planilha) em modo streaming e devolve o
+    extrato inteiro, para ser enviado de volta pelo pool de processos (ver
+    ingest/pipeline.py). Não depende de Streamlit nem do banco.
+    """
+    from ingest.reader import iter_statement_chunks
+
+    chunks = list(iter_statement_chunks(file_path, chunk_size=chunk_size))
+    if not chunks:
+        return pd.DataFrame(columns=OUTPUT_COLUMNS)
+    return pd.concat(chunks, ignore_index=True)
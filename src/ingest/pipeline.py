@@ -0,0 +1,85 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import pandas as pd
+from ingest.parsers import parse_statement
+from ingest.reader import iter_statement_chunks
+from utils.db_loader import file_content_hash, get_source_hash, source_key, to_stored_format, upsert_source
+from utils.db_utils import DB_PATH, connect
+
+
+def parse_statements(file_paths, max_workers=None):
+    """
+    Lê vários extratos em paralelo num pool de processos.
+    Gera (file_path, DataFrame ou exceção) à medida que cada arquivo termina. Cada
+    processo devolve o extrato inteiro, e um arquivo novo só entra no pool quando outro
+    é entregue: ficam em memória no máximo `max_workers` extratos lidos de uma vez.
+    """
+    workers = max_workers or os.cpu_count() or 1
+    pending = list(file_paths)
+    running = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            while pending and len(running) < workers:
+                path = pending.pop(0)
+                running[pool.submit(parse_statement, path)] = path
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = running.pop(future)
+                try:
+                    yield path, future.result()
+                except Exception as error:
+                    yield path, error
+
+
+def _load_statement(conn, path, rows, content_hash):
+    """
+    Grava um extrato lido (DataFrame, blocos ou a exceção da leitura) com o carregador
+    incremental, com a chave da fonte relativa à raiz do projeto (ver source_key). Uma
+    falha vira um resultado com a chave 'error', e os demais arquivos seguem sendo carregados.
+    """
+    try:
+        if isinstance(rows, Exception):
+            raise rows
+        if isinstance(rows, pd.DataFrame):
+            rows = to_stored_format(rows)
+        return upsert_source(conn, source_key(path), rows, content_hash)
+    except Exception as error:
+        return {"file_path": source_key(path), "error": str(error)}
+
+
+def ingest_statements(file_paths, db_path=DB_PATH, max_workers=None):
+    """
+    Carrega extratos .xlsx no banco. Arquivos cujo conteúdo não mudou desde a última
+    carga nem chegam a ser lidos; os demais são processados em paralelo e gravados,
+    um por vez, pelo carregador incremental (utils/db_loader.py).
+    Com max_workers=1 não há pool: cada extrato é lido e gravado em blocos, com
+    memória constante. Com o pool, cada extrato chega inteiro do processo que o leu, e
+    a memória cresce com o tamanho dos `max_workers` maiores extratos.
+    Retorna um resultado por arquivo, com a chave 'error' nos que falharam; os arquivos
+    são gravados com o caminho relativo à raiz do projeto, de qualquer diretório que o
+    comando seja chamado.
+    """
+    conn = connect(db_path)
+    try:
+        hashes = {path: file_content_hash(path) for path in file_paths}
+        results = []
+        pending = []
+        for path in file_paths:
+            if get_source_hash(conn, source_key(path)) == hashes[path]:
+                results.append(
+                    {"file_path": source_key(path), "skipped": True, "inserted": 0, "updated": 0, "deleted": 0}
+                )
+            else:
+                pending.append(path)
+
+        if max_workers == 1:
+            for path in pending:
+                chunks = (to_stored_format(chunk) for chunk in iter_statement_chunks(path))
+                results.append(_load_statement(conn, path, chunks, hashes[path]))
+            return results
+
+        for path, statement in parse_statements(pending, max_workers):
+            results.append(_load_statement(conn, path, statement, hashes[path]))
+        return results
+    finally:
+        conn.close()
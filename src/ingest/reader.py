@@ -0,0 +1,47 @@
+import openpyxl
+import pandas as pd
+from ingest.parsers import get_parser
+
+
+def _pad(row, width):
+    """
+    Ajusta uma linha do openpyxl para `width` células (linhas podem vir mais curtas).
+    """
+    row = tuple(row[:width])
+    return row + (None,) * (width - len(row))
+
+
+def iter_statement_chunks(file_path, chunk_size=5000):
+    """
+    Lê um extrato .xlsx em modo somente leitura (openpyxl read_only) e gera DataFrames
+    de até `chunk_size` linhas já limpas, no formato de OUTPUT_COLUMNS.
+
+    O preâmbulo é percorrido só até o cabeçalho ('DATA', 'Data Mov.' ou
+    'DATA LANÇAMENTO'); a partir daí as linhas são acumuladas e limpas bloco a bloco,
+    então a memória usada não cresce com o tamanho do arquivo.
+    """
+    parser = get_parser(file_path)
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        rows = sheet.iter_rows(values_only=True)
+
+        header = next((row for row in rows if parser.is_header(row)), None)
+        if header is None:
+            raise ValueError(f"Cabeçalho '{parser.header_label}' não encontrado em {file_path}")
+        width = len(header)
+
+        buffer = []
+        for row in rows:
+            buffer.append(_pad(row, width))
+            if len(buffer) >= chunk_size:
+                chunk = parser.parse_rows(header, pd.DataFrame.from_records(buffer), file_path)
+                buffer = []
+                if not chunk.empty:
+                    yield chunk
+        if buffer:
+            chunk = parser.parse_rows(header, pd.DataFrame.from_records(buffer), file_path)
+            if not chunk.empty:
+                yield chunk
+    finally:
+        workbook.close()
@@ -1,37 +1,45 @@
 import altair as alt
 import streamlit as st
 import pandas as pd
-from utils.analysis_utils import get_yearly_summary, get_monthly_summary, prepare_yearly_data_for_line_chart, prepare_monthly_data_for_line_chart, convert_date_column, add_month_and_year_columns
-from utils.visualization_utils import create_yearly_summary_chart, create_yearly_line_chart, create_monthly_summary_chart, create_monthly_line_chart
-from utils.db_utils import load_data_from_db
+from utils.analysis_utils import get_yearly_summary, get_monthly_summary, prepare_yearly_data_for_line_chart, prepare_monthly_data_for_line_chart
+from utils.visualization_utils import create_yearly_summary_chart, create_yearly_line_chart, create_monthly_summary_chart, create_monthly_line_chart, render_chart
+from utils.db_utils import TransactionFilter, aggregate_transactions, get_balance_breaks, get_facet_values
+from utils.ledger import PreparedLedger
+from utils.money_utils import from_centavos
+from utils.reconciliation import BREAK_TYPES
+from utils.tenants import current_tenant, stop_without_transactions
+from datetime import date
 
 
 
 st.title("Análise por Banco e Ano")
-data = load_data_from_db()
-data = convert_date_column(data, "data")
-data = add_month_and_year_columns(data, "data")
+
+# Todas as consultas vão ao banco da empresa escolhida (ver utils/tenants.py)
+tenant = current_tenant()
+db_path = tenant.db_path
+stop_without_transactions(tenant)
 
 # Filtros
 col1, col2, col3 = st.columns(3)
 with col1:
-    bancos_disponiveis = ["Todos os Bancos"] + list(data["banco"].unique())
+    bancos_disponiveis = ["Todos os Bancos"] + get_facet_values("banco", db_path=db_path)
     selected_bank = st.selectbox("Selecione o Banco", bancos_disponiveis)
 
 with col2:
-    anos_disponiveis = ["Todos os Anos"] + sorted(data["data"].dt.year.unique())
+    anos_disponiveis = ["Todos os Anos"] + get_facet_values("ano", db_path=db_path)
     selected_year = st.selectbox("Selecione o Ano", anos_disponiveis)
 
 with col3:
     chart_type = st.radio("Selecione o Tipo de Gráfico", ["Barra", "Linha"])
 
-if selected_bank != "Todos os Bancos":
-    data = data[data["banco"] == selected_bank]
-
-if selected_year != "Todos os Anos":
-    data = data[data["data"].dt.year == selected_year]
-
-data["ano"] = data["data"].dt.year
+# Filtros e soma mensal por banco feitos no SQLite
+filters = TransactionFilter(
+    banco=None if selected_bank == "Todos os Bancos" else selected_bank,
+    start_date=None if selected_year == "Todos os Anos" else date(selected_year, 1, 1),
+    end_date=None if selected_year == "Todos os Anos" else date(selected_year, 12, 31),
+)
+# O ledger deriva ano e mês uma única vez para todos os resumos abaixo
+data = PreparedLedger(aggregate_transactions(filters, period="month", by=("banco",), db_path=db_path))
 
 credit_summary = get_yearly_summary(data, "credito")
 debit_summary = get_yearly_summary(data, "debito")
@@ -46,9 +54,9 @@ debit_chart = create_yearly_summary_chart(
 st.subheader("Gráficos de Crédito e Débito")
 col4, col5 = st.columns(2)
 with col4:
-    st.altair_chart(credit_chart, use_container_width=True)
+    render_chart(credit_chart, use_container_width=True)
 with col5:
-    st.altair_chart(debit_chart, use_container_width=True)
+    render_chart(debit_chart, use_container_width=True)
 
 if chart_type == "Barra":
     credit_summary_month = get_monthly_summary(data, "credito")
@@ -73,6 +81,26 @@ else:
 st.subheader("Gráficos de Crédito e Débito por Mês")
 col6, col7 = st.columns(2)
 with col6:
-    st.altair_chart(credit_chart_month, use_container_width=True)
+    render_chart(credit_chart_month, use_container_width=True)
 with col7:
-    st.altair_chart(debit_chart_month, use_container_width=True)
+    render_chart(debit_chart_month, use_container_width=True)
+
+# Conciliação: saldo informado nos extratos x movimento, conferida na ingestão
+st.subheader("Conciliação de Saldo")
+breaks = get_balance_breaks(db_path)
+if filters.banco is not None:
+    breaks = breaks[breaks["banco"] == filters.banco]
+if selected_year != "Todos os Anos":
+    breaks = breaks[breaks["data"].dt.year == selected_year]
+if breaks.empty:
+    st.success("O saldo dos extratos confere com o movimento em todas as transações.")
+else:
+    counts = breaks["tipo"].value_counts()
+    st.caption(" · ".join(f"{BREAK_TYPES[tipo]}: {count}" for tipo, count in counts.items()))
+    st.dataframe(
+        breaks.assign(
+            tipo=breaks["tipo"].map(BREAK_TYPES),
+            **{column: from_centavos(breaks[column]) for column in ("esperado", "saldo", "diferenca")},
+        )[["data", "banco", "descricao", "tipo", "esperado", "saldo", "diferenca"]].reset_index(drop=True),
+        use_container_width=True,
+    )
@@ -1,29 +1,35 @@
 import streamlit as st
 from utils.analysis_utils import (
-    analyze_supplier_profitability, clean_balance_column, calculate_salary_expenses, calculate_monthly_profit,
+    analyze_supplier_profitability, calculate_salary_expenses, calculate_monthly_profit,
     prepare_credit_debit_data, prepare_yearly_account_data, prepare_yearly_subaccount_data,
-    comparar_calcular_total
+    comparar_calcular_total, prepare_forecast_data
 )
 from utils.visualization_utils import (
     create_salary_chart, create_profit_chart, create_credit_debit_chart, create_supplier_profit_chart,
-    create_yearly_account_chart, create_yearly_subaccount_chart, create_supplier_profit_chart, create_yearly_account_chart, create_yearly_subaccount_chart, comparar_semanal, comparar_mensal, comparar_anual
+    create_yearly_account_chart, create_yearly_subaccount_chart, comparar_semanal, comparar_mensal, comparar_anual,
+    create_forecast_chart, render_chart
 )
-from utils.db_utils import load_data_from_db
-import pandas as pd
+from utils.db_utils import TransactionFilter, aggregate_transactions, get_db_fingerprint, get_facet_values, get_forecasts
+from utils.ledger import PreparedLedger
+from utils.panels import panel_data, select_panel
+from utils.tenants import current_tenant, stop_without_transactions
+from datetime import date
 
 st.title("Dashboard de Desempenho Financeiro")
 
-# Carregar dados do banco
-data = load_data_from_db()
-data = clean_balance_column(data)
+# Todas as consultas vão ao banco da empresa escolhida (ver utils/tenants.py)
+tenant = current_tenant()
+db_path = tenant.db_path
+stop_without_transactions(tenant)
 
-# Converter coluna de data
-data['data'] = pd.to_datetime(data['data'])
-data['year'] = data['data'].dt.year
+# Todos os gráficos saem dos totais pré-agregados do SQLite (transaction_rollups):
+# as funções de análise recebem só esses resumos, com os mesmos nomes de coluna.
+# Os gráficos são mensais ou anuais, então basta a soma mensal por banco/conta/subconta.
+MONTHLY_GROUPING = dict(period="month", by=("banco", "conta", "subconta"))
 
 # Filtro de intervalo de anos
 st.sidebar.header("Filtros")
-available_years = sorted(data['year'].unique())
+available_years = get_facet_values("ano", db_path=db_path)
 start_year, end_year = st.sidebar.select_slider(
     "Selecione o intervalo de anos:",
     options=available_years,
@@ -31,36 +37,53 @@ start_year, end_year = st.sidebar.select_slider(
 )
 
 # Filtrar dados pelo intervalo de anos
-filtered_data = data[(data['year'] >= start_year) & (data['year'] <= end_year)]
+year_filter = TransactionFilter(start_date=date(start_year, 1, 1), end_date=date(end_year, 12, 31))
+filtered_data = aggregate_transactions(year_filter, **MONTHLY_GROUPING, db_path=db_path)
+# Datas e valores são preparados uma vez e compartilhados por todas as análises da página
+ledger = PreparedLedger(filtered_data)
+
+# Painéis da página: só o escolhido é calculado e desenhado em cada execução, e os
+# resultados ficam na sessão enquanto o banco e os filtros de que dependem não mudam.
+PANELS = ["📊 Geral", "📈 Entradas e Saídas", "🏦 Contas e Subcontas", "🚚 Fornecedores", "🔮 Previsão"]
+
+# Séries previstas (ver src/forecast) e os nomes exibidos
+FORECAST_LEVELS = {"Total": "total", "Banco": "banco", "Conta": "conta", "Subconta": "subconta"}
+FORECAST_MEASURES = {"Crédito": "credito", "Débito": "debito", "Líquido": "liquido"}
+data_key = (get_db_fingerprint(db_path), start_year, end_year)
 
 # Mensagem informativa
 if filtered_data.empty:
     st.warning("Não há dados para o intervalo de anos selecionado.")
 else:
     # Organizar os gráficos em abas
-    tab1, tab2, tab3, tab4 = st.tabs(["📊 Geral", "📈 Entradas e Saídas", "🏦 Contas e Subcontas","🚚 Fornecedores"])
+    panel = select_panel(PANELS, key="dashboard_panel")
 
     # Aba: Geral
-    with tab1:
+    if panel == PANELS[0]:
+        # Totais diários do intervalo, base da comparação por semana/mês/ano
+        salary_expenses, monthly_profit, daily_data = panel_data("geral", data_key, lambda: (
+            calculate_salary_expenses(ledger),
+            calculate_monthly_profit(ledger),
+            aggregate_transactions(year_filter, period="day", db_path=db_path),
+        ), scope=tenant.slug)
+
         st.markdown("### Análises Gerais")
         col1, col2 = st.columns(2)
         with col1:
             # Gráfico de gastos com funcionários
-            salary_expenses = calculate_salary_expenses(filtered_data)
             if not salary_expenses.empty:
                 st.markdown("#### Gastos Mensais com Funcionários")
                 salary_chart = create_salary_chart(salary_expenses)
-                st.altair_chart(salary_chart, use_container_width=True)
+                render_chart(salary_chart, use_container_width=True)
             else:
                 st.info("Sem dados de gastos com funcionários para o período.")
 
         with col2:
             # Gráfico de lucro mensal
-            monthly_profit = calculate_monthly_profit(filtered_data)
             if not monthly_profit.empty:
                 st.markdown("#### Lucro Mensal")
                 profit_chart = create_profit_chart(monthly_profit)
-                st.altair_chart(profit_chart, use_container_width=True)
+                render_chart(profit_chart, use_container_width=True)
             else:
                 st.info("Sem dados de lucro mensal para o período.")
         
@@ -73,99 +96,119 @@ else:
             "Selecione o tipo de período para análise:", ["Semanal", "Mensal", "Anual"]
         )
 
-        # Controlar o número de períodos a exibir
+        # Controlar o número de períodos a exibir e a data de referência
         num_periods = st.slider(
             "Quantos períodos você deseja visualizar?",
             min_value=1,
-            max_value=3,
+            max_value=12,
             value=3
         )
+        last_date = daily_data['data'].max().date()
+        anchor_date = st.date_input(
+            "Data de referência:",
+            value=last_date,
+            min_value=daily_data['data'].min().date(),
+            max_value=last_date,
+        )
 
         # Calcular totais
-        totais_semana, totais_mes, totais_ano = comparar_calcular_total(data)
+        totais_semana, totais_mes, totais_ano = panel_data(
+            "comparacao", (*data_key, num_periods, anchor_date),
+            lambda: comparar_calcular_total(daily_data, num_periods, anchor_date),
+            scope=tenant.slug,
+        )
 
         # Mostrar os dados e gráficos com base na seleção
         if period_type == "Semanal":
             st.markdown(f"#### Últimas {num_periods} semanas")
-            weekly_data = totais_semana.head(num_periods)
+            weekly_data = totais_semana
             chart_semanal = comparar_semanal(weekly_data)
-            st.altair_chart(chart_semanal, use_container_width=True)
+            render_chart(chart_semanal, use_container_width=True)
 
         elif period_type == "Mensal":
             st.markdown(f"#### Últimos {num_periods} meses")
-            monthly_data = totais_mes.head(num_periods)
+            monthly_data = totais_mes
             chart_mensal = comparar_mensal(monthly_data)
-            st.altair_chart(chart_mensal, use_container_width=True)
+            render_chart(chart_mensal, use_container_width=True)
 
         elif period_type == "Anual":
             st.markdown(f"#### Últimos {num_periods} anos")
-            yearly_data = totais_ano.head(num_periods)
+            yearly_data = totais_ano
             chart_anual = comparar_anual(yearly_data)
-            st.altair_chart(chart_anual, use_container_width=True)
-
-        # Aba: Entradas e Saídas
-        with tab2:
-            st.markdown("### Entradas e Saídas Mensais")
-            credit_debit_data = prepare_credit_debit_data(filtered_data)
-            if not credit_debit_data.empty:
-                credit_debit_chart = create_credit_debit_chart(credit_debit_data)
-                st.altair_chart(credit_debit_chart, use_container_width=True)
-            else:
-                st.info("Sem dados de entradas e saídas para o período.")
+            render_chart(chart_anual, use_container_width=True)
+
+    # Aba: Entradas e Saídas
+    elif panel == PANELS[1]:
+        st.markdown("### Entradas e Saídas Mensais")
+        credit_debit_data = panel_data(
+            "entradas_saidas", data_key, lambda: prepare_credit_debit_data(ledger), scope=tenant.slug
+        )
+        if not credit_debit_data.empty:
+            credit_debit_chart = create_credit_debit_chart(credit_debit_data)
+            render_chart(credit_debit_chart, use_container_width=True)
+        else:
+            st.info("Sem dados de entradas e saídas para o período.")
 
 # Aba: Contas e Subcontas
-    with tab3:
+    elif panel == PANELS[2]:
         st.markdown("### Total de Débito e Crédito por Ano e Conta/Subconta")
 
         # Filtro para selecionar o tipo de conta
-        available_accounts = filtered_data['conta'].unique()
+        available_accounts = get_facet_values("conta", db_path=db_path)
         selected_account = st.selectbox("Selecione o tipo de conta:", options=available_accounts, index=0)
 
         # Filtrar os dados pelo tipo de conta selecionado
-        filtered_account_data = filtered_data[filtered_data['conta'] == selected_account]
+        filtered_account_data = ledger.where(ledger.isin('conta', [selected_account]))
         
 
         if filtered_account_data.empty:
             st.info(f"Não há dados para a conta '{selected_account}' no período selecionado.")
         else:
             # Filtro para selecionar o tipo de subconta
-            available_subaccounts = filtered_account_data['subconta'].unique()
+            available_subaccounts = get_facet_values("subconta", conta=selected_account, db_path=db_path)
             selected_subaccount = st.selectbox("Selecione o tipo de subconta:", options=available_subaccounts, index=0)
 
             # Filtrar os dados pelo tipo de subconta selecionado
-            filtered_subaccount_data = filtered_account_data[filtered_account_data['subconta'] == selected_subaccount]
+            filtered_subaccount_data = filtered_account_data.where(
+                filtered_account_data.isin('subconta', [selected_subaccount])
+            )
 
             if filtered_subaccount_data.empty:
                 st.info(f"Não há dados para a subconta '{selected_subaccount}' no período selecionado.")
             else:
+                yearly_account_data, yearly_subaccount_data = panel_data(
+                    "contas", (*data_key, selected_account, selected_subaccount), lambda: (
+                        prepare_yearly_account_data(filtered_account_data),
+                        prepare_yearly_subaccount_data(filtered_subaccount_data, selected_subaccount),
+                    ),
+                    scope=tenant.slug,
+                )
+
                 # Gráficos por ano e conta/subconta
                 col1, col2 = st.columns(2)
 
                 with col1:
-                    yearly_account_data = prepare_yearly_account_data(filtered_account_data)
                     if not yearly_account_data.empty:
                         st.markdown(f"#### Por Ano e Conta: {selected_account}")
                         yearly_account_chart = create_yearly_account_chart(yearly_account_data)
-                        st.altair_chart(yearly_account_chart, use_container_width=True)
+                        render_chart(yearly_account_chart, use_container_width=True)
                     else:
                         st.info("Sem dados de contas para o período selecionado.")
 
                 with col2:
-                    yearly_subaccount_data = prepare_yearly_subaccount_data(filtered_subaccount_data, selected_subaccount)
                     if not yearly_subaccount_data.empty:
                         st.markdown(f"#### Por Subconta: {selected_subaccount}")
                         yearly_subaccount_chart = create_yearly_subaccount_chart(yearly_subaccount_data, selected_subaccount)
-                        st.altair_chart(yearly_subaccount_chart)
+                        render_chart(yearly_subaccount_chart)
                     else:
                         st.info("Sem dados de subcontas para o período selecionado.")
         
-    with tab4:
+    elif panel == PANELS[3]:
         st.markdown("### Fornecedores")
-        # Filtrar os dados pelo intervalo de tempo selecionado
-        filtered_data = data[(data['year'] >= start_year) & (data['year'] <= end_year)]
-        
         # Realizar a análise de rentabilidade
-        profitability = analyze_supplier_profitability(filtered_data)
+        profitability = panel_data(
+            "fornecedores", data_key, lambda: analyze_supplier_profitability(ledger), scope=tenant.slug
+        )
         
         if profitability.empty:
             st.warning("Não há dados suficientes para calcular a rentabilidade dos fornecedores no período selecionado.")
@@ -176,6 +219,55 @@ else:
         
             # Criar e exibir o gráfico de rentabilidade
             supplier_profit_chart = create_supplier_profit_chart(profitability)
-            st.altair_chart(supplier_profit_chart, use_container_width=True)
+            render_chart(supplier_profit_chart, use_container_width=True)
 
+    elif panel == PANELS[4]:
+        st.markdown("### Previsão Mensal")
+        # As previsões são calculadas fora da página (python -m forecast); aqui só são lidas
+        forecasts, pending = get_forecasts(db_path)
+        if pending:
+            st.info(
+                f"{pending} séries sem previsão ou com meses novos desde o último ajuste. "
+                "Rode `PYTHONPATH=src python -m forecast` para atualizá-las."
+            )
 
+        if forecasts.empty:
+            st.warning("Ainda não há previsões gravadas.")
+        else:
+            col1, col2 = st.columns(2)
+            with col1:
+                level_label = st.radio("Série:", list(FORECAST_LEVELS), horizontal=True)
+            with col2:
+                measure_label = st.radio("Valor:", list(FORECAST_MEASURES), horizontal=True)
+            nivel, medida = FORECAST_LEVELS[level_label], FORECAST_MEASURES[measure_label]
+
+            available = forecasts[(forecasts["nivel"] == nivel) & (forecasts["medida"] == medida)]
+            options = list(available[["conta", "chave"]].drop_duplicates().itertuples(index=False, name=None))
+            if not options:
+                st.info(f"Nenhuma série de {level_label.lower()} tem dados suficientes para prever.")
+            else:
+                conta, chave = options[0]
+                if nivel != "total":
+                    conta, chave = st.selectbox(
+                        f"Selecione {level_label.lower()}:", options,
+                        format_func=lambda option: " / ".join(part for part in option if part),
+                    )
+                series_filter = TransactionFilter(
+                    banco=chave if nivel == "banco" else None,
+                    conta=(conta if nivel == "subconta" else chave) if nivel in ("conta", "subconta") else None,
+                    subconta=chave if nivel == "subconta" else None,
+                )
+                series_forecast = available[(available["conta"] == conta) & (available["chave"] == chave)]
+                # Histórico completo da série, como no ajuste (o intervalo de anos não se aplica)
+                forecast_data = panel_data(
+                    "previsao", (get_db_fingerprint(db_path), nivel, conta, chave, medida),
+                    lambda: prepare_forecast_data(
+                        aggregate_transactions(series_filter, period="month", db_path=db_path),
+                        series_forecast, medida,
+                    ),
+                    scope=tenant.slug,
+                )
+                render_chart(
+                    create_forecast_chart(forecast_data, title=f"{measure_label} mensal previsto"),
+                    use_container_width=True,
+                )
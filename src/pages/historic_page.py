@@ -1,79 +1,95 @@
 import streamlit as st
 import pandas as pd
-from utils.analysis_utils import convert_date_column, transform_data_for_display_in_table
+import calendar
+import math
+from dataclasses import replace
+from datetime import date
+from utils.analysis_utils import transform_data_for_display_in_table
+from utils.money_utils import format_centavos
 
-from utils.db_utils import load_data_from_db
+from utils.db_utils import TransactionFilter, aggregate_transactions, get_facet_values, page_cursors, query_transaction_page, search_transactions
+from utils.tenants import current_tenant, stop_without_transactions
 
 st.title("Histórico de Transações")
-data = load_data_from_db()
-data = convert_date_column(data, "data")
+
+# Todas as consultas vão ao banco da empresa escolhida (ver utils/tenants.py)
+tenant = current_tenant()
+db_path = tenant.db_path
+stop_without_transactions(tenant)
 col1, col2, col6, col7, col8, col9 = st.columns(6)
 with col1:
     selected_month = st.selectbox(
         "Selecione o mês", ["Ano Todo"] + [f"{i:02d}" for i in range(1, 13)]
     )
 with col2:
-    # Define os anos disponíveis no seletor
-    available_years = ["Todos os Anos", 2022, 2023, 2024]
+    # Anos com transações, mantidos pela ingestão (anos novos aparecem sozinhos)
+    available_years = ["Todos os Anos"] + get_facet_values("ano", db_path=db_path)
     selected_year = st.selectbox("Selecione o Ano", options=available_years)
 
-if selected_month == "Ano Todo":
-    filtered_data = data[data["data"].dt.year == selected_year]
-else:
-    filtered_data = data[
-        (data["data"].dt.month == int(selected_month))
-        & (data["data"].dt.year == selected_year)
-    ]
-
+# Os filtros são acumulados e aplicados no SQLite; as opções de banco, conta e
+# subconta vêm das facetas mantidas pela ingestão, que não têm valores nulos.
+filters = TransactionFilter()
 if selected_year != "Todos os Anos":
-    filtered_data = data[data["data"].dt.year == int(selected_year)]
-else:
-    filtered_data = data
+    if selected_month == "Ano Todo":
+        filters = TransactionFilter(
+            start_date=date(selected_year, 1, 1), end_date=date(selected_year, 12, 31)
+        )
+    else:
+        month = int(selected_month)
+        last_day = calendar.monthrange(selected_year, month)[1]
+        filters = TransactionFilter(
+            start_date=date(selected_year, month, 1),
+            end_date=date(selected_year, month, last_day),
+        )
 
-transformed_data = transform_data_for_display_in_table(filtered_data)
-if transformed_data.empty:
+if aggregate_transactions(filters, db_path=db_path)["quantidade"].iloc[0] == 0:
     st.warning("Nenhum dado encontrado para o período selecionado.")
 else:
     # Filtros
     with col6:
-        unique_banks = transformed_data["banco"].unique()
+        unique_banks = get_facet_values("banco", db_path=db_path)
         selected_bank = st.selectbox(
-            "Selecione o Banco", options=["Todos"] + list(unique_banks)
+            "Selecione o Banco", options=["Todos"] + unique_banks
         )
         if selected_bank != "Todos":
-            transformed_data = transformed_data[
-                transformed_data["banco"] == selected_bank
-            ]
+            filters = replace(filters, banco=selected_bank)
     
     with col7: 
-        unique_accounts = transformed_data["conta"].unique()
+        unique_accounts = get_facet_values("conta", db_path=db_path)
         selected_account = st.selectbox(
-            "Selecione a Conta", options=["Todas"] + list(unique_accounts)
+            "Selecione a Conta", options=["Todas"] + unique_accounts
         )
         if selected_account != "Todas":
-            transformed_data = transformed_data[
-                transformed_data["conta"] == selected_account
-            ]
+            filters = replace(filters, conta=selected_account)
     with col8:
-            unique_subaccounts = transformed_data["subconta"].unique()
+            unique_subaccounts = get_facet_values(
+                "subconta", conta=None if selected_account == "Todas" else selected_account, db_path=db_path
+            )
             selected_subaccount = st.selectbox(
-                "Selecione a Subconta", options=["Todas"] + list(unique_subaccounts)
+                "Selecione a Subconta", options=["Todas"] + unique_subaccounts
             )
             if selected_subaccount != "Todas":
-                transformed_data = transformed_data[
-                    transformed_data["subconta"] == selected_subaccount
-                ]
+                filters = replace(filters, subconta=selected_subaccount)
     with col9:
         description_filter = st.text_input("Filtrar por Descrição")
         if description_filter:
-            transformed_data = transformed_data[
-                transformed_data["descricao"].str.contains(
-                    description_filter, case=False, na=False
-                )
-            ]
-    if transformed_data.empty:
+            filters = replace(filters, descricao=description_filter)
+    # Total de linhas e somas vêm dos totais pré-agregados; só a página visível é lida
+    totals = aggregate_transactions(filters, db_path=db_path)
+    total_rows = int(totals["quantidade"].iloc[0])
+    if total_rows == 0:
         st.warning("Nenhum dado encontrado com os filtros aplicados.")
     else:
+        col10, col11 = st.columns([3, 1])
+        with col10:
+            # Com busca por descrição, a primeira opção é a ordem de relevância
+            orders = ["Mais antigas primeiro", "Mais recentes primeiro"]
+            if description_filter:
+                orders = ["Mais relevantes primeiro"] + orders
+            order = st.radio("Ordenar por", orders, horizontal=True)
+        with col11:
+            page_size = st.selectbox("Linhas por página", [50, 100, 250, 500], index=1)
+        descending = order == "Mais recentes primeiro"
         columns_to_display = [
             "data",
             "descricao",
@@ -83,9 +99,58 @@ else:
             "conta",
             "subconta",
         ]
-        st.dataframe(transformed_data[columns_to_display].reset_index(drop=True), use_container_width=True)
-    total_debit = transformed_data["debito"].sum()
-    total_credit = transformed_data["credito"].sum()
+
+        if order == "Mais relevantes primeiro":
+            ranked = transform_data_for_display_in_table(search_transactions(filters, page_size, db_path=db_path), ascending=None)
+            st.dataframe(ranked[columns_to_display].reset_index(drop=True), use_container_width=True)
+            st.caption(f"As {len(ranked):,} transações mais relevantes de {total_rows:,}")
+        else:
+            total_pages = math.ceil(total_rows / page_size)
+
+            # Estado da paginação: número da página e chave (data, id) da borda de onde ela parte.
+            # Qualquer mudança de empresa, filtro, ordem ou tamanho volta para a primeira página.
+            pagination = st.session_state.setdefault("history_pagination", {})
+            view = (db_path, filters, descending, page_size)
+            if pagination.get("view") != view:
+                pagination.update(view=view, number=1, cursor=None, direction="next")
+
+            def go_to(number, cursor, direction):
+                pagination.update(number=number, cursor=cursor, direction=direction)
+
+            number = pagination["number"]
+            # A última página é lida de trás para frente com só as linhas que sobram,
+            # para as páginas continuarem alinhadas a partir da primeira
+            page = query_transaction_page(
+                filters,
+                cursor=pagination["cursor"],
+                direction=pagination["direction"],
+                descending=descending,
+                limit=min(page_size, total_rows - (number - 1) * page_size),
+                db_path=db_path,
+            )
+            first_key, last_key = page_cursors(page)
+
+            transformed_data = transform_data_for_display_in_table(page, ascending=not descending)
+            st.dataframe(transformed_data[columns_to_display].reset_index(drop=True), use_container_width=True)
+
+            nav1, nav2, nav3, nav4, nav5 = st.columns([1, 1, 4, 1, 1])
+            with nav1:
+                st.button("⏮", key="history_first", disabled=number == 1,
+                          on_click=go_to, args=(1, None, "next"))
+            with nav2:
+                st.button("◀", key="history_previous", disabled=number == 1,
+                          on_click=go_to, args=(number - 1, first_key, "previous"))
+            with nav3:
+                st.caption(f"Página {number} de {total_pages} · {total_rows:,} transações")
+            with nav4:
+                st.button("▶", key="history_next", disabled=number == total_pages,
+                          on_click=go_to, args=(number + 1, last_key, "next"))
+            with nav5:
+                st.button("⏭", key="history_last", disabled=number == total_pages,
+                          on_click=go_to, args=(total_pages, None, "previous"))
+    # Totais em centavos inteiros; formatados só na exibição
+    total_debit = int(totals["debito"].iloc[0])
+    total_credit = int(totals["credito"].iloc[0])
     total_profit = total_credit - total_debit
     col3, col4, col5 = st.columns(3)
     with col3:
@@ -101,7 +166,7 @@ else:
                 color: #4CAF50; 
                 margin: 30px;
             ">
-            Total Crédito: R$ {total_credit:,.2f}
+            Total Crédito: {format_centavos(total_credit)}
             </div>
             """,
             unsafe_allow_html=True,
@@ -119,7 +184,7 @@ else:
                 color: #FF5733;
                 margin: 30px;
             ">
-            Total Débito: R$ {total_debit:,.2f}
+            Total Débito: {format_centavos(total_debit)}
             </div>
             """,
             unsafe_allow_html=True,
@@ -137,7 +202,7 @@ else:
                 color: #33B5E5;
                 margin: 30px;
             ">
-            Total Lucro: R$ {total_profit:,.2f}
+            Total Lucro: {format_centavos(total_profit)}
             </div>
             """,
             unsafe_allow_html=True,
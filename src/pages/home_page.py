@@ -1,19 +1,23 @@
 import streamlit as st
+from utils.tenants import current_tenant
 
-
-
+# Empresa escolhida na barra lateral (ver utils/tenants.py)
+tenant = current_tenant()
 
 # Cabeçalho principal
-st.title("ECEEL - TEC")
-st.markdown("### Olá, Mª Helena!")
+st.title(tenant.nome)
+if tenant.saudacao:
+    st.markdown(f"### Olá, {tenant.saudacao}!")
 st.write("Seja bem-vinda à sua área exclusiva de organização financeira, explore e impulsione seu negócio.")
 
 # Imagem da usuária
 col1, col2 = st.columns([1, 3])
 with col1:
-    st.image("src/images/Mask group.png", width=150, caption="Gestora")  # Ajuste o caminho, se necessário
+    if tenant.imagem:
+        st.image(tenant.imagem, width=150, caption="Gestora")
 with col2:
-    st.write("### Mª Helena de Souza")
+    if tenant.gestor:
+        st.write(f"### {tenant.gestor}")
     st.write("**Status:** Nenhuma notificação no momento")
 
 # Notificações
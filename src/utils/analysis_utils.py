@@ -1,265 +1,359 @@
+import numpy as np
 import pandas as pd
 import streamlit as st
+from utils.ledger import PERIOD_CODES, PERIOD_STARTS, as_ledger, to_epoch_days
+from utils.money_utils import from_centavos, to_centavos
+
+# As funções de análise aceitam um DataFrame ou um PreparedLedger (utils/ledger.py)
+# e nunca alteram o que recebem: datas e valores são convertidos uma vez no ledger
+# e o resultado é sempre um DataFrame novo. Numa mesma execução da página, prepare
+# o ledger uma vez e passe-o a todas as funções.
+#
+# Valores são somados em centavos inteiros (o ledger guarda crédito, débito e saldo
+# em int64) e só os totais de saída viram reais (float), para os gráficos e tabelas.
+
 
 def clean_balance_column(data):
     """
-    Limpa e converte a coluna 'saldo' para valores numéricos.
+    Limpa e converte a coluna 'saldo' para valores numéricos (centavos inteiros).
+    """
+    if pd.api.types.is_numeric_dtype(data['saldo']):
+        return data  # Já convertida por load_data_from_db
+    return data.assign(saldo=to_centavos(data['saldo']))  # "1.234,56" -> 123456
+
+
+def _in_reais(frame, columns):
+    """
+    Converte as colunas de valores (centavos) de um resultado para reais.
     """
-    data['saldo'] = data['saldo'].str.replace('.', '', regex=False)  # Remove separadores de milhar
-    data['saldo'] = data['saldo'].str.replace(',', '.', regex=False)  # Substitui vírgula decimal por ponto
-    data['saldo'] = pd.to_numeric(data['saldo'], errors='coerce')  # Converte para float
-    return data
+    for column in columns:
+        frame[column] = from_centavos(frame[column])
+    return frame
+
+
+def _sum_by_offset(ledger, offsets, selected, size):
+    """
+    Soma crédito, débito e quantidade das linhas `selected` em `size` posições
+    (offsets inteiros de 0 a size - 1), com np.add.at por coluna.
+    Em resumos já agregados, a quantidade vem da coluna 'quantidade'.
+    Os valores são centavos e a soma é feita em int64, exata em qualquer volume.
+    """
+    offsets = offsets[selected]
+    weights = {
+        column: ledger.column(column).astype("int64", copy=False)[selected]
+        for column in ("credito", "debito")
+    }
+    weights["quantidade"] = (
+        ledger.column("quantidade").astype("int64", copy=False)[selected]
+        if "quantidade" in ledger.columns
+        else 1
+    )
+    totals = {}
+    for column, values in weights.items():
+        totals[column] = np.zeros(size, dtype="int64")
+        np.add.at(totals[column], offsets, values)
+    totals["lucro"] = totals["credito"] - totals["debito"]
+    return totals
+
+
+def aggregate_by_period(data, freq="M", mask=None):
+    """
+    Núcleo de agregação por período: crédito, débito, lucro e quantidade de cada
+    período ("W", "M" ou "Y") que tem transações, em ordem cronológica, sem groupby.
+    `mask` (booleano) restringe as linhas consideradas.
+    Retorna as colunas 'codigo' (código inteiro do período), 'credito', 'debito',
+    'lucro' (em centavos) e 'quantidade'; os rótulos ficam para format_period_labels.
+    """
+    ledger = as_ledger(data)
+    codes = ledger.period_codes(freq)
+    selected = np.ones(len(codes), dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+    if not selected.any():
+        return pd.DataFrame({
+            "codigo": pd.Series(dtype="int64"),
+            **{column: pd.Series(dtype="int64") for column in ("credito", "debito", "lucro")},
+            "quantidade": pd.Series(dtype="int64"),
+        })
+    first = codes[selected].min()
+    offsets = codes - first
+    size = int(offsets[selected].max()) + 1
+    totals = _sum_by_offset(ledger, np.where(selected, offsets, 0), selected, size)
+    present = np.flatnonzero(totals["quantidade"] > 0)
+    result = pd.DataFrame({"codigo": first + present})
+    for column in ("credito", "debito", "lucro", "quantidade"):
+        result[column] = totals[column][present]
+    return result
+
+
+def format_period_labels(codes, freq="M"):
+    """
+    Rótulos de exibição dos códigos de período: "2024-03" para meses, a data da
+    segunda-feira para semanas e o ano para anos.
+    """
+    starts = pd.DatetimeIndex(PERIOD_STARTS[freq](np.asarray(codes, dtype="int64")))
+    if freq == "M":
+        return starts.strftime("%Y-%m")
+    if freq == "Y":
+        return starts.year.astype(str)
+    return starts.strftime("%Y-%m-%d")
+
+
+def prepare_forecast_data(data, forecasts, medida):
+    """
+    Junta o histórico mensal de uma série ('credito', 'debito' ou 'liquido') com as
+    previsões dela (ver get_forecasts) para o gráfico de previsão. A previsão começa
+    no último mês do histórico, para as duas linhas se ligarem.
+    """
+    monthly = aggregate_by_period(data, "M")
+    history = pd.DataFrame({
+        'Mês': format_period_labels(monthly['codigo'], "M"),
+        'Tipo': 'Histórico',
+        'Valor': from_centavos(monthly['lucro' if medida == 'liquido' else medida]),
+    })
+    codes = PERIOD_CODES["M"](to_epoch_days(forecasts['data']))
+    prediction = pd.DataFrame({
+        'Mês': format_period_labels(codes, "M"),
+        'Tipo': 'Previsão',
+        'Valor': from_centavos(forecasts['previsto'].to_numpy()),
+        'Inferior': from_centavos(forecasts['inferior'].to_numpy()),
+        'Superior': from_centavos(forecasts['superior'].to_numpy()),
+    })
+    if not history.empty and not prediction.empty:
+        last = history.iloc[[-1]].assign(Tipo='Previsão')
+        last = last.assign(Inferior=last['Valor'], Superior=last['Valor'])
+        prediction = pd.concat([last, prediction], ignore_index=True)
+    return pd.concat([history, prediction], ignore_index=True)
+
 
 def calculate_salary_expenses(data):
     """
     Calcula os gastos mensais com funcionários.
     """
-    data['data'] = pd.to_datetime(data['data'])
-    data['month'] = data['data'].dt.to_period('M').astype(str)
-    salary_data = data[data['subconta'] == 'Salário']
-    monthly_expenses = (
-        salary_data.groupby('month')['debito']
-        .sum()
-        .reset_index()
-        .rename(columns={'month': 'Mês', 'debito': 'Gastos com Funcionários'})
-    )
-    return monthly_expenses
+    ledger = as_ledger(data)
+    monthly = aggregate_by_period(ledger, "M", mask=ledger.isin('subconta', ['Salário']))
+    return pd.DataFrame({
+        'Mês': format_period_labels(monthly['codigo'], "M"),
+        'Gastos com Funcionários': from_centavos(monthly['debito']),
+    })
+
 
 def calculate_monthly_profit(data):
     """
     Calcula o lucro mensal (diferença entre créditos e débitos).
     """
-    data['data'] = pd.to_datetime(data['data'])
-    data['month'] = data['data'].dt.to_period('M').astype(str)
-    profit_data = (
-        data.groupby('month').apply(lambda x: x['credito'].sum() - x['debito'].sum())
-        .reset_index(name='Lucro')
-        .rename(columns={'month': 'Mês'})
+    monthly = aggregate_by_period(data, "M")
+    return pd.DataFrame({
+        'Mês': format_period_labels(monthly['codigo'], "M"),
+        'Lucro': from_centavos(monthly['lucro']),
+    })
+
+
+def _melt_credit_debit(totals, key):
+    """
+    Passa crédito e débito somados por `key` para o formato longo (Tipo, Valor).
+    """
+    return (
+        _in_reais(totals, ['credito', 'debito']).melt(id_vars=[key], value_vars=['credito', 'debito'], var_name='Tipo', value_name='Valor')
+        .sort_values([key, 'Tipo'], kind='stable')
+        .reset_index(drop=True)
     )
-    return profit_data
 
 
 def analyze_bank_transactions(data, start_date, end_date):
     """
     Filtra e agrega transações por banco e tipo (entradas/saídas).
     """
-    # Converter coluna 'data' para datetime
-    data['data'] = pd.to_datetime(data['data'])
-    
-    # Filtrar pelo intervalo de datas
-    filtered_data = data[(data['data'] >= start_date) & (data['data'] <= end_date)]
-    
-    # Agregar entradas e saídas por banco
-    bank_analysis = filtered_data.melt(
-        id_vars=['banco'], 
-        value_vars=['credito', 'debito'], 
-        var_name='Tipo', 
-        value_name='Valor'
-    ).groupby(['banco', 'Tipo'], as_index=False)['Valor'].sum()
-    
-    return bank_analysis
+    ledger = as_ledger(data)
+    dates = ledger.column('data')
+    in_range = (dates >= np.datetime64(pd.Timestamp(start_date))) & (dates <= np.datetime64(pd.Timestamp(end_date)))
+    return _melt_credit_debit(ledger.sum_by(['banco'], ['credito', 'debito'], mask=in_range), 'banco')
+
 
 def analyze_for_bank(banco_data):
-    banco_analysis = banco_data.melt(
-        id_vars=['data'], 
-        value_vars=['credito', 'debito'], 
-        var_name='Tipo', 
-        value_name='Valor'
-    ).groupby(['data', 'Tipo'], as_index=False)['Valor'].sum()
-    return banco_analysis
+    return _melt_credit_debit(as_ledger(banco_data).sum_by(['data'], ['credito', 'debito']), 'data')
+
 
 def prepare_credit_debit_data(data):
     """
     Prepara os dados para o gráfico de entradas e saídas mensais.
     """
-    data["data"] = pd.to_datetime(data["data"])
-    data["year_month"] = data["data"].dt.to_period("M")
-    grouped = data.groupby("year_month")[["credito", "debito"]].sum().reset_index()
-    grouped["year_month"] = grouped["year_month"].astype(str)
-    return grouped
+    monthly = aggregate_by_period(data, "M")
+    return pd.DataFrame({
+        "year_month": format_period_labels(monthly["codigo"], "M"),
+        "credito": from_centavos(monthly["credito"]),
+        "debito": from_centavos(monthly["debito"]),
+    })
 
 
 def prepare_account_data(data):
     """
     Prepara os dados para o gráfico de entradas e saídas por conta.
     """
-    grouped_conta = data.groupby("conta")[["credito", "debito"]].sum().reset_index()
-    return grouped_conta
+    return _in_reais(as_ledger(data).sum_by(["conta"], ["credito", "debito"]), ["credito", "debito"])
 
 
 def prepare_profit_data(data):
     """
     Prepara os dados para o gráfico de lucro ao longo do tempo.
     """
-    data["data"] = pd.to_datetime(data["data"])
-    data["year_month"] = data["data"].dt.to_period("M")
-    grouped = data.groupby("year_month")[["credito", "debito"]].sum().reset_index()
-    grouped["year_month"] = grouped["year_month"].astype(str)
-    grouped["lucro"] = grouped["credito"] - grouped["debito"]
-    return grouped
+    monthly = aggregate_by_period(data, "M")
+    return pd.DataFrame({
+        "year_month": format_period_labels(monthly["codigo"], "M"),
+        "credito": from_centavos(monthly["credito"]),
+        "debito": from_centavos(monthly["debito"]),
+        "lucro": from_centavos(monthly["lucro"]),
+    })
 
 
 def prepare_yearly_account_data(data):
     """
     Prepara os dados para o gráfico de total de débito e crédito por ano e conta.
     """
-    # Garantir que a coluna 'data' esteja no formato datetime
-    data["data"] = pd.to_datetime(data["data"], errors='coerce')
-    
-    # Garantir que as colunas 'credito' e 'debito' sejam numéricas
-    data["credito"] = pd.to_numeric(data["credito"], errors="coerce").fillna(0)
-    data["debito"] = pd.to_numeric(data["debito"], errors="coerce").fillna(0)
-    
-    # Extrair o ano para agrupamento
-    data["year"] = data["data"].dt.year
-    
-    # Agrupar por ano e conta
-    grouped = data.groupby(["year", "conta"])[["credito", "debito"]].sum().reset_index()
-    return grouped
+    grouped = as_ledger(data).sum_by(["ano", "conta"], ["credito", "debito"])
+    return _in_reais(grouped, ["credito", "debito"]).rename(columns={"ano": "year"})
 
 
 def prepare_yearly_subaccount_data(data, conta):
     """
     Prepara os dados para o gráfico de total de débito e crédito por ano e subconta para uma conta específica.
     """
-    # Garantir que a coluna 'data' esteja no formato datetime
-    data["data"] = pd.to_datetime(data["data"], errors="coerce")
-
-    # Garantir que as colunas 'credito' e 'debito' sejam numéricas
-    data["credito"] = pd.to_numeric(data["credito"], errors="coerce").fillna(0)
-    data["debito"] = pd.to_numeric(data["debito"], errors="coerce").fillna(0)
+    ledger = as_ledger(data)
 
-    # Extrair o ano para agrupamento
-    data["year"] = data["data"].dt.year
-    
     # Filtrar os dados pela conta especificada
-    filtered_data = data[data["subconta"].str.strip().str.lower() == conta.strip().lower()]
-    # Verificar se o DataFrame filtrado está vazio
-    if filtered_data.empty:
+    matches = ledger.matches(
+        "subconta", lambda subcontas: subcontas.astype(str).str.strip().str.lower() == conta.strip().lower()
+    )
+    # Verificar se o filtro ficou vazio
+    if not matches.any():
         return pd.DataFrame()  # Retornar um DataFrame vazio para evitar erros
 
     # Agrupar por ano e subconta, somando os valores de crédito e débito
-    grouped = (
-        filtered_data.groupby(["year", "subconta"])[["credito", "debito"]]
-        .sum()
-        .reset_index()
-    )
+    grouped = ledger.sum_by(["ano", "subconta"], ["credito", "debito"], mask=matches)
+    return _in_reais(grouped, ["credito", "debito"]).rename(columns={"ano": "year"})
 
-    return grouped
 
 def convert_date_column(data, column_name):
     """
     Converte uma coluna para o tipo datetime.
     Returns:
-        pd.DataFrame: DataFrame com a coluna convertida.
+        pd.DataFrame: novo DataFrame com a coluna convertida.
     """
-    data[column_name] = pd.to_datetime(data[column_name])
-    return data
+    return data.assign(**{column_name: pd.to_datetime(data[column_name])})
 
 
 def add_month_and_year_columns(data, date_column):
     """
     Adiciona colunas de mês e ano ao DataFrame com base em uma coluna de data.
     Returns:
-        pd.DataFrame: DataFrame com colunas de mês e ano.
+        pd.DataFrame: novo DataFrame com colunas de mês e ano.
     """
-    data["mes"] = data[date_column].dt.month
-    data["ano"] = data[date_column].dt.year
-    return data
+    return data.assign(mes=data[date_column].dt.month, ano=data[date_column].dt.year)
+
 
-def transform_data_for_display_in_table(data):
+def transform_data_for_display_in_table(data, ascending=True):
     """
     Transforma o DataFrame para exibição:
     - Remove a hora da coluna de data, exibindo apenas YYYY-MM-DD.
     - Consolida as colunas 'credito' e 'debito' em uma única coluna 'valor'.
       Débitos são representados como valores negativos.
-    """
-    data["data"] = pd.to_datetime(data["data"])
-
-    data["data"] = data["data"].dt.date
+    - Converte os valores de centavos para reais.
+    - Ordena por data (decrescente com ascending=False), mantendo a ordem de entrada no mesmo dia;
+      com ascending=None, mantém a ordem de entrada.
+    """
+    ledger = as_ledger(data)
+    credito = ledger.column("credito")
+    debito = ledger.column("debito")
+    saldo = pd.Series(ledger.column("saldo"), dtype="Int64")
+    table = pd.DataFrame({
+        "data": pd.DatetimeIndex(ledger.column("data")).date,
+        "descricao": ledger.column("descricao"),
+        "documento": ledger.column("documento"),
+        "debito": from_centavos(debito),
+        "credito": from_centavos(credito),
+        "valor": from_centavos(credito - debito),
+        "saldo": from_centavos(saldo).to_numpy(),
+        "banco": ledger.column("banco"),
+        "conta": ledger.column("conta"),
+        "subconta": ledger.column("subconta"),
+    })
+    if ascending is None:
+        return table
+    return table.sort_values(by="data", kind="stable", ascending=ascending)
+
+
+def calcular_totais_ultimos_periodos(data, freq, num_periods=3, anchor=None):
+    """
+    Soma crédito e débito dos `num_periods` períodos ("W", "M" ou "Y") que terminam
+    no período da data `anchor` (padrão: a data mais recente de `data`), do mais
+    recente para o mais antigo. Períodos sem transações aparecem zerados.
+    Retorna as colunas 'periodo' (início do período), 'credito', 'debito' e 'saldo'.
+    """
+    ledger = as_ledger(data)
+    to_code = PERIOD_CODES[freq]
+    codes = ledger.period_codes(freq)
+    if anchor is None:
+        if len(codes) == 0:
+            return pd.DataFrame({
+                "periodo": pd.Series(dtype="datetime64[ns]"),
+                **{column: pd.Series(dtype="float64") for column in ("credito", "debito", "saldo")},
+            })
+        anchor_code = codes.max()
+    else:
+        anchor_code = to_code(to_epoch_days(pd.Timestamp(anchor).normalize().to_datetime64()))
+
+    # Posição 0 é o período da âncora, 1 o anterior, e assim por diante
+    offsets = anchor_code - codes
+    inside = (offsets >= 0) & (offsets < num_periods)
+    totals = _sum_by_offset(ledger, np.where(inside, offsets, 0), inside, num_periods)
+    period_codes = anchor_code - np.arange(num_periods)
+    result = pd.DataFrame({
+        "periodo": PERIOD_STARTS[freq](period_codes).astype("datetime64[ns]"),
+        "credito": from_centavos(totals["credito"]),
+        "debito": from_centavos(totals["debito"]),
+        "saldo": from_centavos(totals["lucro"]),
+    })
+    return result
+
+
+def comparar_calcular_total(data, num_periods=3, anchor=None):
+    """
+    - Calcula os totais de crédito, débito e saldo para os últimos `num_periods` períodos:
+      semanas, meses e anos, contados a partir do período da data `anchor`
+      (padrão: a data mais recente de `data`).
+    """
+    ledger = as_ledger(data)
+    totais_semana = calcular_totais_ultimos_periodos(ledger, "W", num_periods, anchor)
+    totais_mes = calcular_totais_ultimos_periodos(ledger, "M", num_periods, anchor)
+    totais_ano = calcular_totais_ultimos_periodos(ledger, "Y", num_periods, anchor)
+
+    totais_semana = totais_semana.rename(columns={"periodo": "Semana"})
+    totais_mes = totais_mes.rename(columns={"periodo": "Mês"})
+    totais_ano = totais_ano.rename(columns={"periodo": "Ano"})
+    totais_ano["Ano"] = totais_ano["Ano"].dt.year
 
-    data["valor"] = data["credito"] - data["debito"]
-
-    data = data.sort_values(by="data")
-
-    return data[
-        [
-            "data",
-            "descricao",
-            "documento",
-            "debito",
-            "credito",
-            "valor",
-            "saldo",
-            "banco",
-            "conta",
-            "subconta",
-        ]
-    ]
+    return totais_semana, totais_mes, totais_ano
 
 
-def comparar_calcular_total(data):
+def _add_year_month_label(summary):
     """
-    - Calcula os totais de crédito, débito e saldo para os últimos 3 períodos: semanas, meses e anos.
+    Adiciona ao resumo a coluna formatada Ano-Mês.
     """
-    # Converter a coluna de data para datetime
-    data["data"] = pd.to_datetime(data["data"])
+    summary["ano_mes"] = summary["ano"].astype(str) + "-" + summary["mes"].astype(str).str.zfill(2)
+    return summary
 
-    # Adicionar colunas para semana, mês e ano
-    data["semana"] = data["data"].dt.to_period("W").apply(lambda r: r.start_time)
-    data["mes"] = data["data"].dt.to_period("M").apply(lambda r: r.start_time)
-    data["ano"] = data["data"].dt.year
-
-    # Função para calcular totais por período
-    def calcular_total_por_periodo(df, periodo_col, label):
-        df_periodo = (
-            df.groupby(periodo_col)
-            .agg({"credito": "sum", "debito": "sum"})
-            .reset_index()
-        )
-        df_periodo["saldo"] = df_periodo["credito"] - df_periodo["debito"]
-        df_periodo = df_periodo.sort_values(periodo_col, ascending=False).head(3)
-        df_periodo = df_periodo.rename(columns={periodo_col: label})
-        return df_periodo
-
-    # Calcular totais para semanas, meses e anos
-    totais_semana = calcular_total_por_periodo(data, "semana", "Semana")
-    totais_mes = calcular_total_por_periodo(data, "mes", "Mês")
-    totais_ano = calcular_total_por_periodo(data, "ano", "Ano")
-
-    return totais_semana, totais_mes, totais_ano
 
 def get_yearly_summary(data, value_column):
     """
     Calcula o resumo anual de um valor especificado.
     """
-
-    if "ano" not in data.columns:
-        data["ano"] = data["ano"].dt.year
-    yearly_summary = data.groupby("ano")[value_column].sum().reset_index()
-
-    return yearly_summary
+    return _in_reais(as_ledger(data).sum_by(["ano"], [value_column]), [value_column])
 
 
 def get_monthly_summary(data, value_column):
     """
     Calcula o resumo mensal de um valor especificado, agrupado por ano e mês.
     """
-    data["data"] = pd.to_datetime(data["data"])
-
-    data["ano"] = data["data"].dt.year
-    data["mes"] = data["data"].dt.month
-
-    monthly_summary = data.groupby(["ano", "mes"])[value_column].sum().reset_index()
-
-    # Add uma coluna formatada Ano-Mês
-    monthly_summary["ano_mes"] = (
-        monthly_summary["ano"].astype(str)
-        + "-"
-        + monthly_summary["mes"].astype(str).str.zfill(2)
-    )
-
-    return monthly_summary
+    summary = _in_reais(as_ledger(data).sum_by(["ano", "mes"], [value_column]), [value_column])
+    return _add_year_month_label(summary)
 
 
 def prepare_monthly_data_for_line_chart(data, value_column):
@@ -268,26 +362,8 @@ def prepare_monthly_data_for_line_chart(data, value_column):
     Returns:
         pd.DataFrame: DataFrame preparado com colunas 'ANO', 'MES', 'BANCO', 'ANO_MES' e o valor consolidado.
     """
-    # Certifique-se de que a coluna DATA está no formato datetime
-    data["data"] = pd.to_datetime(data["data"])
-
-    # Adicionar colunas de ano e mês
-    data["ano"] = data["data"].dt.year
-    data["mes"] = data["data"].dt.month
-
-    # Consolidar os valores por ano, mês e banco
-    monthly_summary = (
-        data.groupby(["ano", "mes", "banco"])[value_column].sum().reset_index()
-    )
-
-    # Adicionar uma coluna formatada para exibição no gráfico (Ano-Mês)
-    monthly_summary["ano_mes"] = (
-        monthly_summary["ano"].astype(str)
-        + "-"
-        + monthly_summary["mes"].astype(str).str.zfill(2)
-    )
-
-    return monthly_summary
+    summary = _in_reais(as_ledger(data).sum_by(["ano", "mes", "banco"], [value_column]), [value_column])
+    return _add_year_month_label(summary)
 
 
 def prepare_yearly_data_for_line_chart(data, value_column):
@@ -295,69 +371,53 @@ def prepare_yearly_data_for_line_chart(data, value_column):
     Prepara os dados anuais para o gráfico de linha, cruzando por banco.
 
     Args:
-        data (pd.DataFrame): DataFrame contendo os dados.
+        data (pd.DataFrame ou PreparedLedger): dados das transações.
         value_column (str): Nome da coluna que será usada para os valores (ex.: 'credito', 'debito').
 
     Returns:
         pd.DataFrame: DataFrame preparado com colunas 'ANO', 'BANCO' e o valor consolidado.
     """
-    # Certifique-se de que a coluna DATA está no formato datetime
-    data["data"] = pd.to_datetime(data["data"])
-
-    # Consolidar os valores por ano e banco
-    yearly_summary = data.groupby(["ano", "banco"])[value_column].sum().reset_index()
+    return _in_reais(as_ledger(data).sum_by(["ano", "banco"], [value_column]), [value_column])
 
-    return yearly_summary
 
+# Contas e marcas consideradas na análise de fornecedores
+SERVICE_ACCOUNTS = ['Receita com serviços', 'Despesa com serviços']
+RELEVANT_BRANDS = ['Panasonic', 'Elgin', 'Spring', 'Fresnomaq']
 
 
 def analyze_supplier_profitability(data):
     """
-    Análise de rentabilidade por fornecedor com base em receitas e despesas, 
+    Análise de rentabilidade por fornecedor com base em receitas e despesas,
     considerando as colunas 'credito' e 'debito'.
     """
-    # Filtrar as linhas relevantes para receitas e despesas com serviços
-    service_data = data[data['conta'].isin(['Receita com serviços', 'Despesa com serviços'])]
-    
-    # Filtrar pelas marcas relevantes na subconta
-    relevant_brands = ['Panasonic', 'Elgin', 'Spring', 'Fresnomaq']
-    filtered_data = service_data[service_data['subconta'].isin(relevant_brands)]
-    
-    # Substituir "Spring" por "Springer" apenas para exibição
-    filtered_data['subconta'] = filtered_data['subconta'].replace({'Spring': 'Springer'})
-    
-    # Garantir que as colunas 'credito' e 'debito' sejam numéricas
-    filtered_data['credito'] = pd.to_numeric(filtered_data['credito'], errors='coerce').fillna(0)
-    filtered_data['debito'] = pd.to_numeric(filtered_data['debito'], errors='coerce').fillna(0)
-    
-    # Criar a coluna 'Impacto' com tipo numérico
-    filtered_data['Impacto'] = 0.0  # Inicializar como float
-
-    # Adicionar receitas e subtrair despesas
-    filtered_data.loc[filtered_data['conta'] == 'Receita com serviços', 'Impacto'] += filtered_data['credito']
-    filtered_data.loc[filtered_data['conta'] == 'Despesa com serviços', 'Impacto'] -= filtered_data['debito']
-    
-    # Agrupar por subconta (marca) e calcular receita, despesa e rentabilidade
-    profitability = filtered_data.groupby('subconta').agg(
-        Receita=('credito', 'sum'),
-        Despesa=('debito', 'sum'),
-        Rentabilidade=('Impacto', 'sum')
-    ).reset_index()
-    
+    ledger = as_ledger(data)
+
+    # Linhas de receitas e despesas com serviços das marcas relevantes
+    relevant = ledger.isin('conta', SERVICE_ACCOUNTS) & ledger.isin('subconta', RELEVANT_BRANDS)
+    credito = ledger.column('credito')[relevant]
+    debito = ledger.column('debito')[relevant]
+
+    # Receitas somam e despesas subtraem (centavos inteiros, soma exata)
+    impacto = (
+        np.where(ledger.isin('conta', ['Receita com serviços'])[relevant], credito, 0)
+        - np.where(ledger.isin('conta', ['Despesa com serviços'])[relevant], debito, 0)
+    )
+
+    # Agrupar por subconta (marca), com "Spring" exibido como "Springer"
+    marcas = pd.Series(ledger.column('subconta')[relevant]).replace({'Spring': 'Springer'})
+    profitability = pd.DataFrame({
+        'subconta': marcas.to_numpy(),
+        'Receita': credito,
+        'Despesa': debito,
+        'Rentabilidade': impacto,
+    }).groupby('subconta').sum().reset_index()
+
     # Calcular a rentabilidade como percentual que a marca representa do total das marcas
     profitability['Percentual'] = (profitability['Rentabilidade'] / profitability['Rentabilidade'].sum()) * 100
     #formartar com o valor em porcentagem com duas casas decimais
     profitability['Percentual'] = profitability['Percentual'].map("{:.2f}%".format)
-    
-    
-    
+
     # Ordenar pela rentabilidade
     profitability = profitability.sort_values(by='Rentabilidade', ascending=False)
-    
-    
-    return profitability
-
-
-
-
 
+    return _in_reais(profitability, ['Receita', 'Despesa', 'Rentabilidade'])
@@ -0,0 +1,246 @@
+import functools
+import os
+import re
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+# Classificação automática (conta/subconta) das transações que chegam sem ela.
+# Em ordem de prioridade:
+#   1. decisões manuais anteriores para a mesma descrição (tabela classification_decisions);
+#   2. regras de descrição (DESCRIPTION_RULES), como "PAGAMENTO BOLETO <fornecedor>";
+#   3. palavras-chave tiradas das subcontas do plano de contas (PLANO_CONTA.xlsx).
+# As regras viram uma única regex por tipo de movimento, aplicada ao lote inteiro de uma vez.
+# Decisões e regras abaixo de MIN_CONFIDENCE não são aplicadas: a linha segue sem conta
+# e fica fora das análises por conta/subconta até ser classificada à mão.
+
+# Raiz do projeto (a mesma de PROJECT_ROOT em utils/db_loader.py, que importa este módulo)
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Plano de contas usado para as palavras-chave (opcional: sem ele, só as regras de descrição)
+PLAN_PATH = os.environ.get("BANK_PLAN_PATH", os.path.join(_PROJECT_ROOT, "data", "raw", "PLANO_CONTA.xlsx"))
+
+# Confiança mínima para classificar uma transação automaticamente
+MIN_CONFIDENCE = 0.5
+
+# Confiança das palavras-chave do plano de contas, menos específicas que as regras escritas à mão
+PLAN_CONFIDENCE = 0.5
+
+# Subcontas genéricas demais para servir de palavra-chave
+GENERIC_SUBCONTAS = {"OUTRAS", "OUTROS", "OUTRAS VENDAS", "OUTRAS DESPESAS"}
+
+
+@dataclass(frozen=True)
+class Rule:
+    """
+    Regra de classificação: `pattern` (regex) é procurado como palavra inteira na
+    descrição normalizada (ver normalize_description). `tipo` restringe a regra a
+    créditos ou débitos (None vale para os dois).
+    """
+    pattern: str
+    conta: str
+    subconta: Optional[str]
+    confianca: float
+    tipo: Optional[str] = None
+
+
+# Regras de descrição, das mais específicas (fornecedores) para as mais genéricas.
+# As confianças seguem a proporção de acertos de cada regra nas transações já classificadas;
+# padrões que acertam menos que MIN_CONFIDENCE (pagamentos a fornecedores, empréstimos,
+# compras no cartão, PIX enviados) não viram regra e ficam para a classificação manual.
+DESCRIPTION_RULES = (
+    Rule("PANASONIC", "Receita com serviços", "Panasonic", 0.9, "credito"),
+    Rule("SPRING(ER)?", "Receita com serviços", "Spring", 0.9, "credito"),
+    Rule("ELGIN", "Receita com serviços", "Elgin", 0.9, "credito"),
+    Rule("FGTS", "Despesa com pessoal", "FGTS", 0.95, "debito"),
+    Rule("SALARIO", "Despesa com pessoal", "Salário", 0.9, "debito"),
+    Rule("CIEE", "Despesa com pessoal", "CIEE (Estagiario)", 0.5, "debito"),
+    Rule("INSS|GPS", "Despesa com pessoal", "INSS", 0.6, "debito"),
+    Rule("LUZ/GAS|COPEL|ENERGIA", "Despesas administrativas", "Energia", 0.9, "debito"),
+    Rule("PAG FONE|TELEFONE|TELEFONIA|VIVO|CLARO", "Despesas administrativas",
+         "Telefonia (Celular, Fixo, Internet)", 0.9, "debito"),
+    Rule("PAG AGUA|SANEPAR", "Despesas administrativas", "Água", 0.9, "debito"),
+    Rule("ALLIANZ|SEGURO", "Despesas administrativas", "Seguros", 0.85, "debito"),
+    Rule("IPVA|DETRAN", "Despesas tributárias", "IPVA", 0.7, "debito"),
+    Rule("DARF|IRRF|PG ORG", "Despesas tributárias", "Outras", 0.7, "debito"),
+    Rule("DB CEST|TARIFA|TAR", "Despesas financeiras", "Despesas bancárias", 0.6, "debito"),
+    Rule("PAGAMENTO FATURA|PAGAMENTO CARTAO|PAGTO CARTAO", "Outras Despesas",
+         "Pgto fatura Cartão Credito", 0.5, "debito"),
+    Rule("CASHBACK", "Receitas financeiras", "Outras", 0.6, "credito"),
+    Rule("PIX RECEBIDO|CRED(ITO)? PIX|CRED(ITO)? TED|TED RECEBIDA|CRED TEV", "Receita com serviços",
+         "Outras", 0.75, "credito"),
+)
+
+
+def normalize_description(values):
+    """
+    Normaliza descrições para comparação: maiúsculas, sem acentos, sem números nem
+    pontuação (exceto '/') e com espaços simples. "Pag. Luz/Gás 0312" vira "PAG LUZ/GAS".
+    """
+    text = values.astype("string").str.upper().str.normalize("NFKD")
+    text = text.str.replace("[̀-ͯ]", "", regex=True)
+    text = text.str.replace(r"[^A-Z/]+", " ", regex=True).str.strip()
+    return text.fillna("")
+
+
+def movement_type(credito):
+    """
+    'credito' para as linhas com crédito positivo e 'debito' para as demais.
+    """
+    return np.where(pd.to_numeric(credito).fillna(0).to_numpy() > 0, "credito", "debito")
+
+
+@functools.lru_cache(maxsize=4)
+def _plan_rules(plan_path, mtime):
+    sheets = pd.read_excel(plan_path, sheet_name=None)
+    columns = ["Grupo de contas", "Sub-grupo de contas", "Classificação"]
+    plan = pd.concat(
+        [sheet[columns] for sheet in sheets.values() if set(columns) <= set(sheet.columns)],
+        ignore_index=True,
+    ).dropna()
+    plan = plan.apply(lambda column: column.astype(str).str.strip()).drop_duplicates()
+    # "Telefonia (Celular, Fixo, Internet)" é procurada como "TELEFONIA"
+    keywords = normalize_description(plan["Sub-grupo de contas"].str.split("(").str[0])
+    tipos = plan["Classificação"].map({"Receita": "credito", "Despesa": "debito"})
+    rules = {}
+    for conta, subconta, keyword, tipo in zip(plan["Grupo de contas"], plan["Sub-grupo de contas"], keywords, tipos):
+        if keyword and keyword not in GENERIC_SUBCONTAS and (keyword, tipo) not in rules:
+            rules[(keyword, tipo)] = Rule(re.escape(keyword), conta, subconta, PLAN_CONFIDENCE, tipo)
+    return tuple(rules.values())
+
+
+def load_plan_rules(plan_path=PLAN_PATH):
+    """
+    Regras por palavra-chave tiradas do plano de contas: cada subconta (nas planilhas
+    com 'Grupo de contas', 'Sub-grupo de contas' e 'Classificação') é procurada na
+    descrição. Lidas uma vez por versão do arquivo; sem o arquivo, não há regras.
+    """
+    if not os.path.exists(plan_path):
+        return ()
+    return _plan_rules(os.path.abspath(plan_path), os.path.getmtime(plan_path))
+
+
+def default_rules(plan_path=PLAN_PATH):
+    """
+    Regras de descrição seguidas das palavras-chave do plano de contas.
+    """
+    return DESCRIPTION_RULES + load_plan_rules(plan_path)
+
+
+@functools.lru_cache(maxsize=16)
+def compile_rules(rules):
+    """
+    Junta as regras (tupla, em ordem de prioridade) numa única regex com um grupo
+    nomeado por regra. A busca é ancorada no início e cada alternativa percorre a
+    descrição inteira antes de a próxima ser tentada, então vale a primeira regra
+    da lista que aparece em qualquer ponto da descrição.
+    """
+    branches = "|".join(rf".*?\b(?P<r{position}>{rule.pattern})\b" for position, rule in enumerate(rules))
+    return re.compile(f"^(?:{branches})")
+
+
+def match_rules(keys, rules):
+    """
+    Posição (em `rules`) da regra que classifica cada descrição normalizada, ou -1.
+    Cada descrição distinta é avaliada uma só vez.
+    """
+    codes, uniques = pd.factorize(pd.Series(keys, dtype=object))
+    if not rules or len(uniques) == 0:
+        return np.full(len(codes), -1)
+    extracted = pd.Series(uniques, dtype="string").str.extract(compile_rules(tuple(rules)))
+    # Só os grupos nomeados: os padrões podem ter grupos próprios, como "SPRING(ER)?"
+    hits = extracted[[f"r{position}" for position in range(len(rules))]].notna().to_numpy()
+    first = np.where(hits.any(axis=1), hits.argmax(axis=1), -1)
+    return first[codes]
+
+
+def load_decisions(conn):
+    """
+    Retorna as decisões manuais anteriores: para cada descrição normalizada ('chave')
+    e tipo de movimento, a conta/subconta mais escolhida e a confiança (a parcela das
+    vezes em que ela foi a escolhida).
+    """
+    return pd.read_sql(
+        """
+        SELECT chave, tipo, conta, NULLIF(subconta, '') AS subconta, confianca FROM (
+            SELECT chave, tipo, conta, subconta,
+                   quantidade * 1.0 / SUM(quantidade) OVER (PARTITION BY chave, tipo) AS confianca,
+                   ROW_NUMBER() OVER (PARTITION BY chave, tipo ORDER BY quantidade DESC) AS posicao
+            FROM classification_decisions
+        ) WHERE posicao = 1
+        """,
+        conn,
+    )
+
+
+def record_decisions(conn, source):
+    """
+    Soma às decisões manuais as linhas classificadas de `source` (tabela ou subconsulta
+    com chave_classificacao, credito, conta e subconta). Não faz commit.
+    """
+    conn.execute(
+        f"""
+        INSERT INTO classification_decisions (chave, tipo, conta, subconta, quantidade)
+        SELECT chave_classificacao, CASE WHEN credito > 0 THEN 'credito' ELSE 'debito' END,
+               conta, COALESCE(subconta, ''), COUNT(*)
+        FROM {source}
+        WHERE conta IS NOT NULL
+        GROUP BY 1, 2, 3, 4
+        ON CONFLICT (chave, tipo, conta, subconta) DO UPDATE SET
+            quantidade = quantidade + excluded.quantidade
+        """
+    )
+
+
+def classify_transactions(rows, decisions, rules=None, min_confidence=MIN_CONFIDENCE):
+    """
+    Preenche conta e subconta das linhas que chegam sem conta, num único passe sobre o
+    lote: primeiro pelas decisões manuais (load_decisions), depois pelas regras
+    (padrão: default_rules). Decisões e regras com confiança abaixo de `min_confidence`
+    são ignoradas, e a linha que nenhuma outra classifica fica sem conta. Retorna um DataFrame novo com as colunas 'classificacao'
+    ('manual', 'historico', 'regra' ou None), 'confianca' (0 a 1) e 'chave_classificacao'
+    (a descrição normalizada). Linhas que já têm conta são mantidas como 'manual'.
+    """
+    rules = tuple(
+        rule for rule in (default_rules() if rules is None else rules) if rule.confianca >= min_confidence
+    )
+    decisions = decisions[decisions["confianca"] >= min_confidence]
+    keys = normalize_description(rows["descricao"]).to_numpy(dtype=object)
+    tipos = movement_type(rows["credito"])
+    conta = rows["conta"].astype(object).to_numpy(copy=True)
+    subconta = rows["subconta"].astype(object).to_numpy(copy=True)
+    manual = pd.notna(conta)
+    classificacao = np.where(manual, "manual", None).astype(object)
+    confianca = np.where(manual, 1.0, np.nan)
+
+    # 1. Mesma descrição e tipo já classificados à mão
+    pending = np.flatnonzero(~manual)
+    found = pd.DataFrame({"chave": keys[pending], "tipo": tipos[pending]}).merge(
+        decisions, on=["chave", "tipo"], how="left"
+    )
+    hit = found["conta"].notna().to_numpy()
+    rows_hit = pending[hit]
+    conta[rows_hit] = found["conta"].to_numpy()[hit]
+    subconta[rows_hit] = found["subconta"].to_numpy()[hit]
+    classificacao[rows_hit] = "historico"
+    confianca[rows_hit] = found["confianca"].to_numpy()[hit]
+
+    # 2. Regras, separadas por tipo de movimento
+    pending = pending[~hit]
+    for tipo in ("credito", "debito"):
+        applicable = tuple(rule for rule in rules if rule.tipo in (None, tipo))
+        selected = pending[tipos[pending] == tipo]
+        matched = match_rules(keys[selected], applicable)
+        for position in np.unique(matched[matched >= 0]):
+            rule = applicable[position]
+            targets = selected[matched == position]
+            conta[targets] = rule.conta
+            subconta[targets] = rule.subconta
+            classificacao[targets] = "regra"
+            confianca[targets] = rule.confianca
+
+    return rows.assign(
+        conta=conta, subconta=subconta, classificacao=classificacao, confianca=confianca,
+        chave_classificacao=keys,
+    )
@@ -0,0 +1,299 @@
+import hashlib
+import os
+import time
+import pandas as pd
+from utils.classifier import classify_transactions, load_decisions, record_decisions
+from utils.money_utils import to_centavos
+from utils.facets import refresh_facets
+from utils.lookups import ENCODED_COLUMNS, TRANSACTIONS_VIEW, lookup_table, register_values, stored_column
+from utils.reconciliation import invalidate_checkpoints, reconcile_balances
+from utils.rollups import refresh_rollups
+from utils.search import index_transactions, unindex_transactions
+
+# Raiz do projeto: os caminhos padrão não dependem do diretório de onde o app é iniciado
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Datas são gravadas como número de dias desde esta data
+EPOCH = pd.Timestamp("1970-01-01")
+
+# Colunas gravadas em bank_transactions por uma fonte (além do id e da chave natural)
+STORED_COLUMNS = [
+    "data", "descricao", "documento", "credito", "debito", "saldo",
+    "banco", "conta", "subconta", "file_path",
+]
+
+# Colunas que identificam uma transação, independentemente do arquivo de origem
+NATURAL_KEY_COLUMNS = ["data", "descricao", "documento", "credito", "debito", "banco"]
+
+# Origem e confiança de conta/subconta, preenchidas na ingestão (ver utils/classifier.py)
+CLASSIFICATION_COLUMNS = ["classificacao", "confianca"]
+
+# Colunas que podem mudar numa nova versão do extrato sem mudar a transação
+UPDATABLE_COLUMNS = ["saldo", "conta", "subconta", "file_path"] + CLASSIFICATION_COLUMNS
+
+# Colunas da tabela temporária de uma ingestão: as gravadas mais a descrição
+# normalizada, usada para aprender com as classificações manuais
+STAGED_COLUMNS = STORED_COLUMNS + ["natural_key"] + CLASSIFICATION_COLUMNS + ["chave_classificacao"]
+
+
+def to_stored_format(rows):
+    """
+    Converte linhas com datas (datetime ou texto) e valores em reais para o formato
+    gravado: dias desde 1970-01-01 e centavos inteiros.
+    """
+    rows = rows.copy()
+    rows["data"] = (pd.to_datetime(rows["data"], errors="coerce") - EPOCH).dt.days
+    for column in ("credito", "debito", "saldo"):
+        rows[column] = to_centavos(rows[column])
+    rows[["credito", "debito"]] = rows[["credito", "debito"]].fillna(0)
+    return rows
+
+
+def normalize_documento(values):
+    """
+    Normaliza o número do documento para texto, removendo o ".0" que aparece
+    quando a coluna é lida como float.
+    """
+    text = values.astype("string").str.strip().str.replace(r"\.0$", "", regex=True)
+    text = text.mask(text == "")
+    return text.astype(object).where(text.notna(), None)
+
+
+def add_natural_keys(rows, seen=None):
+    """
+    Adiciona a coluna 'natural_key': hash de data, descrição, documento, valores e banco,
+    mais a ordem de ocorrência da combinação, para que lançamentos idênticos no mesmo
+    dia (dois PIX iguais, por exemplo) continuem sendo transações distintas.
+    Espera as colunas já no formato gravado (dias e centavos inteiros).
+
+    Quando a fonte chega em blocos, `seen` (dicionário combinação -> ocorrências) leva
+    a contagem de um bloco para o seguinte.
+    """
+    parts = rows[NATURAL_KEY_COLUMNS].astype("string").fillna("")
+    joined = parts[NATURAL_KEY_COLUMNS[0]].str.cat(
+        [parts[column] for column in NATURAL_KEY_COLUMNS[1:]], sep="|"
+    )
+    occurrence = joined.groupby(joined, sort=False).cumcount()
+    if seen is not None:
+        occurrence += joined.map(seen).fillna(0).astype(int)
+        for key, count in joined.value_counts(sort=False).items():
+            seen[key] = seen.get(key, 0) + count
+    occurrence = occurrence.astype("string")
+    rows["natural_key"] = [
+        hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+        for key in joined.str.cat(occurrence, sep="|")
+    ]
+    return rows
+
+
+def source_key(file_path, base_dir=None):
+    """
+    Chave com que uma fonte é gravada (file_path e ingested_sources): o caminho relativo
+    à raiz do projeto, com '/', de qualquer diretório que ele tenha sido passado.
+    `base_dir` é o diretório a que `file_path` se refere (padrão: o atual). Fontes fora
+    do projeto ficam com o caminho absoluto.
+    """
+    path = os.path.normpath(os.path.join(os.path.abspath(base_dir or os.getcwd()), file_path))
+    try:
+        relative = os.path.relpath(path, PROJECT_ROOT)
+    except ValueError:  # outro drive, no Windows
+        return path
+    if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+        return path
+    return relative.replace(os.sep, "/")
+
+
+def file_content_hash(file_path, chunk_size=1 << 20):
+    """
+    Retorna o SHA-256 do conteúdo de um arquivo, lido em blocos.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def frame_content_hash(rows):
+    """
+    Retorna um hash do conteúdo das linhas de uma fonte, para fontes que não são
+    arquivos próprios (como os grupos de FILE_PATH do df_concat.csv).
+    """
+    hashed = pd.util.hash_pandas_object(rows[STORED_COLUMNS].astype(object), index=False)
+    return hashlib.sha256(hashed.values.tobytes()).hexdigest()
+
+
+def get_source_hash(conn, file_path):
+    """
+    Retorna o hash registrado na última ingestão da fonte, ou None se ela nunca foi carregada.
+    """
+    row = conn.execute(
+        "SELECT content_hash FROM ingested_sources WHERE file_path = ?", (file_path,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def _strip_labels(values):
+    """
+    Tira os espaços das pontas de conta/subconta ("Outras Despesas " vira "Outras
+    Despesas"); textos vazios viram nulos.
+    """
+    text = values.astype("string").str.strip()
+    text = text.mask(text == "")
+    return text.astype(object).where(text.notna(), None)
+
+
+def _prepare_chunk(rows, file_path, seen, decisions):
+    """
+    Normaliza descrição, documento, conta e subconta, calcula as chaves naturais,
+    classifica as linhas sem conta (utils/classifier.py) e converte nulos para None.
+    """
+    rows = rows.assign(
+        file_path=file_path,
+        descricao=rows["descricao"].str.strip(),
+        documento=normalize_documento(rows["documento"]),
+        conta=_strip_labels(rows["conta"]),
+        subconta=_strip_labels(rows["subconta"]),
+    )
+    rows = add_natural_keys(rows.reset_index(drop=True), seen)
+    rows = classify_transactions(rows, decisions)
+    return rows[STAGED_COLUMNS].astype(object).where(rows[STAGED_COLUMNS].notna(), None)
+
+
+def upsert_source(conn, file_path, rows, content_hash, batch_size=5000):
+    """
+    Carrega as transações de uma fonte de forma incremental e idempotente.
+
+    Se o hash da fonte não mudou, nada é lido nem gravado. Caso contrário, as linhas
+    entram numa tabela temporária em lotes e, numa única transação: transações novas são
+    inseridas, as existentes têm saldo/conta/subconta atualizados apenas se mudaram, e as
+    que saíram da fonte são removidas. Linhas sem conta são classificadas automaticamente
+    (utils/classifier.py) e as classificações manuais novas ou alteradas passam a valer
+    para as próximas ingestões. Os totais de transaction_rollups dos períodos afetados,
+    as facetas dos filtros (utils/facets.py), a conciliação de saldo (utils/reconciliation.py)
+    e o índice de busca (utils/search.py) são atualizados na mesma transação. `rows` é um DataFrame no formato gravado (dias e
+    centavos inteiros) ou um iterável de DataFrames, consumido bloco a bloco.
+    Retorna um dicionário com as contagens.
+    """
+    if get_source_hash(conn, file_path) == content_hash:
+        return {"file_path": file_path, "skipped": True, "inserted": 0, "updated": 0, "deleted": 0}
+
+    chunks = [rows] if isinstance(rows, pd.DataFrame) else rows
+    columns = STORED_COLUMNS + ["natural_key"] + CLASSIFICATION_COLUMNS
+    seen = {}
+    staged = 0
+
+    conn.execute("BEGIN")
+    try:
+        conn.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS staged_transactions AS "
+            f"SELECT {', '.join(STORED_COLUMNS + ['natural_key'])},"
+            f" {', '.join(f'NULL AS {column}' for column in CLASSIFICATION_COLUMNS + ['chave_classificacao'])}"
+            f" FROM {TRANSACTIONS_VIEW} WHERE 0"
+        )
+        conn.execute("DELETE FROM staged_transactions")
+        insert_staged = (
+            f"INSERT INTO staged_transactions ({', '.join(STAGED_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(STAGED_COLUMNS))})"
+        )
+        decisions = load_decisions(conn)
+        for chunk in chunks:
+            records = _prepare_chunk(chunk, file_path, seen, decisions)
+            for start in range(0, len(records), batch_size):
+                conn.executemany(
+                    insert_staged, records.iloc[start:start + batch_size].itertuples(index=False, name=None)
+                )
+            staged += len(records)
+
+        # Dias com transações novas, alteradas ou que vão sair: só os períodos
+        # que os contêm são recalculados em transaction_rollups
+        touched_days = [
+            day for (day,) in conn.execute(
+                """
+                SELECT data FROM staged_transactions
+                UNION
+                SELECT data FROM bank_transactions
+                WHERE file_path_id = (SELECT id FROM lookup_file_path WHERE valor = ?)
+                  AND natural_key NOT IN (SELECT natural_key FROM staged_transactions)
+                """,
+                (file_path,),
+            )
+        ]
+        removed = (
+            "file_path_id = (SELECT id FROM lookup_file_path WHERE valor = ?)"
+            " AND natural_key NOT IN (SELECT natural_key FROM staged_transactions)"
+        )
+        # A conciliação de saldo de cada banco volta para antes do primeiro dia da fonte
+        invalidate_checkpoints(
+            conn,
+            f"(SELECT banco, data FROM staged_transactions"
+            f" UNION ALL SELECT banco, data FROM {TRANSACTIONS_VIEW} WHERE file_path = ?"
+            " AND natural_key NOT IN (SELECT natural_key FROM staged_transactions))",
+            (file_path,),
+        )
+        unindex_transactions(conn, removed, (file_path,))
+        deleted = conn.execute(f"DELETE FROM bank_transactions WHERE {removed}", (file_path,)).rowcount
+        # Ids só crescem (AUTOINCREMENT): as transações novas são as acima deste
+        last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM bank_transactions").fetchone()[0]
+        existing = conn.execute(
+            "SELECT COUNT(*) FROM staged_transactions s JOIN bank_transactions t USING (natural_key)"
+        ).fetchone()[0]
+        # Classificações manuais novas ou alteradas passam a valer para as próximas ingestões
+        record_decisions(
+            conn,
+            f"""(
+                SELECT s.* FROM staged_transactions s
+                LEFT JOIN bank_transactions b USING (natural_key)
+                LEFT JOIN {TRANSACTIONS_VIEW} t ON t.id = b.id
+                WHERE s.classificacao = 'manual'
+                  AND (b.id IS NULL OR b.classificacao IS NOT 'manual'
+                       OR t.conta IS NOT s.conta OR t.subconta IS NOT s.subconta)
+            )""",
+        )
+        # Textos novos ganham id nas tabelas de valores; as transações guardam os ids
+        register_values(conn, "staged_transactions")
+        stored = [stored_column(column) for column in columns]
+        updatable = [stored_column(column) for column in UPDATABLE_COLUMNS]
+        changes_before_upsert = conn.total_changes
+        conn.execute(
+            f"""
+            INSERT INTO bank_transactions ({', '.join(stored)})
+            SELECT {', '.join(f'{lookup_table(column)}.id' if column in ENCODED_COLUMNS else f's.{column}' for column in columns)}
+            FROM staged_transactions s
+            {' '.join(f'LEFT JOIN {lookup_table(column)} ON {lookup_table(column)}.valor = s.{column}' for column in ENCODED_COLUMNS)}
+            WHERE true
+            ON CONFLICT (natural_key) DO UPDATE SET
+                {', '.join(f'{column} = excluded.{column}' for column in updatable)}
+            WHERE {' OR '.join(f'{column} IS NOT excluded.{column}' for column in updatable)}
+            """
+        )
+        upserted = conn.total_changes - changes_before_upsert
+        inserted = staged - existing
+        refresh_rollups(conn, touched_days)
+        refresh_facets(conn)
+        reconcile_balances(conn)
+        index_transactions(conn, last_id)
+        conn.execute(
+            """
+            INSERT INTO ingested_sources (file_path, content_hash, row_count, ingested_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (file_path) DO UPDATE SET
+                content_hash = excluded.content_hash,
+                row_count = excluded.row_count,
+                ingested_at = excluded.ingested_at
+            """,
+            (file_path, content_hash, staged, int(time.time())),
+        )
+        conn.execute("DELETE FROM staged_transactions")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return {
+        "file_path": file_path,
+        "skipped": False,
+        "inserted": inserted,
+        "updated": upserted - inserted,
+        "deleted": deleted,
+    }
@@ -0,0 +1,599 @@
+import os
+import pandas as pd
+from utils.classifier import MIN_CONFIDENCE, normalize_description, record_decisions
+from utils.db_loader import NATURAL_KEY_COLUMNS, PROJECT_ROOT, add_natural_keys, source_key
+from utils.money_utils import to_centavos
+from utils.facets import refresh_facets
+from utils.lookups import (
+    CREATE_TRANSACTIONS_VIEW, TRANSACTIONS_VIEW, create_lookup_tables, lookup_table, register_values,
+)
+from utils.reconciliation import reconcile_balances
+from utils.rollups import PERIOD_EXPRESSIONS, refresh_rollups
+from utils.search import CREATE_SEARCH_TABLE, rebuild_search_index
+
+# Datas são gravadas como dias desde 1970-01-01 e valores como centavos inteiros.
+# A versão do esquema fica em PRAGMA user_version.
+# Uma migração já publicada não muda: o que ela lê e grava no esquema da sua versão fica
+# aqui, e as mudanças seguintes entram numa versão nova.
+
+# Visão 'transactions' criada na versão 7 (a atual é CREATE_TRANSACTIONS_VIEW)
+_TRANSACTIONS_VIEW_V7 = f"""
+    CREATE VIEW {TRANSACTIONS_VIEW} AS
+    SELECT t.id, t.data, t.descricao, t.documento, t.credito, t.debito, t.saldo,
+           b.valor AS banco, c.valor AS conta, s.valor AS subconta, f.valor AS file_path,
+           t.natural_key
+    FROM bank_transactions t
+    JOIN lookup_banco b ON b.id = t.banco_id
+    LEFT JOIN lookup_conta c ON c.id = t.conta_id
+    LEFT JOIN lookup_subconta s ON s.id = t.subconta_id
+    LEFT JOIN lookup_file_path f ON f.id = t.file_path_id
+"""
+
+# Facetas a partir dos totais com banco, conta e subconta em texto (versões 6 a 11)
+_TEXT_FACET_QUERIES = {
+    "ano": (
+        "SELECT CAST(strftime('%Y', data * 86400, 'unixepoch') AS INTEGER), NULL, SUM(quantidade)"
+        " FROM transaction_rollups WHERE granularity = 'year' GROUP BY 1"
+    ),
+    "banco": (
+        "SELECT banco, NULL, SUM(quantidade) FROM transaction_rollups"
+        " WHERE granularity = 'year' GROUP BY banco"
+    ),
+    "conta": (
+        "SELECT conta, NULL, SUM(quantidade) FROM transaction_rollups"
+        " WHERE granularity = 'year' AND conta IS NOT NULL GROUP BY conta"
+    ),
+    "subconta": (
+        "SELECT subconta, conta, SUM(quantidade) FROM transaction_rollups"
+        " WHERE granularity = 'year' AND conta IS NOT NULL AND subconta IS NOT NULL"
+        " GROUP BY conta, subconta"
+    ),
+}
+
+
+def _fill_text_rollups(conn, source):
+    """
+    Refaz transaction_rollups no formato das versões 4 a 11 (banco, conta e subconta em
+    texto) a partir de `source`, tabela ou visão com essas colunas em texto.
+    """
+    conn.execute("DELETE FROM transaction_rollups")
+    for granularity, expression in PERIOD_EXPRESSIONS.items():
+        conn.execute(
+            "INSERT INTO transaction_rollups"
+            " (granularity, data, banco, conta, subconta, credito, debito, quantidade)"
+            f" SELECT ?, {expression} AS period, banco, conta, subconta, SUM(credito), SUM(debito), COUNT(*)"
+            f" FROM {source} GROUP BY period, banco, conta, subconta",
+            (granularity,),
+        )
+
+
+def _fill_text_facets(conn):
+    """
+    Refaz transaction_facets a partir dos totais em texto (versões 6 a 11).
+    """
+    conn.execute("DELETE FROM transaction_facets")
+    for facet, query in _TEXT_FACET_QUERIES.items():
+        conn.execute(
+            f"INSERT INTO transaction_facets (facet, valor, conta, quantidade) SELECT ?, * FROM ({query})",
+            (facet,),
+        )
+
+
+def _create_transactions_table(conn):
+    """
+    Versão 1: tabela original, com datas em texto e valores em REAL.
+    """
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS bank_transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data DATE NOT NULL,
+            descricao TEXT NOT NULL,
+            documento TEXT,
+            credito REAL DEFAULT 0,
+            debito REAL DEFAULT 0,
+            saldo REAL DEFAULT 0,
+            banco TEXT NOT NULL,
+            conta TEXT,
+            subconta TEXT,
+            file_path TEXT
+        )
+        """
+    )
+
+
+def _typed_storage_and_indexes(conn):
+    """
+    Versão 2: datas em dias desde a época, valores em centavos e índices para
+    as consultas por período, banco e conta/subconta.
+    """
+    conn.execute(
+        """
+        CREATE TABLE bank_transactions_v2 (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data INTEGER NOT NULL,
+            descricao TEXT NOT NULL,
+            documento TEXT,
+            credito INTEGER NOT NULL DEFAULT 0,
+            debito INTEGER NOT NULL DEFAULT 0,
+            saldo INTEGER,
+            banco TEXT NOT NULL,
+            conta TEXT,
+            subconta TEXT,
+            file_path TEXT
+        )
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO bank_transactions_v2
+            (id, data, descricao, documento, credito, debito, saldo, banco, conta, subconta, file_path)
+        SELECT
+            id,
+            CAST(julianday(data) - 2440587.5 AS INTEGER),
+            descricao,
+            documento,
+            CAST(ROUND(COALESCE(credito, 0) * 100) AS INTEGER),
+            CAST(ROUND(COALESCE(debito, 0) * 100) AS INTEGER),
+            CASE WHEN typeof(saldo) IN ('integer', 'real') THEN CAST(ROUND(saldo * 100) AS INTEGER) END,
+            banco, conta, subconta, file_path
+        FROM bank_transactions
+        """
+    )
+
+    # Saldos gravados como texto ("1.234,56") são convertidos com o mesmo parser da ingestão
+    text_balances = pd.read_sql(
+        "SELECT id, saldo FROM bank_transactions WHERE typeof(saldo) = 'text'", conn
+    )
+    if not text_balances.empty:
+        text_balances["saldo"] = to_centavos(text_balances["saldo"])
+        conn.executemany(
+            "UPDATE bank_transactions_v2 SET saldo = ? WHERE id = ?",
+            [
+                (None if pd.isna(saldo) else int(saldo), int(row_id))
+                for row_id, saldo in zip(text_balances["id"], text_balances["saldo"])
+            ],
+        )
+
+    conn.execute("DROP TABLE bank_transactions")
+    conn.execute("ALTER TABLE bank_transactions_v2 RENAME TO bank_transactions")
+    conn.execute("CREATE INDEX idx_transactions_data ON bank_transactions (data)")
+    conn.execute("CREATE INDEX idx_transactions_banco_data ON bank_transactions (banco, data)")
+    conn.execute(
+        "CREATE INDEX idx_transactions_conta_subconta_data ON bank_transactions (conta, subconta, data)"
+    )
+
+
+def _natural_keys_and_sources(conn):
+    """
+    Versão 3: chave natural única por transação e registro das fontes já carregadas,
+    usados pela ingestão incremental (ver utils/db_loader.py).
+    """
+    conn.execute("ALTER TABLE bank_transactions ADD COLUMN natural_key TEXT")
+
+    # Quebras de linha nas descrições e documentos lidos como float ("34055650.0")
+    # gerariam chaves diferentes para a mesma transação
+    conn.execute(
+        "UPDATE bank_transactions SET descricao = trim(descricao, ' ' || char(9) || char(10) || char(13))"
+    )
+    conn.execute(
+        """
+        UPDATE bank_transactions SET documento = substr(documento, 1, length(documento) - 2)
+        WHERE documento LIKE '%.0'
+        """
+    )
+    conn.execute("UPDATE bank_transactions SET documento = NULL WHERE trim(documento) = ''")
+
+    existing = pd.read_sql(
+        f"SELECT id, {', '.join(NATURAL_KEY_COLUMNS)} FROM bank_transactions ORDER BY id", conn
+    )
+    if not existing.empty:
+        existing = add_natural_keys(existing)
+        conn.executemany(
+            "UPDATE bank_transactions SET natural_key = ? WHERE id = ?",
+            zip(existing["natural_key"], existing["id"].astype(int).tolist()),
+        )
+
+    conn.execute(
+        "CREATE UNIQUE INDEX idx_transactions_natural_key ON bank_transactions (natural_key)"
+    )
+    conn.execute(
+        """
+        CREATE TABLE ingested_sources (
+            file_path TEXT PRIMARY KEY,
+            content_hash TEXT NOT NULL,
+            row_count INTEGER NOT NULL,
+            ingested_at INTEGER NOT NULL
+        )
+        """
+    )
+
+
+def _transaction_rollups(conn):
+    """
+    Versão 4: totais pré-agregados por granularidade (dia, semana, mês, ano), período,
+    banco, conta e subconta, mantidos pela ingestão (ver utils/rollups.py).
+    """
+    conn.execute(
+        """
+        CREATE TABLE transaction_rollups (
+            granularity TEXT NOT NULL,
+            data INTEGER NOT NULL,
+            banco TEXT NOT NULL,
+            conta TEXT,
+            subconta TEXT,
+            credito INTEGER NOT NULL,
+            debito INTEGER NOT NULL,
+            quantidade INTEGER NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        "CREATE INDEX idx_rollups_granularity_data ON transaction_rollups (granularity, data)"
+    )
+    _fill_text_rollups(conn, "bank_transactions")
+
+
+def _search_index(conn):
+    """
+    Versão 5: índice de texto (FTS5) sobre descrição e documento, mantido pela
+    ingestão (ver utils/search.py).
+    """
+    conn.execute(CREATE_SEARCH_TABLE)
+    rebuild_search_index(conn)
+
+
+def _transaction_facets(conn):
+    """
+    Versão 6: valores distintos de ano, banco, conta e subconta (por conta), com
+    contagens, para as opções dos filtros (ver utils/facets.py).
+    """
+    conn.execute(
+        """
+        CREATE TABLE transaction_facets (
+            facet TEXT NOT NULL,
+            valor NOT NULL,
+            conta TEXT,
+            quantidade INTEGER NOT NULL
+        )
+        """
+    )
+    conn.execute("CREATE INDEX idx_facets_facet_conta ON transaction_facets (facet, conta)")
+    _fill_text_facets(conn)
+
+
+def _dictionary_encoding(conn):
+    """
+    Versão 7: banco, conta, subconta e file_path passam a ser ids inteiros que apontam
+    para tabelas de valores (ver utils/lookups.py); a visão 'transactions' devolve as
+    transações com os textos. Os ids das transações são mantidos.
+    """
+    create_lookup_tables(conn)
+    register_values(conn, "bank_transactions")
+    sequence = conn.execute(
+        "SELECT seq FROM sqlite_sequence WHERE name = 'bank_transactions'"
+    ).fetchone()
+
+    conn.execute(
+        """
+        CREATE TABLE bank_transactions_v3 (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data INTEGER NOT NULL,
+            descricao TEXT NOT NULL,
+            documento TEXT,
+            credito INTEGER NOT NULL DEFAULT 0,
+            debito INTEGER NOT NULL DEFAULT 0,
+            saldo INTEGER,
+            banco_id INTEGER NOT NULL REFERENCES lookup_banco (id),
+            conta_id INTEGER REFERENCES lookup_conta (id),
+            subconta_id INTEGER REFERENCES lookup_subconta (id),
+            file_path_id INTEGER REFERENCES lookup_file_path (id),
+            natural_key TEXT
+        )
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO bank_transactions_v3
+            (id, data, descricao, documento, credito, debito, saldo,
+             banco_id, conta_id, subconta_id, file_path_id, natural_key)
+        SELECT t.id, t.data, t.descricao, t.documento, t.credito, t.debito, t.saldo,
+               b.id, c.id, s.id, f.id, t.natural_key
+        FROM bank_transactions t
+        JOIN lookup_banco b ON b.valor = t.banco
+        LEFT JOIN lookup_conta c ON c.valor = t.conta
+        LEFT JOIN lookup_subconta s ON s.valor = t.subconta
+        LEFT JOIN lookup_file_path f ON f.valor = t.file_path
+        """
+    )
+    conn.execute("DROP TABLE bank_transactions")
+    conn.execute("ALTER TABLE bank_transactions_v3 RENAME TO bank_transactions")
+    if sequence is not None:
+        # Ids removidos antes da migração continuam sem ser reaproveitados
+        conn.execute(
+            "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'bank_transactions'", sequence
+        )
+    conn.execute("CREATE INDEX idx_transactions_data ON bank_transactions (data)")
+    conn.execute("CREATE INDEX idx_transactions_banco_data ON bank_transactions (banco_id, data)")
+    conn.execute(
+        "CREATE INDEX idx_transactions_conta_subconta_data"
+        " ON bank_transactions (conta_id, subconta_id, data)"
+    )
+    conn.execute(
+        "CREATE INDEX idx_transactions_file_path ON bank_transactions (file_path_id)"
+    )
+    conn.execute(
+        "CREATE UNIQUE INDEX idx_transactions_natural_key ON bank_transactions (natural_key)"
+    )
+    conn.execute(_TRANSACTIONS_VIEW_V7)
+
+    _fill_text_rollups(conn, TRANSACTIONS_VIEW)
+    _fill_text_facets(conn)
+
+
+def _forecast_tables(conn):
+    """
+    Versão 8: modelos SARIMAX ajustados por série mensal e as previsões calculadas
+    com eles (ver src/forecast). Preenchidas por `python -m forecast`, não pela ingestão.
+    """
+    conn.execute(
+        """
+        CREATE TABLE forecast_models (
+            nivel TEXT NOT NULL,
+            conta TEXT NOT NULL,
+            chave TEXT NOT NULL,
+            medida TEXT NOT NULL,
+            inicio INTEGER NOT NULL,
+            ultimo_mes INTEGER NOT NULL,
+            assinatura TEXT NOT NULL,
+            ordem TEXT,
+            ordem_sazonal TEXT,
+            params TEXT,
+            aic REAL,
+            ajustado_em TEXT NOT NULL,
+            PRIMARY KEY (nivel, conta, chave, medida)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE forecasts (
+            nivel TEXT NOT NULL,
+            conta TEXT NOT NULL,
+            chave TEXT NOT NULL,
+            medida TEXT NOT NULL,
+            data INTEGER NOT NULL,
+            previsto INTEGER NOT NULL,
+            inferior INTEGER NOT NULL,
+            superior INTEGER NOT NULL,
+            PRIMARY KEY (nivel, conta, chave, medida, data)
+        )
+        """
+    )
+
+
+def _transaction_classification(conn):
+    """
+    Versão 9: origem ('manual', 'historico' ou 'regra') e confiança da conta/subconta
+    de cada transação, e as decisões manuais por descrição usadas para classificar as
+    transações que chegam sem conta (ver utils/classifier.py). As transações já
+    classificadas são todas manuais e formam as primeiras decisões.
+    """
+    conn.execute("ALTER TABLE bank_transactions ADD COLUMN classificacao TEXT")
+    conn.execute("ALTER TABLE bank_transactions ADD COLUMN confianca REAL")
+    conn.execute(
+        "UPDATE bank_transactions SET classificacao = 'manual', confianca = 1.0 WHERE conta_id IS NOT NULL"
+    )
+    conn.execute(
+        """
+        CREATE TABLE classification_decisions (
+            chave TEXT NOT NULL,
+            tipo TEXT NOT NULL,
+            conta TEXT NOT NULL,
+            subconta TEXT NOT NULL DEFAULT '',
+            quantidade INTEGER NOT NULL,
+            PRIMARY KEY (chave, tipo, conta, subconta)
+        )
+        """
+    )
+    manual = pd.read_sql(
+        f"SELECT descricao, credito, conta, subconta FROM {TRANSACTIONS_VIEW} WHERE conta IS NOT NULL", conn
+    )
+    conn.execute("CREATE TEMP TABLE manual_decisions (chave_classificacao, credito, conta, subconta)")
+    conn.executemany(
+        "INSERT INTO manual_decisions VALUES (?, ?, ?, ?)",
+        zip(
+            normalize_description(manual["descricao"]),
+            manual["credito"].tolist(),
+            manual["conta"],
+            manual["subconta"].astype(object).where(manual["subconta"].notna(), None),
+        ),
+    )
+    record_decisions(conn, "manual_decisions")
+    conn.execute("DROP TABLE manual_decisions")
+
+
+def _balance_reconciliation(conn):
+    """
+    Versão 10: conciliação do saldo informado nos extratos com o movimento de cada banco
+    (ver utils/reconciliation.py): as quebras encontradas e os checkpoints de fim de mês
+    de onde a conciliação recomeça. A ingestão mantém as duas tabelas.
+    """
+    conn.execute(
+        """
+        CREATE TABLE balance_checkpoints (
+            banco TEXT NOT NULL,
+            data INTEGER NOT NULL,
+            id INTEGER NOT NULL,
+            saldo INTEGER NOT NULL,
+            PRIMARY KEY (banco, data, id)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE balance_breaks (
+            id INTEGER PRIMARY KEY,
+            banco TEXT NOT NULL,
+            data INTEGER NOT NULL,
+            tipo TEXT NOT NULL,
+            esperado INTEGER,
+            saldo INTEGER,
+            diferenca INTEGER
+        )
+        """
+    )
+    conn.execute("CREATE INDEX idx_balance_breaks_banco_data ON balance_breaks (banco, data)")
+    reconcile_balances(conn)
+
+
+def _project_relative_sources(conn):
+    """
+    Versão 11: as fontes passam a ser gravadas com o caminho relativo à raiz do projeto
+    (ver source_key em utils/db_loader.py). As chaves antigas vinham do notebook
+    ("../data/raw/...", relativas a notebook/) ou do comando de ingestão rodado na raiz.
+    Chaves que passam a coincidir são unidas numa só.
+    """
+    for file_path_id, valor in conn.execute("SELECT id, valor FROM lookup_file_path").fetchall():
+        base_dir = os.path.join(PROJECT_ROOT, "notebook") if valor.startswith("../") else PROJECT_ROOT
+        key = source_key(valor, base_dir)
+        if key == valor:
+            continue
+        existing = conn.execute("SELECT id FROM lookup_file_path WHERE valor = ?", (key,)).fetchone()
+        if existing is None:
+            conn.execute("UPDATE lookup_file_path SET valor = ? WHERE id = ?", (key, file_path_id))
+        else:
+            conn.execute(
+                "UPDATE bank_transactions SET file_path_id = ? WHERE file_path_id = ?", (existing[0], file_path_id)
+            )
+            conn.execute("DELETE FROM lookup_file_path WHERE id = ?", (file_path_id,))
+
+    for (file_path,) in conn.execute("SELECT file_path FROM ingested_sources").fetchall():
+        base_dir = os.path.join(PROJECT_ROOT, "notebook") if file_path.startswith("../") else PROJECT_ROOT
+        key = source_key(file_path, base_dir)
+        if key == file_path:
+            continue
+        # As duas chaves eram o mesmo arquivo: fica um registro só
+        conn.execute("DELETE FROM ingested_sources WHERE file_path = ?", (key,))
+        conn.execute("UPDATE ingested_sources SET file_path = ? WHERE file_path = ?", (key, file_path))
+
+
+def _coded_rollups(conn):
+    """
+    Versão 12: transaction_rollups guarda os ids de banco, conta e subconta, como as
+    transações, e a visão 'transactions' passa a trazer esses ids: os filtros por banco,
+    conta e subconta comparam inteiros (ver utils/db_utils.py). Os totais e as facetas
+    são refeitos.
+    """
+    conn.execute("DROP TABLE transaction_rollups")
+    conn.execute(
+        """
+        CREATE TABLE transaction_rollups (
+            granularity TEXT NOT NULL,
+            data INTEGER NOT NULL,
+            banco_id INTEGER NOT NULL REFERENCES lookup_banco (id),
+            conta_id INTEGER REFERENCES lookup_conta (id),
+            subconta_id INTEGER REFERENCES lookup_subconta (id),
+            credito INTEGER NOT NULL,
+            debito INTEGER NOT NULL,
+            quantidade INTEGER NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        "CREATE INDEX idx_rollups_granularity_data ON transaction_rollups (granularity, data)"
+    )
+    conn.execute(f"DROP VIEW {TRANSACTIONS_VIEW}")
+    conn.execute(CREATE_TRANSACTIONS_VIEW)
+    refresh_rollups(conn)
+    refresh_facets(conn)
+
+
+def _trimmed_labels(conn):
+    """
+    Versão 13: conta e subconta sem espaços nas pontas, como a ingestão passa a gravar
+    ("Outras Despesas " vira "Outras Despesas"); valores que passam a coincidir são unidos,
+    nas transações e nas decisões manuais. As linhas classificadas automaticamente com
+    confiança abaixo de MIN_CONFIDENCE (ver utils/classifier.py) voltam a ficar sem conta.
+    Os totais e as facetas são refeitos.
+    """
+    for column in ("conta", "subconta"):
+        table = lookup_table(column)
+        rows = conn.execute(f"SELECT id, valor FROM {table} WHERE valor != trim(valor)").fetchall()
+        for value_id, valor in rows:
+            existing = conn.execute(f"SELECT id FROM {table} WHERE valor = ?", (valor.strip(),)).fetchone()
+            if existing is None:
+                conn.execute(f"UPDATE {table} SET valor = ? WHERE id = ?", (valor.strip(), value_id))
+            else:
+                conn.execute(
+                    f"UPDATE bank_transactions SET {column}_id = ? WHERE {column}_id = ?", (existing[0], value_id)
+                )
+                conn.execute(f"DELETE FROM {table} WHERE id = ?", (value_id,))
+
+    untrimmed = "conta != trim(conta) OR subconta != trim(subconta)"
+    conn.execute(
+        f"""
+        INSERT INTO classification_decisions (chave, tipo, conta, subconta, quantidade)
+        SELECT chave, tipo, trim(conta), trim(subconta), SUM(quantidade)
+        FROM classification_decisions
+        WHERE {untrimmed}
+        GROUP BY 1, 2, 3, 4
+        ON CONFLICT (chave, tipo, conta, subconta) DO UPDATE SET
+            quantidade = quantidade + excluded.quantidade
+        """
+    )
+    conn.execute(f"DELETE FROM classification_decisions WHERE {untrimmed}")
+
+    conn.execute(
+        "UPDATE bank_transactions SET conta_id = NULL, subconta_id = NULL, classificacao = NULL, confianca = NULL"
+        " WHERE classificacao IN ('historico', 'regra') AND confianca < ?",
+        (MIN_CONFIDENCE,),
+    )
+    refresh_rollups(conn)
+    refresh_facets(conn)
+
+
+# Cada posição corresponde a uma versão: MIGRATIONS[0] leva o banco à versão 1, e assim por diante.
+MIGRATIONS = [
+    _create_transactions_table,
+    _typed_storage_and_indexes,
+    _natural_keys_and_sources,
+    _transaction_rollups,
+    _search_index,
+    _transaction_facets,
+    _dictionary_encoding,
+    _forecast_tables,
+    _transaction_classification,
+    _balance_reconciliation,
+    _project_relative_sources,
+    _coded_rollups,
+    _trimmed_labels,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_schema_version(conn):
+    """
+    Retorna a versão do esquema gravada no banco (0 para um banco novo).
+    """
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """
+    Aplica, em ordem, as migrações que faltam. Cada uma roda em sua própria
+    transação junto com a atualização de user_version, então uma falha não
+    deixa o banco pela metade.
+    """
+    version = get_schema_version(conn)
+    for target, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        conn.execute("BEGIN")
+        try:
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {target}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return get_schema_version(conn)
@@ -1,12 +1,616 @@
+import copy
+import functools
+import os
 import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from datetime import date
+from typing import Optional, Tuple, Union
 import pandas as pd
+import streamlit as st
+from utils.db_loader import EPOCH, PROJECT_ROOT
+from utils.db_migrations import migrate
+from utils.facets import FACETS
+from utils.lookups import (
+    ENCODED_COLUMNS, TRANSACTION_COLUMNS, TRANSACTIONS_VIEW, decode_categorical, lookup_table, read_lookup,
+    stored_column,
+)
+from utils.reconciliation import read_balance_breaks
+from utils.rollups import PERIOD_EXPRESSIONS, choose_rollup_granularity
+from utils.search import SEARCH_TABLE, build_match_query
 
-def load_data_from_db(db_path="bank_data_csv.db"):
+# BANK_DB_PATH permite apontar a aplicação para outro banco (usado pelos benchmarks).
+# É o banco da empresa original; as demais ficam em utils/tenants.py.
+DB_PATH = os.environ.get("BANK_DB_PATH", os.path.join(PROJECT_ROOT, "bank_data_csv.db"))
+
+# Cada empresa (ver utils/tenants.py) tem seu banco, e cada banco tem seus caches de
+# leitura (ver _tenant_cache): até CACHED_TENANTS empresas ficam com caches aquecidos
+# ao mesmo tempo
+CACHED_TENANTS = int(os.environ.get("BANK_CACHED_TENANTS", "8"))
+
+# Conexões ociosas guardadas por banco em pooled_connection
+POOL_SIZE = 4
+
+# Ajustes aplicados a toda conexão. O banco fica em WAL (ver connect): a ingestão grava
+# sem bloquear as leituras das páginas, e as leituras não bloqueiam a ingestão.
+CONNECTION_PRAGMAS = {
+    "synchronous": "NORMAL",  # seguro com WAL: sem fsync a cada commit, só nos checkpoints
+    "temp_store": "MEMORY",  # ordenações e tabelas temporárias (GROUP BY, staging) em memória
+    "cache_size": -32 * 1024,  # 32 MiB de páginas em cache por conexão (negativo = KiB)
+    "mmap_size": 256 * 1024 * 1024,  # lê até 256 MiB do arquivo mapeado, sem copiar páginas
+    "busy_timeout": 5000,  # espera até 5 s por um lock em vez de falhar na hora
+}
+
+# Comandos preparados guardados por conexão: as consultas das páginas são sempre os
+# mesmos textos SQL com parâmetros, e uma conexão do pool reaproveita a compilação deles
+STATEMENT_CACHE_SIZE = 256
+
+# Dimensões pelas quais as consultas podem filtrar e agrupar
+GROUP_COLUMNS = ("banco", "conta", "subconta")
+
+_migrated_paths = set()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+# Caches de leitura por banco: caminho -> (assinatura, {função: OrderedDict}), do banco
+# usado há mais tempo para o mais recente
+_tenant_caches = OrderedDict()
+_tenant_caches_lock = threading.Lock()
+
+
+def connect(db_path=DB_PATH, check_same_thread=True):
+    """
+    Abre uma conexão com o banco, com os ajustes de CONNECTION_PRAGMAS. Na primeira
+    abertura de cada arquivo neste processo, passa o banco para WAL (a escolha fica
+    gravada no arquivo) e aplica as migrações de esquema pendentes.
+    """
+    conn = sqlite3.connect(
+        db_path, check_same_thread=check_same_thread, cached_statements=STATEMENT_CACHE_SIZE
+    )
+    for name, value in CONNECTION_PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    # O mesmo arquivo pode chegar por caminhos diferentes (relativo, absoluto)
+    path = os.path.abspath(db_path)
+    if path not in _migrated_paths:
+        conn.execute("PRAGMA journal_mode = WAL")
+        migrate(conn)
+        _migrated_paths.add(path)
+    return conn
+
+
+@contextmanager
+def pooled_connection(db_path=DB_PATH):
+    """
+    Empresta uma conexão de leitura do pool do banco `db_path` e a devolve ao fim do
+    bloco. Cada banco (cada empresa) tem o seu pool, com até POOL_SIZE conexões ociosas,
+    e cada conexão atende uma thread por vez: as consultas das páginas não pagam a
+    abertura do arquivo nem a preparação dos comandos a cada leitura. As conexões do
+    pool só leem (query_only); a ingestão usa connect.
+    """
+    db_path = os.path.abspath(db_path)
+    with _pools_lock:
+        idle = _pools.setdefault(db_path, [])
+        conn = idle.pop() if idle else None
+    if conn is None:
+        conn = connect(db_path, check_same_thread=False)
+        conn.execute("PRAGMA query_only = ON")
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        with _pools_lock:
+            if len(idle) < POOL_SIZE:
+                idle.append(conn)
+                conn = None
+        if conn is not None:
+            conn.close()
+
+
+def to_epoch_day(value):
+    """
+    Converte uma data para o número de dias desde 1970-01-01, formato gravado na coluna 'data'.
+    """
+    return (pd.Timestamp(value).normalize() - EPOCH).days
+
+
+def from_epoch_days(values):
+    """
+    Converte uma coluna de dias desde 1970-01-01 para datetime.
+    """
+    return pd.to_datetime(values, unit="D")
+
+
+def _tenant_cache(max_entries, copy_result=True):
+    """
+    Decorador das leituras f(db_path, fingerprint, *args): guarda os resultados no cache
+    do banco `db_path`, com até `max_entries` entradas por banco. O cache de um banco só
+    vale para uma assinatura (ver get_db_fingerprint): a primeira leitura com uma
+    assinatura nova descarta as entradas da anterior, e o banco usado há mais tempo sai
+    quando passam de CACHED_TENANTS. Como em st.cache_data, cada chamada recebe uma
+    cópia do resultado; com copy_result=False, recebe o próprio objeto guardado.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(db_path, fingerprint, *args):
+            with _tenant_caches_lock:
+                state = _tenant_caches.get(db_path)
+                if state is None or state[0] != fingerprint:
+                    state = _tenant_caches[db_path] = (fingerprint, {})
+                _tenant_caches.move_to_end(db_path)
+                while len(_tenant_caches) > CACHED_TENANTS:
+                    _tenant_caches.popitem(last=False)
+                entries = state[1].setdefault(func.__name__, OrderedDict())
+                found = args in entries
+                if found:
+                    entries.move_to_end(args)
+                    value = entries[args]
+            if not found:
+                value = func(db_path, fingerprint, *args)
+                with _tenant_caches_lock:
+                    entries[args] = value
+                    while len(entries) > max_entries:
+                        entries.popitem(last=False)
+            return copy.deepcopy(value) if copy_result else value
+
+        return wrapper
+
+    return decorator
+
+
+def clear_tenant_caches():
+    """
+    Esvazia os caches de leitura de todos os bancos.
+    """
+    with _tenant_caches_lock:
+        _tenant_caches.clear()
+
+
+def _file_state(path):
+    """
+    (mtime, tamanho) do arquivo, ou None se ele não existe.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime, stat.st_size
+
+
+def get_db_fingerprint(db_path=DB_PATH):
+    """
+    Retorna uma assinatura barata do estado do banco: (mtime, estado do WAL, maior id).
+    Em WAL, os commits vão para o arquivo -wal e só chegam ao banco no checkpoint. Depois
+    de um checkpoint o -wal é reaproveitado do início, sem diminuir, então o tamanho pode
+    não mudar, mas a data de modificação muda a cada commit: qualquer inserção, remoção
+    ou regravação altera a assinatura.
+    """
+    with pooled_connection(db_path) as conn:
+        (max_id,) = conn.execute("SELECT MAX(id) FROM bank_transactions").fetchone()
+    return os.path.getmtime(db_path), _file_state(f"{db_path}-wal"), max_id
+
+
+def _parse_transactions(df):
+    """
+    Converte as datas da tabela (dias inteiros) para datetime. Os valores continuam em
+    centavos inteiros (Int64, com nulos), como estão gravados; viram reais só na exibição.
+    """
+    df["data"] = from_epoch_days(df["data"])
+    for column in ("credito", "debito", "saldo"):
+        df[column] = df[column].astype("Int64")
+    return df
+
+
+# Colunas de bank_transactions na ordem da visão, com os ids no lugar dos textos
+_ENCODED_SELECT = [
+    f"{stored_column(column)} AS {column}" if column in ENCODED_COLUMNS else column
+    for column in TRANSACTION_COLUMNS
+]
+
+# Colunas lidas da visão pelas consultas de transações (sem os ids usados nos filtros)
+_TRANSACTION_SELECT = ", ".join(TRANSACTION_COLUMNS)
+
+
+@_tenant_cache(max_entries=1, copy_result=False)
+def _load_cached_transactions(db_path, fingerprint):
+    """
+    Lê e tipa a tabela inteira uma única vez por assinatura do banco; só a leitura da
+    assinatura atual fica guardada. O resultado é compartilhado entre todas as sessões e páginas.
+    """
+    with pooled_connection(db_path) as conn:
+        df = pd.read_sql(f"SELECT {', '.join(_ENCODED_SELECT)} FROM bank_transactions", conn)
+        # Textos repetidos chegam como ids e viram Categorical com os códigos das tabelas de valores
+        for column in ENCODED_COLUMNS:
+            df[column] = decode_categorical(df[column], read_lookup(conn, column))
+    return _parse_transactions(df)
+
+
+@st.cache_resource(show_spinner=False, max_entries=8 * CACHED_TENANTS)
+def _load_cached_snapshot(store_path, snapshot_version, columns, bancos, years):
+    """
+    Lê (uma vez por versão do snapshot e combinação de partições/colunas) o snapshot Parquet.
+    """
+    from utils.parquet_store import read_snapshot
+
+    return read_snapshot(store_path, columns=columns, bancos=bancos, years=years)
+
+
+def load_data_from_db(db_path=DB_PATH, backend="sqlite", columns=None, bancos=None, years=None,
+                      store_path=None):
     """
     Carrega os dados do banco SQLite.
+    A leitura fica em cache até o banco mudar (ver get_db_fingerprint); cada
+    chamada recebe uma cópia, então o chamador pode alterá-la livremente.
+    Crédito, débito e saldo vêm em centavos inteiros (Int64).
+
+    Com backend="parquet", lê o snapshot colunar (utils/parquet_store.py) em vez do
+    SQLite: só as colunas em `columns` e só as partições dos `bancos`/`years` pedidos,
+    com banco/conta/subconta como Categorical e os textos e valores em ArrowDtype
+    (int64[pyarrow] em centavos). A cópia devolvida não duplica as colunas do Arrow,
+    que são imutáveis.
+    """
+    if backend == "parquet":
+        from utils.parquet_store import PARQUET_PATH, get_snapshot_version
+
+        store_path = os.path.abspath(store_path or PARQUET_PATH)
+        data = _load_cached_snapshot(
+            store_path,
+            get_snapshot_version(store_path),
+            tuple(columns) if columns else None,
+            tuple(bancos) if bancos is not None else None,
+            tuple(years) if years is not None else None,
+        )
+        return data.copy()
+    if backend != "sqlite":
+        raise ValueError(f"Backend desconhecido: {backend}")
+
+    db_path = os.path.abspath(db_path)
+    data = _load_cached_transactions(db_path, get_db_fingerprint(db_path))
+    if columns:
+        data = data[list(columns)]
+    if bancos is not None:
+        data = data[data["banco"].isin(bancos)]
+    if years is not None:
+        data = data[data["data"].dt.year.isin(years)]
+    return data.copy()
+
+
+@dataclass(frozen=True)
+class TransactionFilter:
+    """
+    Critérios de filtro aplicados no SQLite. Campos None não filtram.
+    banco/conta/subconta aceitam um valor ou uma tupla de valores; as datas são inclusivas.
+    descricao é uma busca por prefixos de termos na descrição e no documento.
+    """
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    banco: Union[str, Tuple[str, ...], None] = None
+    conta: Union[str, Tuple[str, ...], None] = None
+    subconta: Union[str, Tuple[str, ...], None] = None
+    descricao: Optional[str] = None
+
+    def __post_init__(self):
+        # Listas viram tuplas para o filtro continuar imutável e servir de chave de cache
+        for column in GROUP_COLUMNS:
+            value = getattr(self, column)
+            if value is not None and not isinstance(value, (str, tuple)):
+                object.__setattr__(self, column, tuple(value))
+
+
+def _compile_filters(filters):
+    """
+    Traduz um TransactionFilter em cláusula WHERE parametrizada, sobre uma fonte com
+    'data', 'id' e os ids de banco, conta e subconta (bank_transactions, a visão
+    'transactions' ou transaction_rollups).
+    """
+    if filters is None:
+        return "", []
+    clauses, params = [], []
+    if filters.start_date is not None:
+        clauses.append("data >= ?")
+        params.append(to_epoch_day(filters.start_date))
+    if filters.end_date is not None:
+        clauses.append("data <= ?")
+        params.append(to_epoch_day(filters.end_date))
+    for column in GROUP_COLUMNS:
+        value = getattr(filters, column)
+        if value is None:
+            continue
+        # O texto vira id uma vez, pelo índice único da tabela de valores (ver utils/lookups.py),
+        # e as linhas são comparadas pelo id inteiro
+        ids = f"SELECT id FROM {lookup_table(column)} WHERE valor"
+        if isinstance(value, str):
+            clauses.append(f"{stored_column(column)} = ({ids} = ?)")
+            params.append(value)
+        else:
+            clauses.append(f"{stored_column(column)} IN ({ids} IN ({', '.join('?' * len(value))}))")
+            params.extend(value)
+    if filters.descricao:
+        # Busca no índice de texto (utils/search.py): prefixos, sem acentos nem caixa,
+        # em descrição e documento. Texto sem nenhum termo não encontra nada.
+        match = build_match_query(filters.descricao)
+        if match is None:
+            clauses.append("0")
+        else:
+            clauses.append(f"id IN (SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH ?)")
+            params.append(match)
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+
+def _rollup_granularity_for(filters, period):
+    """
+    Retorna a granularidade de transaction_rollups que responde à consulta, ou None
+    quando ela precisa das transações em si (busca por descrição).
+    """
+    if filters is None:
+        return choose_rollup_granularity(period)
+    if filters.descricao:
+        return None
+    return choose_rollup_granularity(
+        period,
+        to_epoch_day(filters.start_date) if filters.start_date is not None else None,
+        to_epoch_day(filters.end_date) if filters.end_date is not None else None,
+    )
+
+
+def build_aggregate_query(filters=None, period=None, by=()):
     """
-    conn = sqlite3.connect(db_path)
-    query = "SELECT * FROM bank_transactions"
-    df = pd.read_sql(query, conn)
-    conn.close()
+    Monta o SQL (e os parâmetros) que soma crédito, débito e quantidade de transações
+    por período ('day', 'week', 'month', 'year' ou None) e pelas dimensões em `by`.
+    O período sai na coluna 'data' como a data de início do período.
+
+    Sempre que os filtros permitem, a soma parte dos totais pré-agregados de
+    transaction_rollups (ver utils/rollups.py) em vez de percorrer as transações.
+    """
+    if period is not None and period not in PERIOD_EXPRESSIONS:
+        raise ValueError(f"Período inválido: {period}")
+    unknown = [column for column in by if column not in GROUP_COLUMNS]
+    if unknown:
+        raise ValueError(f"Colunas de agrupamento inválidas: {unknown}")
+
+    # Soma agrupando pelos ids; os textos das dimensões entram só nas linhas do resultado
+    keys = ([f"{PERIOD_EXPRESSIONS[period]} AS data"] if period else []) + [stored_column(column) for column in by]
+    group_positions = [str(i) for i in range(1, len(keys) + 1)]
+    where, params = _compile_filters(filters)
+
+    granularity = _rollup_granularity_for(filters, period)
+    if granularity is None:
+        source, count = "bank_transactions", "COUNT(*)"
+    else:
+        source, count = "transaction_rollups", "COALESCE(SUM(quantidade), 0)"
+        where = f"{where} AND granularity = ?" if where else " WHERE granularity = ?"
+        params = params + [granularity]
+
+    sql = (
+        f"SELECT {', '.join(keys + ['SUM(credito) AS credito', 'SUM(debito) AS debito', f'{count} AS quantidade'])}"
+        f" FROM {source}{where}"
+    )
+    if group_positions:
+        sql += f" GROUP BY {', '.join(group_positions)}"
+    if not by:
+        return (f"{sql} ORDER BY 1" if period else sql), params
+
+    columns = (["a.data"] if period else []) + [f"{lookup_table(column)}.valor AS {column}" for column in by]
+    joins = "".join(
+        f" LEFT JOIN {lookup_table(column)} ON {lookup_table(column)}.id = a.{stored_column(column)}" for column in by
+    )
+    order = (["a.data"] if period else []) + list(by)
+    sql = (
+        f"SELECT {', '.join(columns + ['a.credito', 'a.debito', 'a.quantidade'])}"
+        f" FROM ({sql}) AS a{joins} ORDER BY {', '.join(order)}"
+    )
+    return sql, params
+
+
+@_tenant_cache(max_entries=64)
+def _aggregate_cached(db_path, fingerprint, filters, period, by):
+    sql, params = build_aggregate_query(filters, period, by)
+    with pooled_connection(db_path) as conn:
+        df = pd.read_sql(sql, conn, params=params)
+    if period:
+        df["data"] = from_epoch_days(df["data"])
+    for column in ("credito", "debito"):
+        df[column] = pd.to_numeric(df[column]).fillna(0).astype("int64")
     return df
+
+
+def aggregate_transactions(filters=None, period=None, by=(), db_path=DB_PATH):
+    """
+    Retorna os totais de crédito/débito agregados no próprio SQLite.
+    As colunas seguem os nomes da tabela ('data', 'banco', 'conta', 'subconta',
+    'credito', 'debito'), então o resultado pode ser passado às funções de análise.
+    Os totais são somas inteiras em centavos (int64), exatas.
+    """
+    db_path = os.path.abspath(db_path)
+    return _aggregate_cached(
+        db_path, get_db_fingerprint(db_path), filters, period, tuple(by)
+    )
+
+
+@_tenant_cache(max_entries=32)
+def _query_cached(db_path, fingerprint, filters):
+    where, params = _compile_filters(filters)
+    with pooled_connection(db_path) as conn:
+        df = pd.read_sql(
+            f"SELECT {_TRANSACTION_SELECT} FROM {TRANSACTIONS_VIEW}{where} ORDER BY data, id", conn, params=params
+        )
+    return _parse_transactions(df)
+
+
+def query_transactions(filters=None, db_path=DB_PATH):
+    """
+    Retorna as transações que atendem aos filtros, já tipadas e ordenadas por data.
+    """
+    db_path = os.path.abspath(db_path)
+    return _query_cached(db_path, get_db_fingerprint(db_path), filters)
+
+
+@_tenant_cache(max_entries=32)
+def _facet_cached(db_path, fingerprint, facet, conta):
+    with pooled_connection(db_path) as conn:
+        if conta is not None:
+            return pd.read_sql(
+                "SELECT valor, quantidade FROM transaction_facets WHERE facet = ? AND conta = ? ORDER BY valor",
+                conn, params=(facet, conta),
+            )
+        # Sem conta, a mesma subconta de contas diferentes vira uma única opção
+        return pd.read_sql(
+            "SELECT valor, SUM(quantidade) AS quantidade FROM transaction_facets WHERE facet = ?"
+            " GROUP BY valor ORDER BY valor",
+            conn, params=(facet,),
+        )
+
+
+def get_facet_values(facet, conta=None, counts=False, db_path=DB_PATH):
+    """
+    Retorna os valores distintos de 'ano', 'banco', 'conta' ou 'subconta' (só os da
+    `conta`, se informada), em ordem, para as opções dos filtros. Com counts=True,
+    retorna um DataFrame com 'valor' e 'quantidade' de transações. Lê a tabela de
+    facetas mantida pela ingestão, sem percorrer as transações.
+    """
+    if facet not in FACETS:
+        raise ValueError(f"Faceta inválida: {facet}")
+    db_path = os.path.abspath(db_path)
+    values = _facet_cached(db_path, get_db_fingerprint(db_path), facet, conta)
+    return values if counts else values["valor"].tolist()
+
+
+@_tenant_cache(max_entries=1)
+def _forecasts_cached(db_path, fingerprint):
+    from forecast.store import read_forecasts, stale_series
+
+    with pooled_connection(db_path) as conn:
+        forecasts = read_forecasts(conn)
+        _, _, stale = stale_series(conn)
+    forecasts["data"] = from_epoch_days(forecasts["data"])
+    return forecasts, len(stale)
+
+
+def get_forecasts(db_path=DB_PATH):
+    """
+    Retorna (previsões, pendentes): as previsões mensais gravadas por `python -m forecast`
+    (ver src/forecast), com 'previsto', 'inferior' e 'superior' em centavos, e quantas
+    séries estão sem modelo ou com modelo desatualizado. Só lê o banco: nenhum modelo
+    é ajustado aqui.
+    """
+    db_path = os.path.abspath(db_path)
+    return _forecasts_cached(db_path, get_db_fingerprint(db_path))
+
+
+@_tenant_cache(max_entries=1)
+def _balance_breaks_cached(db_path, fingerprint):
+    with pooled_connection(db_path) as conn:
+        breaks = read_balance_breaks(conn)
+    breaks["data"] = from_epoch_days(breaks["data"])
+    return breaks
+
+
+def get_balance_breaks(db_path=DB_PATH):
+    """
+    Retorna as quebras da conciliação de saldo por banco (ver utils/reconciliation.py),
+    com 'tipo' da quebra e 'esperado', 'saldo' e 'diferenca' em centavos. A conciliação
+    é mantida pela ingestão; aqui o banco só é lido.
+    """
+    db_path = os.path.abspath(db_path)
+    return _balance_breaks_cached(db_path, get_db_fingerprint(db_path))
+
+
+# Linhas por página no histórico de transações
+PAGE_SIZE = 100
+
+
+def build_page_query(filters=None, cursor=None, direction="next", descending=False, limit=PAGE_SIZE):
+    """
+    Monta o SQL (e os parâmetros) de uma página das transações filtradas, com paginação
+    por chave (keyset) sobre (data, id): em vez de OFFSET, a página começa logo depois
+    (direction="next") ou termina logo antes (direction="previous") de `cursor`, a chave
+    (data em dias, id) da linha na borda da página atual. Os índices de 'data' (que
+    incluem o id) servem tanto ao filtro quanto à ordenação.
+    """
+    if direction not in ("next", "previous"):
+        raise ValueError(f"Direção inválida: {direction}")
+    where, params = _compile_filters(filters)
+    # Para voltar, a consulta anda no sentido contrário e a página é invertida depois
+    backwards = (direction == "previous") != descending
+    if cursor is not None:
+        clause = f"(data, id) {'<' if backwards else '>'} (?, ?)"
+        where = f"{where} AND {clause}" if where else f" WHERE {clause}"
+        params = params + [int(cursor[0]), int(cursor[1])]
+    order = " DESC" if backwards else ""
+    sql = f"SELECT {_TRANSACTION_SELECT} FROM {TRANSACTIONS_VIEW}{where} ORDER BY data{order}, id{order} LIMIT ?"
+    return sql, params + [int(limit)]
+
+
+@_tenant_cache(max_entries=64)
+def _page_cached(db_path, fingerprint, filters, cursor, direction, descending, limit):
+    sql, params = build_page_query(filters, cursor, direction, descending, limit)
+    with pooled_connection(db_path) as conn:
+        df = pd.read_sql(sql, conn, params=params)
+    if direction == "previous":
+        df = df.iloc[::-1].reset_index(drop=True)
+    return _parse_transactions(df)
+
+
+def query_transaction_page(filters=None, cursor=None, direction="next", descending=False,
+                           limit=PAGE_SIZE, db_path=DB_PATH):
+    """
+    Retorna até `limit` transações filtradas, já tipadas, em ordem de (data, id)
+    crescente (ou decrescente, com `descending`). Sem `cursor`, "next" traz a primeira
+    página e "previous" a última; com ele, a página seguinte ou a anterior (ver
+    build_page_query e page_cursors). Só as linhas da página saem do SQLite.
+    """
+    db_path = os.path.abspath(db_path)
+    return _page_cached(
+        db_path, get_db_fingerprint(db_path), filters,
+        tuple(cursor) if cursor is not None else None, direction, descending, limit,
+    )
+
+
+def build_search_query(filters, limit=PAGE_SIZE):
+    """
+    Monta o SQL (e os parâmetros) das `limit` transações mais relevantes para a busca
+    em filters.descricao (ordem do bm25 do FTS5), respeitando os demais filtros.
+    """
+    match = build_match_query(filters.descricao)
+    if match is None:
+        return f"SELECT {_TRANSACTION_SELECT} FROM {TRANSACTIONS_VIEW} WHERE 0", []
+    where, params = _compile_filters(replace(filters, descricao=None))
+    sql = (
+        f"SELECT {', '.join(f'{TRANSACTIONS_VIEW}.{column}' for column in TRANSACTION_COLUMNS)} FROM {TRANSACTIONS_VIEW}"
+        f" JOIN (SELECT rowid AS id, rank FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH ?) AS hits"
+        f" USING (id){where} ORDER BY hits.rank, data, id LIMIT ?"
+    )
+    return sql, [match] + params + [int(limit)]
+
+
+@_tenant_cache(max_entries=32)
+def _search_cached(db_path, fingerprint, filters, limit):
+    sql, params = build_search_query(filters, limit)
+    with pooled_connection(db_path) as conn:
+        df = pd.read_sql(sql, conn, params=params)
+    return _parse_transactions(df)
+
+
+def search_transactions(filters, limit=PAGE_SIZE, db_path=DB_PATH):
+    """
+    Retorna as `limit` transações que mais combinam com a busca em filters.descricao,
+    da mais relevante para a menos relevante, já tipadas.
+    """
+    db_path = os.path.abspath(db_path)
+    return _search_cached(db_path, get_db_fingerprint(db_path), filters, limit)
+
+
+def page_cursors(page):
+    """
+    Retorna as chaves (data em dias, id) da primeira e da última linha da página,
+    para pedir a página anterior e a seguinte.
+    """
+    if page.empty:
+        return None, None
+    first, last = page.iloc[0], page.iloc[-1]
+    return (to_epoch_day(first["data"]), int(first["id"])), (to_epoch_day(last["data"]), int(last["id"]))
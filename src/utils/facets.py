@@ -0,0 +1,44 @@
+# Valores distintos (facetas) usados nas opções dos filtros das páginas, com a
+# quantidade de transações de cada um. Subcontas são guardadas por conta (coluna conta).
+FACETS = ("ano", "banco", "conta", "subconta")
+
+# Cada faceta sai dos totais anuais de transaction_rollups (ver utils/rollups.py), que
+# têm poucas linhas por ano, então refazer a tabela não depende do tamanho do livro.
+# Os totais guardam ids; os textos vêm das tabelas de valores (ver utils/lookups.py).
+_FACET_QUERIES = {
+    "ano": (
+        "SELECT CAST(strftime('%Y', data * 86400, 'unixepoch') AS INTEGER), NULL, SUM(quantidade)"
+        " FROM transaction_rollups WHERE granularity = 'year' GROUP BY 1"
+    ),
+    "banco": (
+        "SELECT b.valor, NULL, SUM(r.quantidade) FROM transaction_rollups r"
+        " JOIN lookup_banco b ON b.id = r.banco_id"
+        " WHERE r.granularity = 'year' GROUP BY r.banco_id"
+    ),
+    "conta": (
+        "SELECT c.valor, NULL, SUM(r.quantidade) FROM transaction_rollups r"
+        " JOIN lookup_conta c ON c.id = r.conta_id"
+        " WHERE r.granularity = 'year' GROUP BY r.conta_id"
+    ),
+    "subconta": (
+        "SELECT s.valor, c.valor, SUM(r.quantidade) FROM transaction_rollups r"
+        " JOIN lookup_conta c ON c.id = r.conta_id"
+        " JOIN lookup_subconta s ON s.id = r.subconta_id"
+        " WHERE r.granularity = 'year' GROUP BY r.conta_id, r.subconta_id"
+    ),
+}
+
+
+def refresh_facets(conn, facets=FACETS):
+    """
+    Refaz as facetas pedidas em transaction_facets a partir dos totais anuais.
+    Precisa rodar depois de refresh_rollups. Não faz commit: roda dentro da
+    transação de quem chama.
+    """
+    for facet in facets:
+        conn.execute("DELETE FROM transaction_facets WHERE facet = ?", (facet,))
+        conn.execute(
+            "INSERT INTO transaction_facets (facet, valor, conta, quantidade)"
+            f" SELECT ?, * FROM ({_FACET_QUERIES[facet]})",
+            (facet,),
+        )
@@ -0,0 +1,184 @@
+import numpy as np
+import pandas as pd
+from utils.money_utils import to_centavos
+
+# Códigos inteiros de período por frequência: semanas contadas a partir da segunda-feira
+# 1969-12-29, meses desde 1970-01 e anos desde 1970. Cada função recebe dias desde 1970-01-01.
+PERIOD_CODES = {
+    "W": lambda days: (days + 3) // 7,
+    "M": lambda days: days.astype("datetime64[D]").astype("datetime64[M]").astype("int64"),
+    "Y": lambda days: days.astype("datetime64[D]").astype("datetime64[Y]").astype("int64"),
+}
+
+# Converte o código de volta na data de início do período
+PERIOD_STARTS = {
+    "W": lambda codes: (codes * 7 - 3).astype("datetime64[D]"),
+    "M": lambda codes: codes.astype("datetime64[M]").astype("datetime64[D]"),
+    "Y": lambda codes: codes.astype("datetime64[Y]").astype("datetime64[D]"),
+}
+
+MONEY_COLUMNS = ("credito", "debito", "saldo")
+
+
+def to_epoch_days(dates):
+    """
+    Converte datas (coluna, array ou escalar) para dias inteiros desde 1970-01-01.
+    """
+    return np.asarray(dates, dtype="datetime64[D]").astype("int64")
+
+
+def _read_only(values):
+    """
+    Devolve uma visão do array que não aceita escrita.
+    """
+    view = values.view()
+    view.flags.writeable = False
+    return view
+
+
+class PreparedLedger:
+    """
+    Transações (ou resumos agregados) preparadas uma única vez para as funções de
+    análise: 'data' em datetime64, crédito/débito/saldo em centavos inteiros (int64,
+    crédito e débito com nulos em 0) e chaves de calendário ('dias', 'ano', 'mes' e os códigos de período) calculadas sob demanda
+    e guardadas na instância.
+
+    O objeto não muda depois de criado: as colunas saem como arrays somente leitura
+    e filtrar (where) devolve outro PreparedLedger. O DataFrame de origem também não
+    é alterado, então pode vir direto de um cache do Streamlit.
+
+    Valores em colunas inteiras já são centavos (como saem de load_data_from_db e
+    aggregate_transactions); floats ou textos ("1.234,56") são reais e são convertidos
+    uma vez, arredondando para o centavo. Somas ficam em centavos, exatas.
+    """
+
+    def __init__(self, data):
+        converted = {}
+        if "data" in data and not pd.api.types.is_datetime64_any_dtype(data["data"]):
+            converted["data"] = pd.to_datetime(data["data"], errors="coerce")
+        for column in MONEY_COLUMNS:
+            if column not in data:
+                continue
+            values = data[column]
+            if not pd.api.types.is_integer_dtype(values):
+                values = to_centavos(values)
+            if column != "saldo" and values.dtype != "int64":
+                values = values.fillna(0).astype("int64")
+            if values is not data[column]:
+                converted[column] = values
+        self._frame = data.assign(**converted) if converted else data.copy(deep=False)
+        self._cache = {}
+
+    def __len__(self):
+        return len(self._frame)
+
+    def __contains__(self, name):
+        return name in self._frame or name in self._DERIVED
+
+    @property
+    def empty(self):
+        return len(self._frame) == 0
+
+    @property
+    def columns(self):
+        return list(self._frame.columns)
+
+    def column(self, name):
+        """
+        Retorna uma coluna (ou chave derivada) como array somente leitura.
+        Colunas do DataFrame de origem têm precedência sobre as derivadas.
+        """
+        if name not in self._cache:
+            if name in self._frame:
+                values = self._frame[name].to_numpy()
+            elif name in self._DERIVED:
+                values = self._DERIVED[name](self)
+            else:
+                raise KeyError(name)
+            self._cache[name] = _read_only(values)
+        return self._cache[name]
+
+    def period_codes(self, freq):
+        """
+        Códigos inteiros de período ("W", "M" ou "Y") de cada linha, ver PERIOD_CODES.
+        """
+        key = f"codigo_{freq}"
+        if key not in self._cache:
+            self._cache[key] = _read_only(PERIOD_CODES[freq](self.column("dias")))
+        return self._cache[key]
+
+    def codes(self, name):
+        """
+        Retorna (códigos, categorias) de uma coluna de texto: os do Categorical, quando a
+        coluna já chega assim (ver load_data_from_db), ou os de uma fatoração feita uma vez.
+        Nulos têm código -1. Filtros e agrupamentos comparam os códigos, não os textos.
+        """
+        key = f"codigos_{name}"
+        if key not in self._cache:
+            values = self._frame[name]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                codes, categories = values.cat.codes.to_numpy(), values.cat.categories
+            else:
+                codes, categories = pd.factorize(values)
+            self._cache[key] = (_read_only(codes), pd.Index(categories))
+        return self._cache[key]
+
+    def matches(self, name, predicate):
+        """
+        Máscara das linhas cuja coluna de texto satisfaz `predicate`, que recebe as
+        categorias (um Index) e devolve um booleano por categoria. Nulos nunca casam.
+        """
+        codes, categories = self.codes(name)
+        selected = np.append(np.asarray(predicate(categories), dtype=bool), False)
+        return selected[codes]
+
+    def isin(self, name, values):
+        """
+        Máscara das linhas em que a coluna de texto tem um dos `values`.
+        """
+        return self.matches(name, lambda categories: categories.isin(list(values)))
+
+    def where(self, mask):
+        """
+        Retorna um novo PreparedLedger só com as linhas em que `mask` é verdadeiro.
+        """
+        return PreparedLedger(self._frame.loc[np.asarray(mask, dtype=bool)])
+
+    def sum_by(self, keys, values, mask=None):
+        """
+        Soma as colunas `values` agrupando pelas colunas/chaves derivadas em `keys`,
+        opcionalmente só nas linhas de `mask`. O resultado é um DataFrame novo,
+        ordenado pelas chaves, com as chaves como colunas. Linhas com chave nula ficam de fora.
+        """
+        # Chaves de texto agrupam pelos códigos; os textos voltam só no resultado
+        encoded = {
+            name: self.codes(name) for name in keys
+            if name in self._frame and not pd.api.types.is_numeric_dtype(self._frame[name])
+            and not pd.api.types.is_datetime64_any_dtype(self._frame[name])
+        }
+        frame = pd.DataFrame({
+            name: encoded[name][0] if name in encoded else self.column(name) for name in [*keys, *values]
+        })
+        if mask is not None:
+            frame = frame.loc[np.asarray(mask, dtype=bool)]
+        if encoded:
+            frame = frame.loc[(frame[list(encoded)] >= 0).all(axis=1)]
+        result = frame.groupby(list(keys))[list(values)].sum().reset_index()
+        if not encoded:
+            return result
+        for name, (_, categories) in encoded.items():
+            result[name] = categories.take(result[name]).to_numpy()
+        return result.sort_values(list(keys), kind="stable", ignore_index=True)
+
+    _DERIVED = {
+        "dias": lambda ledger: to_epoch_days(ledger.column("data")),
+        "ano": lambda ledger: pd.DatetimeIndex(ledger.column("data")).year.to_numpy(),
+        "mes": lambda ledger: pd.DatetimeIndex(ledger.column("data")).month.to_numpy(),
+    }
+
+
+def as_ledger(data):
+    """
+    Aceita um DataFrame ou um PreparedLedger e devolve um PreparedLedger.
+    """
+    return data if isinstance(data, PreparedLedger) else PreparedLedger(data)
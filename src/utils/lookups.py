@@ -0,0 +1,84 @@
+import pandas as pd
+
+# Colunas de texto repetido guardadas em bank_transactions como inteiros (<coluna>_id)
+# que apontam para uma tabela de valores (lookup_<coluna>). Os ids nunca mudam nem são
+# reaproveitados, então servem de códigos estáveis para Categorical.
+ENCODED_COLUMNS = ("banco", "conta", "subconta", "file_path")
+
+# Visão com as transações no formato de sempre (textos no lugar dos ids), usada
+# pelas consultas que leem transações. Ela também traz os ids de banco, conta e
+# subconta, para que os filtros comparem inteiros (ver TransactionFilter em utils/db_utils.py)
+TRANSACTIONS_VIEW = "transactions"
+
+# Colunas das transações devolvidas às páginas, na ordem da tabela original
+TRANSACTION_COLUMNS = (
+    "id", "data", "descricao", "documento", "credito", "debito", "saldo",
+    "banco", "conta", "subconta", "file_path", "natural_key",
+)
+
+CREATE_TRANSACTIONS_VIEW = f"""
+    CREATE VIEW {TRANSACTIONS_VIEW} AS
+    SELECT t.id, t.data, t.descricao, t.documento, t.credito, t.debito, t.saldo,
+           b.valor AS banco, c.valor AS conta, s.valor AS subconta, f.valor AS file_path,
+           t.natural_key, t.banco_id, t.conta_id, t.subconta_id
+    FROM bank_transactions t
+    JOIN lookup_banco b ON b.id = t.banco_id
+    LEFT JOIN lookup_conta c ON c.id = t.conta_id
+    LEFT JOIN lookup_subconta s ON s.id = t.subconta_id
+    LEFT JOIN lookup_file_path f ON f.id = t.file_path_id
+"""
+
+
+def lookup_table(column):
+    """
+    Nome da tabela de valores de uma coluna codificada.
+    """
+    return f"lookup_{column}"
+
+
+def stored_column(column):
+    """
+    Nome da coluna em bank_transactions: <coluna>_id para as codificadas.
+    """
+    return f"{column}_id" if column in ENCODED_COLUMNS else column
+
+
+def create_lookup_tables(conn):
+    """
+    Cria as tabelas de valores (id pequeno e texto único) das colunas codificadas.
+    """
+    for column in ENCODED_COLUMNS:
+        conn.execute(
+            f"CREATE TABLE {lookup_table(column)} (id INTEGER PRIMARY KEY, valor TEXT NOT NULL UNIQUE)"
+        )
+
+
+def register_values(conn, source, columns=ENCODED_COLUMNS):
+    """
+    Acrescenta às tabelas de valores os textos de `source` (tabela ou visão com as
+    colunas em texto) que ainda não têm id. Não faz commit.
+    """
+    for column in columns:
+        conn.execute(
+            f"INSERT OR IGNORE INTO {lookup_table(column)} (valor)"
+            f" SELECT {column} FROM {source} WHERE {column} IS NOT NULL"
+            f" GROUP BY {column} ORDER BY MIN(rowid)"
+        )
+
+
+def read_lookup(conn, column):
+    """
+    Retorna a tabela de valores da coluna como Series valor indexada pelo id.
+    """
+    lookup = pd.read_sql(f"SELECT id, valor FROM {lookup_table(column)} ORDER BY id", conn)
+    return lookup.set_index("id")["valor"]
+
+
+def decode_categorical(ids, lookup):
+    """
+    Converte ids de uma coluna codificada em Categorical: as categorias são todos os
+    valores da tabela, em ordem de id, então o mesmo valor tem sempre o mesmo código.
+    Ids nulos viram NaN.
+    """
+    codes = lookup.index.get_indexer(pd.to_numeric(ids).fillna(-1).astype("int64"))
+    return pd.Categorical.from_codes(codes, categories=pd.Index(lookup.to_numpy(), dtype=object))
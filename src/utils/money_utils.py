@@ -0,0 +1,43 @@
+import pandas as pd
+
+
+def parse_brl_number(values):
+    """
+    Converte uma coluna com números em float, aceitando valores no formato
+    brasileiro ("1.234,56") misturados com valores já numéricos.
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float)
+    text = values.astype("string").str.strip()
+    is_brl = text.str.contains(",", regex=False, na=False)
+    text = text.mask(
+        is_brl,
+        text.str.replace(".", "", regex=False).str.replace(",", ".", regex=False),
+    )
+    return pd.to_numeric(text, errors="coerce").astype("float64")
+
+
+def to_centavos(values):
+    """
+    Converte valores em reais (numéricos ou texto brasileiro) para centavos inteiros.
+    Valores inválidos viram <NA>.
+    """
+    return (parse_brl_number(values) * 100).round().astype("Int64")
+
+
+def from_centavos(values):
+    """
+    Converte centavos inteiros para reais (float), mantendo nulos como NaN.
+    """
+    return values.astype("float64") / 100
+
+
+def format_centavos(centavos):
+    """
+    Formata um valor em centavos inteiros para exibição ("R$ 1,234.56"), sem passar
+    por float. Só as páginas formatam; somas e comparações usam os centavos.
+    """
+    centavos = int(centavos)
+    sign = "-" if centavos < 0 else ""
+    reais, resto = divmod(abs(centavos), 100)
+    return f"R$ {sign}{reais:,}.{resto:02d}"
@@ -0,0 +1,27 @@
+import streamlit as st
+
+# Chave de st.session_state com os resultados já calculados de cada painel
+PANEL_CACHE_KEY = "_panel_cache"
+
+
+def select_panel(labels, key):
+    """
+    Substitui st.tabs: mostra os rótulos como abas (rádio horizontal) e retorna o
+    rótulo escolhido. Diferente de st.tabs, só o painel escolhido precisa ser
+    calculado e desenhado em cada execução da página.
+    """
+    return st.radio("Painel", labels, horizontal=True, key=key, label_visibility="collapsed")
+
+
+def panel_data(name, key, compute, scope=None):
+    """
+    Retorna os resultados do painel `name`, calculados por `compute()` só quando ainda
+    não estão na sessão ou quando `key` (dados e filtros de que o painel depende) mudou.
+    Cada painel guarda apenas o último resultado, por sessão e por `scope` (a empresa):
+    voltar a uma empresa reaproveita o que já foi calculado para ela.
+    """
+    cache = st.session_state.setdefault(PANEL_CACHE_KEY, {}).setdefault(scope, {})
+    cached = cache.get(name)
+    if cached is None or cached[0] != key:
+        cached = cache[name] = (key, compute())
+    return cached[1]
@@ -0,0 +1,154 @@
+import json
+import os
+import re
+import shutil
+import time
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from pyarrow import fs
+from utils.db_loader import PROJECT_ROOT
+from utils.lookups import TRANSACTIONS_VIEW
+
+PARQUET_PATH = os.path.join(PROJECT_ROOT, "data", "parquet")
+
+# Cada exportação grava uma versão nova (v<n>/ dentro do snapshot) e só então troca o
+# manifesto, que aponta para a versão atual: a troca é um único os.replace, então quem
+# lê encontra sempre uma versão completa. A versão anterior fica para as leituras em andamento.
+MANIFEST_NAME = "_snapshot.json"
+VERSION_PATTERN = re.compile(r"v\d+")
+
+# Tipos gravados: datas como date32, valores em centavos (int64, ponto fixo com 2 casas)
+# e textos repetidos como dicionário, que voltam do Arrow como Categorical.
+# 'banco' e 'ano' viram diretórios de partição e não são gravados nos arquivos.
+SNAPSHOT_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("data", pa.date32()),
+    ("descricao", pa.string()),
+    ("documento", pa.string()),
+    ("credito", pa.int64()),
+    ("debito", pa.int64()),
+    ("saldo", pa.int64()),
+    ("banco", pa.string()),
+    ("conta", pa.dictionary(pa.int32(), pa.string())),
+    ("subconta", pa.dictionary(pa.int32(), pa.string())),
+    ("file_path", pa.dictionary(pa.int32(), pa.string())),
+    ("ano", pa.int32()),
+])
+
+MONEY_COLUMNS = ("credito", "debito", "saldo")
+
+# Colunas devolvidas por padrão: as mesmas da tabela do SQLite
+DEFAULT_COLUMNS = [name for name in SNAPSHOT_SCHEMA.names if name != "ano"]
+
+_PARTITIONING = ds.partitioning(
+    pa.schema([("banco", pa.string()), ("ano", pa.int32())]), flavor="hive"
+)
+
+
+def export_snapshot(conn, store_path=PARQUET_PATH, fingerprint=None):
+    """
+    Grava uma nova versão do snapshot Parquet a partir das transações (visão com os
+    textos), particionada por banco e ano (v<n>/banco=INTER/ano=2024/...), e passa o
+    manifesto para ela de uma vez. `fingerprint` (do banco de origem) fica registrado
+    no manifesto. Versões mais antigas que a anterior são apagadas.
+    """
+    table = pd.read_sql(
+        "SELECT id, data, descricao, documento, credito, debito, saldo, banco, conta, subconta, file_path "
+        f"FROM {TRANSACTIONS_VIEW} ORDER BY data, id",
+        conn,
+    )
+    table["data"] = pd.to_datetime(table["data"], unit="D")
+    table["ano"] = table["data"].dt.year.astype("int32")
+    table["saldo"] = table["saldo"].astype("Int64")
+    arrow_table = pa.Table.from_pandas(table, schema=SNAPSHOT_SCHEMA, preserve_index=False)
+
+    os.makedirs(store_path, exist_ok=True)
+    previous = _read_manifest(store_path)
+    version = f"v{time.time_ns()}"
+    ds.write_dataset(
+        arrow_table,
+        os.path.join(store_path, version),
+        format="parquet",
+        partitioning=_PARTITIONING,
+    )
+    staging_manifest = os.path.join(store_path, f"{MANIFEST_NAME}.tmp")
+    with open(staging_manifest, "w", encoding="utf-8") as manifest:
+        json.dump(
+            {"version": version, "fingerprint": list(fingerprint) if fingerprint else None, "rows": len(table)},
+            manifest,
+        )
+    os.replace(staging_manifest, os.path.join(store_path, MANIFEST_NAME))
+
+    # Fica só a versão nova e a anterior. Apenas diretórios de versão (v<n>) são apagados:
+    # o que mais estiver em store_path não foi gravado aqui e continua intocado.
+    keep = {version, (previous or {}).get("version")}
+    for name in os.listdir(store_path):
+        path = os.path.join(store_path, name)
+        if name not in keep and VERSION_PATTERN.fullmatch(name) and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+    return len(table)
+
+
+def _read_manifest(store_path):
+    """
+    Conteúdo do manifesto do snapshot, ou None se não houver snapshot.
+    """
+    manifest_path = os.path.join(store_path, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, encoding="utf-8") as manifest:
+        return json.load(manifest)
+
+
+def get_snapshot_version(store_path=PARQUET_PATH):
+    """
+    Retorna a versão atual do snapshot (muda a cada exportação), ou None se não houver snapshot.
+    """
+    manifest = _read_manifest(store_path)
+    return manifest.get("version", "") if manifest else None
+
+
+def _pandas_type(arrow_type):
+    """
+    Tipo pandas de cada coluna lida: dicionários viram Categorical e datas datetime64
+    (None: conversão padrão); textos e valores continuam nos buffers do Arrow (ArrowDtype).
+    """
+    if pa.types.is_dictionary(arrow_type) or pa.types.is_timestamp(arrow_type):
+        return None
+    return pd.ArrowDtype(arrow_type)
+
+
+def read_snapshot(store_path=PARQUET_PATH, columns=None, bancos=None, years=None):
+    """
+    Lê a versão atual do snapshot com memory map, abrindo apenas as partições dos
+    bancos/anos pedidos e apenas as colunas pedidas. Datas voltam como datetime64 e
+    textos de dicionário como Categorical. Descrição, documento e os valores (centavos
+    inteiros, com nulos) ficam como ArrowDtype sobre os próprios buffers lidos, sem cópia.
+    """
+    manifest = _read_manifest(store_path)
+    if manifest is None:
+        raise FileNotFoundError(f"Snapshot Parquet não encontrado em {store_path}")
+    dataset = ds.dataset(
+        os.path.join(store_path, manifest.get("version", "")),
+        format="parquet",
+        partitioning=_PARTITIONING,
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+        exclude_invalid_files=True,
+    )
+    expression = None
+    if bancos is not None:
+        expression = ds.field("banco").isin(list(bancos))
+    if years is not None:
+        year_filter = ds.field("ano").isin([int(year) for year in years])
+        expression = year_filter if expression is None else expression & year_filter
+
+    table = dataset.to_table(columns=list(columns or DEFAULT_COLUMNS), filter=expression)
+    if "data" in table.column_names:
+        index = table.column_names.index("data")
+        table = table.set_column(index, "data", table.column("data").cast(pa.timestamp("ns")))
+    if "banco" in table.column_names:
+        # A coluna de partição volta como texto simples; vira dicionário como as demais
+        index = table.column_names.index("banco")
+        table = table.set_column(index, "banco", table.column("banco").dictionary_encode())
+    return table.to_pandas(split_blocks=True, self_destruct=True, types_mapper=_pandas_type)
@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+from utils.ledger import PERIOD_CODES
+from utils.lookups import TRANSACTIONS_VIEW
+
+# Conciliação do saldo de cada banco: o saldo informado numa linha do extrato deve ser o
+# último saldo informado mais os créditos e menos os débitos desde então, na ordem (data, id).
+# As linhas que não fecham ficam em balance_breaks. Em balance_checkpoints fica, por banco,
+# o saldo no fim de cada mês já conferido: a próxima conciliação recomeça do último deles,
+# e a ingestão apaga os que ficam depois de um dia alterado (ver invalidate_checkpoints).
+
+# Tipos de quebra, na ordem em que são testados
+BREAK_TYPES = {
+    "saldo_anterior": 'Linha de "SALDO ANTERIOR" que sobrou do extrato',
+    "duplicada": "Linha repetida: o saldo não andou com o valor dela",
+    "lacuna": "Extrato faltando entre esta linha e a anterior",
+    "ordem": "Ordem diferente dentro do dia: o saldo do fim do dia confere",
+    "divergencia": "Saldo diferente do esperado",
+}
+
+# Mais dias que isso entre duas linhas seguidas indica um extrato faltando
+MAX_GAP_DAYS = 31
+
+# Colunas que, iguais às da linha anterior, indicam uma linha repetida
+DUPLICATE_COLUMNS = ["data", "descricao", "documento", "credito", "debito"]
+
+
+def check_running_balance(rows, opening=None):
+    """
+    Confere o saldo das linhas de um banco, em ordem de data e id, com uma soma acumulada
+    do movimento. `opening` é o saldo antes da primeira linha (o do último checkpoint); sem
+    ele, a conferência começa no primeiro saldo informado. Retorna as linhas com 'esperado'
+    (último saldo conhecido mais o movimento desde então), 'diferenca' (informado - esperado)
+    e 'tipo' da quebra (None nas linhas que conferem).
+    """
+    if rows.empty:
+        return rows.assign(esperado=np.nan, diferenca=np.nan, tipo=None)
+    flow = rows["credito"].to_numpy(dtype="int64") - rows["debito"].to_numpy(dtype="int64")
+    saldo = rows["saldo"].to_numpy(dtype="float64")
+    known = ~np.isnan(saldo)
+    cumulative = np.cumsum(flow)
+    positions = np.arange(len(rows))
+
+    # Linha anterior com saldo informado (-1: nenhuma, vale o saldo de abertura)
+    last_known = np.maximum.accumulate(np.where(known, positions, -1))
+    previous = np.concatenate(([-1], last_known[:-1]))
+    has_previous = previous >= 0
+    base = np.where(has_previous, saldo[previous], np.nan if opening is None else opening)
+    base_cumulative = np.where(has_previous, cumulative[previous], 0)
+    esperado = base + (cumulative - base_cumulative)
+    diferenca = saldo - esperado
+    broken = np.nan_to_num(diferenca) != 0
+
+    keys = pd.util.hash_pandas_object(rows[DUPLICATE_COLUMNS].astype("string"), index=False).to_numpy()
+    repeated = np.concatenate(([False], keys[1:] == keys[:-1]))
+    days = rows["data"].to_numpy(dtype="int64")
+    files = rows["file_path"].astype("string").fillna("").to_numpy()
+    gap = np.concatenate(([False], (np.diff(days) > MAX_GAP_DAYS) | (files[1:] != files[:-1])))
+    # Quebras que se anulam dentro do mesmo dia: só a ordem das linhas difere do extrato
+    day_total = pd.Series(np.where(broken, diferenca, 0)).groupby(days).transform("sum").to_numpy()
+
+    tipo = np.select(
+        [
+            rows["descricao"].str.contains("SALDO ANTERIOR", case=False, na=False).to_numpy(),
+            broken & repeated & (diferenca == -flow),
+            broken & gap,
+            broken & (day_total == 0),
+            broken,
+        ],
+        list(BREAK_TYPES),
+        default=None,
+    )
+    return rows.assign(esperado=esperado, diferenca=diferenca, tipo=tipo)
+
+
+def _checkpoints(checked):
+    """
+    Saldo no fim de cada mês das linhas conferidas, menos o último mês, que ainda pode
+    receber transações: o informado ou, sem ele, o esperado.
+    """
+    months = PERIOD_CODES["M"](checked["data"].to_numpy(dtype="int64"))
+    month_end = np.concatenate((months[1:] != months[:-1], [False]))
+    # Sem nenhum saldo informado, a coluna chega do SQLite como object
+    balance = checked["saldo"].astype("Int64").fillna(checked["esperado"])
+    ends = checked[month_end & balance.notna().to_numpy()]
+    return list(zip(ends["data"].astype(int), ends["id"].astype(int), balance[ends.index].astype("int64").tolist()))
+
+
+def reconcile_balances(conn, bancos=None):
+    """
+    Concilia o saldo de cada banco (ou só dos `bancos`) a partir do seu último checkpoint:
+    refaz as quebras das linhas seguintes e grava os checkpoints dos meses completos.
+    Não faz commit. Retorna quantas linhas foram conferidas e quantas quebras há nelas.
+    """
+    if bancos is None:
+        bancos = [banco for (banco,) in conn.execute("SELECT valor FROM lookup_banco ORDER BY id")]
+    summary = {"conferidas": 0, "quebras": 0}
+    for banco in bancos:
+        checkpoint = conn.execute(
+            "SELECT data, id, saldo FROM balance_checkpoints WHERE banco = ? ORDER BY data DESC, id DESC LIMIT 1",
+            (banco,),
+        ).fetchone()
+        if checkpoint is None:
+            after, since, params = "", "", (banco,)
+        else:
+            after, since, params = " AND (data, id) > (?, ?)", " AND (data, id) >= (?, ?)", (banco, *checkpoint[:2])
+        rows = pd.read_sql(
+            "SELECT id, data, descricao, documento, credito, debito, saldo, file_path"
+            f" FROM {TRANSACTIONS_VIEW} WHERE banco = ?{since} ORDER BY data, id",
+            conn,
+            params=params,
+        )
+        if checkpoint is None:
+            checked = check_running_balance(rows)
+        elif not rows.empty and rows["id"].iloc[0] == checkpoint[1]:
+            # A linha do checkpoint abre a conferência com o saldo dele e fica de fora do
+            # resultado: a primeira linha nova tem a anterior para os testes de linha
+            # repetida e de lacuna, como numa conciliação completa
+            checked = check_running_balance(rows.assign(saldo=rows["saldo"].mask(rows.index == 0, checkpoint[2])))
+            checked = checked.iloc[1:]
+        else:
+            checked = check_running_balance(rows, checkpoint[2])
+        breaks = checked[checked["tipo"].notna()]
+        conn.execute(f"DELETE FROM balance_breaks WHERE banco = ?{after}", params)
+        conn.executemany(
+            "INSERT INTO balance_breaks (id, banco, data, tipo, esperado, saldo, diferenca)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (int(row.id), banco, int(row.data), row.tipo,
+                 *(None if pd.isna(value) else int(value) for value in (row.esperado, row.saldo, row.diferenca)))
+                for row in breaks.itertuples(index=False)
+            ],
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO balance_checkpoints (banco, data, id, saldo) VALUES (?, ?, ?, ?)",
+            [(banco, *checkpoint) for checkpoint in _checkpoints(checked)],
+        )
+        summary["conferidas"] += len(checked)
+        summary["quebras"] += len(breaks)
+    return summary
+
+
+def invalidate_checkpoints(conn, source, params=()):
+    """
+    Apaga, de cada banco presente em `source` (tabela ou subconsulta com banco e data),
+    os checkpoints do primeiro dia de `source` em diante, para que a próxima conciliação
+    reconfira o banco desde antes da alteração. Não faz commit.
+    """
+    conn.execute(
+        "DELETE FROM balance_checkpoints WHERE data >="
+        f" (SELECT MIN(s.data) FROM {source} AS s WHERE s.banco = balance_checkpoints.banco)",
+        params,
+    )
+
+
+def read_balance_breaks(conn):
+    """
+    Retorna as quebras de conciliação com a descrição da transação, 'data' em dias desde
+    1970-01-01 e 'esperado', 'saldo' e 'diferenca' em centavos.
+    """
+    return pd.read_sql(
+        "SELECT b.id, b.banco, b.data, t.descricao, b.tipo, b.esperado, b.saldo, b.diferenca"
+        f" FROM balance_breaks b JOIN {TRANSACTIONS_VIEW} t USING (id)"
+        " ORDER BY b.banco, b.data, b.id",
+        conn,
+    )
@@ -0,0 +1,116 @@
+import pandas as pd
+
+# Expressões SQL que levam cada data (dias desde 1970-01-01) ao primeiro dia do
+# seu período. 1970-01-01 foi uma quinta-feira, então (data + 3) % 7 é 0 nas segundas.
+PERIOD_EXPRESSIONS = {
+    "day": "data",
+    "week": "data - (data + 3) % 7",
+    "month": "CAST(julianday(data * 86400, 'unixepoch', 'start of month') - 2440587.5 AS INTEGER)",
+    "year": "CAST(julianday(data * 86400, 'unixepoch', 'start of year') - 2440587.5 AS INTEGER)",
+}
+
+# Granularidades materializadas em transaction_rollups. Um período de `período`
+# pode ser somado a partir de qualquer granularidade listada para ele aqui.
+ROLLUP_SOURCES = {
+    "day": ("day",),
+    "week": ("week", "day"),
+    "month": ("month", "day"),
+    "year": ("year", "month", "day"),
+}
+
+# Nenhum período materializado passa de 366 dias
+_LONGEST_PERIOD = 366
+
+
+def _refresh_granularity(conn, granularity, touched):
+    """
+    Recalcula as linhas de uma granularidade. Com `touched`, apenas os períodos que
+    contêm algum dos dias da tabela temporária touched_days; sem ele, todos.
+    """
+    expression = PERIOD_EXPRESSIONS[granularity]
+    insert = (
+        "INSERT INTO transaction_rollups"
+        " (granularity, data, banco_id, conta_id, subconta_id, credito, debito, quantidade) "
+    )
+
+    def select(where=""):
+        # Banco, conta e subconta ficam como ids (ver utils/lookups.py), como nas transações
+        return (
+            f"SELECT ?, {expression} AS period, banco_id, conta_id, subconta_id,"
+            " SUM(credito), SUM(debito), COUNT(*)"
+            f" FROM bank_transactions{where} GROUP BY period, banco_id, conta_id, subconta_id"
+        )
+
+    if not touched:
+        conn.execute("DELETE FROM transaction_rollups WHERE granularity = ?", (granularity,))
+        conn.execute(insert + select(), (granularity,))
+        return
+
+    affected = f"SELECT DISTINCT {expression} FROM touched_days"
+    conn.execute(
+        f"DELETE FROM transaction_rollups WHERE granularity = ? AND data IN ({affected})",
+        (granularity,),
+    )
+    # O intervalo de datas usa o índice de 'data'; o IN descarta as sobras das pontas
+    conn.execute(
+        insert + select(
+            f" WHERE data >= (SELECT MIN({expression}) FROM touched_days)"
+            " AND data < (SELECT MAX(data) FROM touched_days) + ?"
+            f" AND {expression} IN ({affected})"
+        ),
+        (granularity, _LONGEST_PERIOD),
+    )
+
+
+def refresh_rollups(conn, days=None):
+    """
+    Atualiza os totais pré-agregados de transaction_rollups (crédito, débito e
+    quantidade por granularidade, período e ids de banco, conta e subconta).
+
+    Com `days` (dias desde 1970-01-01 que tiveram transações inseridas, alteradas
+    ou removidas), só os períodos que contêm esses dias são recalculados; sem ele,
+    a tabela inteira é refeita. Não faz commit: roda dentro da transação de quem chama.
+    """
+    touched = days is not None
+    if touched:
+        days = pd.Series(days, dtype="Int64").dropna().unique()
+        if len(days) == 0:
+            return
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS touched_days (data INTEGER PRIMARY KEY)")
+        conn.execute("DELETE FROM touched_days")
+        conn.executemany(
+            "INSERT OR IGNORE INTO touched_days (data) VALUES (?)", ((int(day),) for day in days)
+        )
+    for granularity in PERIOD_EXPRESSIONS:
+        _refresh_granularity(conn, granularity, touched)
+    if touched:
+        conn.execute("DELETE FROM touched_days")
+
+
+def is_period_start(day, granularity):
+    """
+    Indica se o dia (dias desde 1970-01-01) é o primeiro dia de um período da granularidade.
+    """
+    if granularity == "day":
+        return True
+    if granularity == "week":
+        return (day + 3) % 7 == 0
+    timestamp = pd.Timestamp("1970-01-01") + pd.Timedelta(days=day)
+    if granularity == "month":
+        return timestamp.day == 1
+    return timestamp.day == 1 and timestamp.month == 1
+
+
+def choose_rollup_granularity(period, start_day=None, end_day=None):
+    """
+    Escolhe a granularidade mais grossa de transaction_rollups que responde a uma
+    agregação por `period` (None = total) com datas inclusivas de `start_day` a `end_day`:
+    os limites precisam coincidir com os limites dos períodos materializados.
+    """
+    for granularity in ROLLUP_SOURCES[period or "year"]:
+        if start_day is not None and not is_period_start(start_day, granularity):
+            continue
+        if end_day is not None and not is_period_start(end_day + 1, granularity):
+            continue
+        return granularity
+    return None
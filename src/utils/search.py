@@ -0,0 +1,60 @@
+import re
+
+# Índice de texto (FTS5) sobre descricao e documento de bank_transactions. O conteúdo
+# fica só na tabela de transações (content=...); o índice guarda os termos, sem acentos
+# e sem diferença entre maiúsculas e minúsculas. Mantido pela ingestão (utils/db_loader.py).
+SEARCH_TABLE = "transactions_fts"
+
+CREATE_SEARCH_TABLE = f"""
+    CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(
+        descricao, documento,
+        content='bank_transactions', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+"""
+
+# Termos da busca: sequências de letras e dígitos, como no tokenizador unicode61
+_TERM = re.compile(r"\w+")
+
+
+def build_match_query(text):
+    """
+    Converte o texto digitado numa expressão MATCH do FTS5: cada termo vira um prefixo
+    ("pix receb" encontra "PIX RECEBIDO") e todos precisam aparecer. Retorna None
+    se o texto não tem nenhum termo.
+    """
+    terms = _TERM.findall(text or "")
+    if not terms:
+        return None
+    return " AND ".join(f'"{term}"*' for term in terms)
+
+
+def rebuild_search_index(conn):
+    """
+    Refaz o índice inteiro a partir de bank_transactions.
+    """
+    conn.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('rebuild')")
+
+
+def index_transactions(conn, after_id):
+    """
+    Indexa as transações com id maior que `after_id` (as recém-inseridas).
+    Não faz commit: roda dentro da transação de quem chama.
+    """
+    conn.execute(
+        f"INSERT INTO {SEARCH_TABLE} (rowid, descricao, documento)"
+        " SELECT id, descricao, documento FROM bank_transactions WHERE id > ?",
+        (after_id,),
+    )
+
+
+def unindex_transactions(conn, where, params=()):
+    """
+    Tira do índice as transações que atendem à cláusula `where`. Precisa rodar antes
+    de elas serem removidas de bank_transactions, enquanto o conteúdo ainda existe.
+    """
+    conn.execute(
+        f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, descricao, documento)"
+        f" SELECT 'delete', id, descricao, documento FROM bank_transactions WHERE {where}",
+        params,
+    )
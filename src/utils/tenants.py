@@ -0,0 +1,131 @@
+import json
+import os
+import re
+from dataclasses import dataclass
+from typing import Optional
+import streamlit as st
+from utils.db_utils import DB_PATH, PROJECT_ROOT, get_facet_values
+
+# Cada empresa atendida tem o próprio banco SQLite, com suas transações, totais
+# pré-agregados, facetas, índice de busca e previsões, em <TENANTS_DIR>/<slug>/.
+# A pasta tem um tenant.json com o nome da empresa e os dados do gestor, por exemplo:
+#   {"nome": "ECEEL - TEC", "gestor": "Mª Helena de Souza", "saudacao": "Mª Helena"}
+TENANTS_DIR = os.environ.get("BANK_TENANTS_DIR", os.path.join(PROJECT_ROOT, "data", "tenants"))
+
+# Nome do arquivo de banco dentro da pasta de cada empresa
+TENANT_DB_NAME = "bank_data.db"
+
+# Chave de st.session_state com o slug da empresa escolhida
+TENANT_KEY = "tenant"
+
+# Slugs válidos: letras minúsculas, números, '-' e '_'
+_SLUG = re.compile(r"^[a-z0-9][a-z0-9_-]*$")
+
+
+@dataclass(frozen=True)
+class Tenant:
+    """
+    Empresa atendida: identificador (slug, também o nome da pasta), nome exibido,
+    caminho do banco e dados do gestor para a página inicial.
+    """
+    slug: str
+    nome: str
+    db_path: str
+    gestor: Optional[str] = None
+    saudacao: Optional[str] = None
+    imagem: Optional[str] = None
+
+
+def default_tenant():
+    """
+    A empresa original, com o banco em BANK_DB_PATH (padrão: bank_data_csv.db na raiz
+    do projeto). Continua disponível ao lado das empresas de TENANTS_DIR.
+    """
+    return Tenant(
+        slug="eceel",
+        nome="ECEEL - TEC",
+        db_path=os.path.abspath(DB_PATH),
+        gestor="Mª Helena de Souza",
+        saudacao="Mª Helena",
+        imagem=os.path.join(PROJECT_ROOT, "src", "images", "Mask group.png"),
+    )
+
+
+def tenant_db_path(slug, tenants_dir=TENANTS_DIR):
+    """
+    Caminho do banco da empresa `slug` em `tenants_dir`.
+    """
+    if not _SLUG.match(slug):
+        raise ValueError(f"Identificador de empresa inválido: {slug}")
+    return os.path.join(os.path.abspath(tenants_dir), slug, TENANT_DB_NAME)
+
+
+def load_tenants(tenants_dir=TENANTS_DIR):
+    """
+    Retorna as empresas: a original (default_tenant) seguida das pastas de `tenants_dir`
+    que têm tenant.json, em ordem de slug. Uma pasta com o slug da original a substitui.
+    """
+    tenants = {}
+    default = default_tenant()
+    tenants[default.slug] = default
+    if os.path.isdir(tenants_dir):
+        for slug in sorted(os.listdir(tenants_dir)):
+            config_path = os.path.join(tenants_dir, slug, "tenant.json")
+            if not _SLUG.match(slug) or not os.path.isfile(config_path):
+                continue
+            with open(config_path, encoding="utf-8") as handle:
+                config = json.load(handle)
+            imagem = config.get("imagem")
+            tenants[slug] = Tenant(
+                slug=slug,
+                nome=config.get("nome", slug),
+                db_path=tenant_db_path(slug, tenants_dir),
+                gestor=config.get("gestor"),
+                saudacao=config.get("saudacao"),
+                imagem=os.path.join(tenants_dir, slug, imagem) if imagem else None,
+            )
+    return tuple(tenants.values())
+
+
+def get_tenant(slug, tenants_dir=TENANTS_DIR):
+    """
+    Retorna a empresa `slug`; ValueError se ela não existe.
+    """
+    for tenant in load_tenants(tenants_dir):
+        if tenant.slug == slug:
+            return tenant
+    raise ValueError(f"Empresa desconhecida: {slug}")
+
+
+def select_tenant():
+    """
+    Mostra na barra lateral a escolha da empresa (quando há mais de uma) e retorna a
+    escolhida. Cada empresa tem seus próprios caches, então trocar de empresa não
+    descarta os resultados já calculados das outras.
+    """
+    tenants = {tenant.slug: tenant for tenant in load_tenants()}
+    if st.session_state.get(TENANT_KEY) not in tenants:
+        st.session_state[TENANT_KEY] = next(iter(tenants))
+    if len(tenants) > 1:
+        st.sidebar.selectbox(
+            "Empresa", list(tenants), key=TENANT_KEY, format_func=lambda slug: tenants[slug].nome
+        )
+    return tenants[st.session_state[TENANT_KEY]]
+
+
+def current_tenant():
+    """
+    Retorna a empresa escolhida na sessão (a primeira, se nenhuma foi escolhida).
+    """
+    tenants = {tenant.slug: tenant for tenant in load_tenants()}
+    return tenants.get(st.session_state.get(TENANT_KEY), next(iter(tenants.values())))
+
+
+def stop_without_transactions(tenant):
+    """
+    Interrompe a página com um aviso quando o banco da empresa ainda não tem
+    transações (uma empresa recém-cadastrada): não há anos para os filtros.
+    """
+    if not get_facet_values("ano", db_path=tenant.db_path):
+        st.warning(f"Ainda não há transações carregadas para {tenant.nome}.")
+        st.stop()
@@ -1,9 +1,194 @@
+import functools
+import hashlib
+import json
+import logging
+import math
+import threading
+from collections import OrderedDict
+from datetime import date
 import altair as alt
+import pandas as pd
+import streamlit as st
 
+logger = logging.getLogger(__name__)
+
+# Os construtores recebem dados já agregados e mandam ao Vega-Lite só as colunas usadas,
+# já no formato longo: nada de transform_fold ou agregações no navegador.
+
+# Acima deste número de pontos por gráfico, períodos vizinhos são somados em faixas
+MAX_CHART_POINTS = 500
+
+# Tamanho (bytes) da especificação Vega-Lite do último gráfico gerado por cada construtor.
+# Medir exige serializar o gráfico de novo, então só é feito com RECORD_SPEC_SIZES
+# (ligado pelos benchmarks) ou com o log deste módulo em nível DEBUG.
+SPEC_SIZES = {}
+RECORD_SPEC_SIZES = False
+
+# Gráficos já montados, reaproveitados enquanto os dados e os parâmetros não mudam,
+# junto com a especificação serializada de cada um (ver chart_spec), gerada na primeira
+# exibição. As entradas menos usadas recentemente saem primeiro quando o limite é atingido.
+CHART_CACHE_SIZE = 128
+CHART_CACHE_STATS = {"hits": 0, "misses": 0}
+_chart_cache = OrderedDict()
+_chart_specs = {}  # id do gráfico em _chart_cache -> especificação (None até a primeira exibição)
+_chart_cache_lock = threading.Lock()
+
+
+def chart_spec(chart):
+    """
+    Retorna a especificação Vega-Lite do gráfico (chart.to_dict(), com os dados em
+    'datasets'). Para os gráficos do cache, a conversão (validação e serialização dos
+    dados) é feita uma vez e reaproveitada nas execuções seguintes.
+    """
+    with _chart_cache_lock:
+        spec = _chart_specs.get(id(chart))
+    if spec is not None:
+        return spec
+    # Os dados já chegam agregados; o limite de linhas do Altair não se aplica aqui
+    with alt.data_transformers.disable_max_rows():
+        spec = chart.to_dict()
+    with _chart_cache_lock:
+        if id(chart) in _chart_specs:
+            _chart_specs[id(chart)] = spec
+    return spec
+
+
+def render_chart(chart, use_container_width=False):
+    """
+    Substitui st.altair_chart: exibe o gráfico a partir da especificação já montada
+    (chart_spec), então um gráfico que não mudou não é convertido de novo a cada execução.
+    """
+    return st.vega_lite_chart(spec=chart_spec(chart), use_container_width=use_container_width)
+
+
+def spec_size(chart):
+    """
+    Retorna o tamanho, em bytes, da especificação Vega-Lite do gráfico em JSON, com os dados.
+    """
+    return len(json.dumps(chart_spec(chart), separators=(",", ":"), default=str))
+
+
+def _fingerprint(value):
+    """
+    Resumo barato de um argumento de construtor, usado na chave do cache de gráficos.
+    DataFrames são resumidos pelo hash das linhas (na ordem), colunas e tipos.
+    Retorna None quando o valor não tem resumo confiável.
+    """
+    if isinstance(value, pd.DataFrame):
+        try:
+            rows = pd.util.hash_pandas_object(value, index=True).to_numpy()
+        except TypeError:
+            return None
+        digest = hashlib.blake2b(rows.tobytes(), digest_size=16).hexdigest()
+        return ("DataFrame", tuple(value.columns), tuple(map(str, value.dtypes)), digest)
+    if value is None or isinstance(value, (str, int, float, bool, date, pd.Timestamp)):
+        return (type(value).__name__, value)
+    return None
+
+
+def _cache_key(name, args, kwargs):
+    """
+    Chave do cache de gráficos, ou None se algum argumento não tiver resumo.
+    """
+    positional = [_fingerprint(value) for value in args]
+    keywords = [(keyword, _fingerprint(value)) for keyword, value in sorted(kwargs.items())]
+    if None in positional or any(part is None for _, part in keywords):
+        return None
+    return (name, *positional, *keywords)
+
+
+def clear_chart_cache():
+    """
+    Esvazia o cache de gráficos e zera os contadores.
+    """
+    with _chart_cache_lock:
+        _chart_cache.clear()
+        _chart_specs.clear()
+        CHART_CACHE_STATS.update(hits=0, misses=0)
+
+
+def chart_cache_info():
+    """
+    Retorna acertos, falhas, tamanho atual e limite do cache de gráficos.
+    """
+    with _chart_cache_lock:
+        return {**CHART_CACHE_STATS, "size": len(_chart_cache), "max_size": CHART_CACHE_SIZE}
+
+
+def chart_builder(builder):
+    """
+    Memoiza o construtor pelo resumo dos dados agregados e dos parâmetros (LRU de
+    CHART_CACHE_SIZE entradas); exibidos com render_chart, os gráficos do cache também
+    não são serializados de novo. Na primeira montagem, com RECORD_SPEC_SIZES ou com o log
+    em nível DEBUG, registra em SPEC_SIZES (e no log) o tamanho da especificação. Os gráficos
+    devolvidos são compartilhados entre execuções e sessões, então não devem ser alterados
+    por quem chama.
+    """
+    @functools.wraps(builder)
+    def wrapper(*args, **kwargs):
+        key = _cache_key(builder.__name__, args, kwargs)
+        if key is not None:
+            with _chart_cache_lock:
+                if key in _chart_cache:
+                    _chart_cache.move_to_end(key)
+                    CHART_CACHE_STATS["hits"] += 1
+                    return _chart_cache[key]
+
+        chart = builder(*args, **kwargs)
+        with _chart_cache_lock:
+            CHART_CACHE_STATS["misses"] += 1
+            if key is not None:
+                _chart_cache[key] = chart
+                _chart_specs[id(chart)] = None
+                while len(_chart_cache) > CHART_CACHE_SIZE:
+                    _, evicted = _chart_cache.popitem(last=False)
+                    _chart_specs.pop(id(evicted), None)
+        if RECORD_SPEC_SIZES or logger.isEnabledFor(logging.DEBUG):
+            # Depois de entrar no cache: a especificação medida é a que será exibida
+            SPEC_SIZES[builder.__name__] = spec_size(chart)
+            logger.debug("%s: especificação com %d bytes", builder.__name__, SPEC_SIZES[builder.__name__])
+        return chart
+    return wrapper
+
+
+def to_long_format(data, id_columns, value_columns, var_name="Tipo", value_name="Valor"):
+    """
+    Passa as colunas de valor para o formato longo, levando só as colunas do gráfico.
+    """
+    id_columns = [id_columns] if isinstance(id_columns, str) else list(id_columns)
+    return data[id_columns + list(value_columns)].melt(
+        id_vars=id_columns, value_vars=list(value_columns), var_name=var_name, value_name=value_name
+    )
+
+
+def downsample(data, x, values, by=(), max_points=MAX_CHART_POINTS):
+    """
+    Limita o número de pontos do gráfico. Se os valores de `x` vezes as séries de `by`
+    passam de `max_points`, valores vizinhos de `x` (na ordem dos dados) são reunidos em
+    faixas: `values` são somados e as demais colunas ficam com o primeiro valor da faixa.
+    Abaixo do limite, devolve os dados como estão.
+    """
+    by = list(by)
+    x_values = pd.unique(data[x])
+    series = len(data[by].drop_duplicates()) if by else 1
+    if len(x_values) * series <= max_points:
+        return data
+    step = math.ceil(len(x_values) * series / max_points)
+    bucket = data[x].map(pd.Series(range(len(x_values)), index=x_values)) // step
+    others = [column for column in data.columns if column not in (x, *by, *values)]
+    aggregations = {**{column: "sum" for column in values}, **{column: "first" for column in [x, *others]}}
+    binned = data.groupby([bucket.rename("_faixa"), *by], sort=True).agg(aggregations).reset_index()
+    return binned[list(data.columns)]
+
+
+@chart_builder
 def create_salary_chart(salary_expenses):
     """
     Cria um gráfico de barras para gastos mensais com funcionários.
     """
+    salary_expenses = downsample(
+        salary_expenses[['Mês', 'Gastos com Funcionários']], 'Mês', ['Gastos com Funcionários']
+    )
     return alt.Chart(salary_expenses).mark_bar().encode(
         x=alt.X('Mês:O', title='Mês', sort=None),
         y=alt.Y('Gastos com Funcionários:Q', title='Gastos (R$)'),
@@ -14,10 +199,12 @@ def create_salary_chart(salary_expenses):
         
     )
 
+@chart_builder
 def create_profit_chart(monthly_profit):
     """
     Cria um gráfico de linha para lucro mensal.
     """
+    monthly_profit = downsample(monthly_profit[['Mês', 'Lucro']], 'Mês', ['Lucro'])
     return alt.Chart(monthly_profit).mark_line(point=True).encode(
         x=alt.X('Mês:O', title='Mês', sort=None),
         y=alt.Y('Lucro:Q', title='Lucro (R$)', scale=alt.Scale(domain=(monthly_profit['Lucro'].min(), monthly_profit['Lucro'].max()))),
@@ -29,11 +216,12 @@ def create_profit_chart(monthly_profit):
     )
 
 
+@chart_builder
 def create_bank_analysis_chart(bank_data):
     """
     Cria um gráfico de barras para entradas e saídas por banco.
     """
-    chart = alt.Chart(bank_data).mark_bar().encode(
+    chart = alt.Chart(bank_data[['banco', 'Tipo', 'Valor']]).mark_bar().encode(
         x=alt.X('banco:O', title='Banco'),
         y=alt.Y('Valor:Q', title='Valor (R$)'),
         color='Tipo:N',
@@ -45,8 +233,16 @@ def create_bank_analysis_chart(bank_data):
     )
     return chart
 
+@chart_builder
 def create_for_one_bank_chart(banco_analysis, banco_selecionado):
-    banco_analysis['Mês'] = banco_analysis['data'].dt.to_period('M').astype(str)  # Agrupar por mês
+    # Agrupar por mês antes de montar o gráfico
+    banco_analysis = (
+        banco_analysis.groupby([banco_analysis['data'].dt.to_period('M').rename('Mês'), 'Tipo'])['Valor']
+        .sum()
+        .reset_index()
+    )
+    banco_analysis['Mês'] = banco_analysis['Mês'].astype(str)
+    banco_analysis = downsample(banco_analysis, 'Mês', ['Valor'], by=['Tipo'])
     banco_chart = alt.Chart(banco_analysis).mark_bar().encode(
         x=alt.X('Mês:O', title='Mês', sort=None),
         y=alt.Y('Valor:Q', title='Valor (R$)'),
@@ -60,13 +256,14 @@ def create_for_one_bank_chart(banco_analysis, banco_selecionado):
     return banco_chart
 
 
+@chart_builder
 def create_credit_debit_chart(grouped):
     """
     Cria um gráfico de barras para entradas e saídas (Crédito e Débito) mensais lado a lado.
     """
+    grouped = downsample(grouped[["year_month", "credito", "debito"]], "year_month", ["credito", "debito"])
     chart = (
-        alt.Chart(grouped)
-        .transform_fold(["credito", "debito"], as_=["Tipo", "Valor"])
+        alt.Chart(to_long_format(grouped, "year_month", ["credito", "debito"]))
         .mark_bar()
         .encode(
             x=alt.X("year_month:O", title="Mês"),
@@ -88,13 +285,13 @@ def create_credit_debit_chart(grouped):
     return chart
 
 
+@chart_builder
 def create_account_chart(grouped_conta):
     """
     Cria um gráfico de barras para entradas e saídas por conta.
     """
     return (
-        alt.Chart(grouped_conta)
-        .transform_fold(["credito", "debito"], as_=["Tipo", "Valor"])
+        alt.Chart(to_long_format(grouped_conta, "conta", ["credito", "debito"]))
         .mark_bar()
         .encode(
             x=alt.X("conta:O", title="Conta"),
@@ -112,6 +309,7 @@ def create_account_chart(grouped_conta):
         )
     )
     
+@chart_builder
 def create_yearly_account_chart(grouped):
     """
     Cria um gráfico de barras para total de débito e crédito por ano e conta.
@@ -120,8 +318,7 @@ def create_yearly_account_chart(grouped):
         return alt.Chart().mark_text().encode(text="Sem dados disponíveis.")  # Exibe texto informativo
 
     chart = (
-        alt.Chart(grouped)
-        .transform_fold(["credito", "debito"], as_=["Tipo", "Valor"])
+        alt.Chart(to_long_format(grouped, ["year", "conta"], ["credito", "debito"]))
         .mark_bar()
         .encode(
             x=alt.X("year:O", title="Ano"),
@@ -144,6 +341,7 @@ def create_yearly_account_chart(grouped):
 
     return chart
 
+@chart_builder
 def create_yearly_subaccount_chart(grouped, conta):
     """
     Cria um gráfico de barras para total de débito e crédito por ano e subconta para uma conta específica.
@@ -155,8 +353,7 @@ def create_yearly_subaccount_chart(grouped, conta):
     sorted_grouped = grouped.sort_values(by=["year", "debito"], ascending=[True, False])
 
     chart = (
-        alt.Chart(sorted_grouped)
-        .transform_fold(["credito", "debito"], as_=["Tipo", "Valor"])
+        alt.Chart(to_long_format(sorted_grouped, ["year", "subconta"], ["credito", "debito"]))
         .mark_bar()
         .encode(
             x=alt.X("year:O", title="Ano"),
@@ -180,12 +377,13 @@ def create_yearly_subaccount_chart(grouped, conta):
     return chart
 
 
+@chart_builder
 def create_yearly_summary_chart(yearly_data, value_column, title="Resumo Anual"):
     """
     Cria um gráfico de barras ou linhas para resumir valores por ano.
     """
     chart = (
-        alt.Chart(yearly_data)
+        alt.Chart(yearly_data[["ano", value_column]])
         .mark_bar()
         .encode(
             x=alt.X("ano:O", title="Ano"),
@@ -205,10 +403,12 @@ def create_yearly_summary_chart(yearly_data, value_column, title="Resumo Anual")
     return chart
 
 
+@chart_builder
 def create_monthly_summary_chart(monthly_data, value_column, title="Resumo Mensal"):
     """
     Cria um gráfico de barras para resumir valores por ano e mês.
     """
+    monthly_data = downsample(monthly_data[["ano_mes", "ano", "mes", value_column]], "ano_mes", [value_column])
     chart = (
         alt.Chart(monthly_data)
         .mark_bar()
@@ -231,9 +431,7 @@ def create_monthly_summary_chart(monthly_data, value_column, title="Resumo Mensa
     return chart
 
 
-import altair as alt
-
-
+@chart_builder
 def create_monthly_line_chart(monthly_data, value_column, title="Resumo Mensal"):
     """
     Cria um gráfico de linha para resumir valores por ano e mês, cruzando por banco.
@@ -246,6 +444,10 @@ def create_monthly_line_chart(monthly_data, value_column, title="Resumo Mensal")
     Returns:
         alt.Chart: Gráfico Altair exibindo o resumo mensal cruzado por banco.
     """
+    monthly_data = downsample(
+        monthly_data[["ano_mes", "ano", "mes", "banco", value_column]], "ano_mes", [value_column], by=["banco"]
+    )
+
     # Criar o gráfico de linha cruzando os dados por banco
     chart = (
         alt.Chart(monthly_data)
@@ -271,13 +473,14 @@ def create_monthly_line_chart(monthly_data, value_column, title="Resumo Mensal")
     return chart
 
 
+@chart_builder
 def create_yearly_line_chart(yearly_data, value_column, title="Resumo Anual"):
     """
     Cria um gráfico de linha para resumir valores por ano, cruzando por banco.
     """
     # Criar o gráfico de linha cruzando os dados por banco
     chart = (
-        alt.Chart(yearly_data)
+        alt.Chart(yearly_data[["ano", "banco", value_column]])
         .mark_line(point=True)
         .encode(
             x=alt.X("ano:O", title="Ano"),
@@ -299,6 +502,7 @@ def create_yearly_line_chart(yearly_data, value_column, title="Resumo Anual"):
     return chart
 
 
+@chart_builder
 def comparar_semanal(weekly_data):
     """
     - Cria um gráfico de barras para comparação de crédito, débito e saldo semanal.
@@ -306,12 +510,7 @@ def comparar_semanal(weekly_data):
     - Retorna o gráfico de barras semanal com cores personalizadas.
     """
     # Reestruturar os dados para o formato longo (long format)
-    weekly_data = weekly_data.melt(
-        id_vars="Semana",
-        value_vars=["credito", "debito", "saldo"],
-        var_name="Categoria",
-        value_name="Valor",
-    )
+    weekly_data = to_long_format(weekly_data, "Semana", ["credito", "debito", "saldo"], var_name="Categoria")
 
     # Definir cores personalizadas
     cores = {
@@ -340,6 +539,7 @@ def comparar_semanal(weekly_data):
     return chart
 
 
+@chart_builder
 def comparar_mensal(monthly_data):
     """
     - Cria um gráfico de barras para comparação de crédito, débito e saldo mensal.
@@ -347,12 +547,7 @@ def comparar_mensal(monthly_data):
     - Retorna o gráfico de barras mensal com cores personalizadas.
     """
     # Reestruturar os dados para o formato longo (long format)
-    monthly_data = monthly_data.melt(
-        id_vars="Mês",
-        value_vars=["credito", "debito", "saldo"],
-        var_name="Categoria",
-        value_name="Valor",
-    )
+    monthly_data = to_long_format(monthly_data, "Mês", ["credito", "debito", "saldo"], var_name="Categoria")
 
     # Definir cores personalizadas
     cores = {
@@ -381,6 +576,7 @@ def comparar_mensal(monthly_data):
     return chart
 
 
+@chart_builder
 def comparar_anual(yearly_data):
     """
     - Cria um gráfico de barras para comparação de crédito, débito e saldo anual.
@@ -388,12 +584,7 @@ def comparar_anual(yearly_data):
     - Retorna o gráfico de barras anual com cores personalizadas.
     """
     # Reestruturar os dados para o formato longo (long format)
-    yearly_data = yearly_data.melt(
-        id_vars="Ano",
-        value_vars=["credito", "debito", "saldo"],
-        var_name="Categoria",
-        value_name="Valor",
-    )
+    yearly_data = to_long_format(yearly_data, "Ano", ["credito", "debito", "saldo"], var_name="Categoria")
 
     # Definir cores personalizadas
     cores = {
@@ -422,11 +613,12 @@ def comparar_anual(yearly_data):
     return chart
 
 
+@chart_builder
 def create_supplier_profit_chart(profitability):
     """
     Cria um gráfico de barras para mostrar a rentabilidade por fornecedor.
     """
-    chart = alt.Chart(profitability).mark_bar().encode(
+    chart = alt.Chart(profitability[['subconta', 'Receita', 'Despesa', 'Rentabilidade']]).mark_bar().encode(
         x=alt.X('subconta', sort='-y', title='Fornecedor'),
         y=alt.Y('Rentabilidade', title='Rentabilidade Líquida (R$)'),
         color=alt.Color('subconta', legend=None),
@@ -439,3 +631,25 @@ def create_supplier_profit_chart(profitability):
     return chart
 
 
+@chart_builder
+def create_forecast_chart(forecast_data, title="Previsão"):
+    """
+    Cria um gráfico de linha com o histórico mensal e a previsão de uma série,
+    com a faixa do intervalo de confiança da previsão.
+    """
+    x = alt.X('Mês:O', title='Mês', sort=None)
+    band = alt.Chart(forecast_data.dropna(subset=['Inferior'])[['Mês', 'Inferior', 'Superior']]).mark_area(
+        opacity=0.2, color='#28A745'
+    ).encode(
+        x=x,
+        y=alt.Y('Inferior:Q', title='Valor (R$)'),
+        y2='Superior:Q',
+    )
+    lines = alt.Chart(forecast_data[['Mês', 'Tipo', 'Valor']]).mark_line(point=True).encode(
+        x=x,
+        y=alt.Y('Valor:Q', title='Valor (R$)'),
+        color=alt.Color('Tipo:N', scale=alt.Scale(domain=['Histórico', 'Previsão'], range=['#007BFF', '#28A745'])),
+        strokeDash=alt.StrokeDash('Tipo:N', legend=None),
+        tooltip=[alt.Tooltip('Mês:O', title='Mês'), 'Tipo', alt.Tooltip('Valor:Q', title='Valor (R$)', format='.2f')],
+    )
+    return (band + lines).properties(width=800, height=400, title=title)
@@ -0,0 +1,129 @@
+import os
+import sqlite3
+import sys
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from utils.db_loader import STORED_COLUMNS, to_stored_format, upsert_source  # noqa: E402
+from utils.db_migrations import migrate  # noqa: E402
+
+
+def statement(*rows, banco="INTER", file_path="data/raw/inter.xlsx"):
+    """
+    Monta um extrato no formato gravado a partir de tuplas
+    (data, descricao, credito, debito, saldo[, conta, subconta, documento]), com valores em reais.
+    """
+    records = []
+    for row in rows:
+        data, descricao, credito, debito, saldo, *rest = row
+        conta, subconta, documento = (list(rest) + [None, None, None])[:3]
+        records.append({
+            "data": data, "descricao": descricao, "documento": documento,
+            "credito": credito, "debito": debito, "saldo": saldo,
+            "banco": banco, "conta": conta, "subconta": subconta, "file_path": file_path,
+        })
+    return to_stored_format(pd.DataFrame(records, columns=STORED_COLUMNS))
+
+
+def load(conn, frame, file_path=None, content_hash=None):
+    """
+    Carrega um extrato com upsert_source, usando o file_path das linhas como chave.
+    """
+    file_path = file_path or frame["file_path"].iloc[0]
+    content_hash = content_hash or str(pd.util.hash_pandas_object(frame.astype("string")).sum())
+    return upsert_source(conn, file_path, frame, content_hash)
+
+
+def write_workbook(path, rows):
+    """
+    Grava `rows` (tuplas de células) na primeira planilha de um .xlsx.
+    """
+    import openpyxl
+
+    workbook = openpyxl.Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    workbook.save(path)
+    return str(path)
+
+
+# Extrato do Inter no formato dos arquivos reais: título, cabeçalho e lançamentos
+INTER_ROWS = [
+    (None, None, None, None, None),
+    ("Extrato Conta Corrente", None, None, None, None),
+    ("DATA LANÇAMENTO", "HISTÓRICO", "VALOR", "SALDO", "CONTA"),
+    ("02/01/2024", "SALDO ANTERIOR", None, "1.000,00", None),
+    ("02/01/2024", "PIX RECEBIDO CLIENTE", "250,50", "1.250,50", "Receita com serviços"),
+    ("03/01/2024", "PAGAMENTO FATURA CARTAO", "-50,50", "1.200,00", None),
+    (None, None, None, None, None),
+    ("Saldo do dia", None, None, None, None),
+    ("05/01/2024", " PAG AGUA ", "-200", "1.000,00", " Despesas administrativas "),
+]
+
+
+@pytest.fixture
+def conn():
+    """
+    Banco em memória com o esquema na versão atual.
+    """
+    connection = sqlite3.connect(":memory:")
+    migrate(connection)
+    yield connection
+    connection.close()
+
+
+def fill_ledger(conn):
+    """
+    Carrega dois bancos com três meses de movimento e saldos que conferem.
+    """
+    load(conn, statement(
+        ("2024-01-02", "PIX RECEBIDO CLIENTE A", 1000.00, 0, 1000.00, "Receita com serviços", "Outras"),
+        ("2024-01-15", "PAG AGUA SANEPAR", 0, 80.50, 919.50, "Despesas administrativas", "Água"),
+        ("2024-02-01", "PAGAMENTO SALARIO FEV", 0, 500.00, 419.50, "Despesa com pessoal", "Salário"),
+        ("2024-02-20", "PIX RECEBIDO CLIENTE B", 250.25, 0, 669.75, "Receita com serviços", "Outras"),
+        ("2024-03-05", "TARIFA PACOTE", 0, 19.75, 650.00, "Despesas financeiras", "Despesas bancárias"),
+    ))
+    load(conn, statement(
+        ("2024-01-10", "CRED TED PANASONIC", 3000.00, 0, 3000.00, "Receita com serviços", "Panasonic"),
+        ("2024-02-10", "PAGAMENTO FATURA CARTAO", 0, 1200.00, 1800.00, "Outras Despesas", "Pgto fatura Cartão Credito"),
+        ("2024-03-10", "DARF IRRF", 0, 300.00, 1500.00, "Despesas tributárias", "Outras"),
+        banco="CAIXA", file_path="data/raw/caixa.xlsx",
+    ))
+
+
+@pytest.fixture
+def ledger(conn):
+    """
+    Banco em memória com o livro de fill_ledger.
+    """
+    fill_ledger(conn)
+    return conn
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """
+    Arquivo de banco com o livro de fill_ledger, para as leituras que abrem o banco
+    pelo caminho (pool de conexões e caches de utils/db_utils.py).
+    """
+    from utils.db_utils import clear_tenant_caches, connect
+
+    path = str(tmp_path / "bank.db")
+    connection = connect(path)
+    fill_ledger(connection)
+    connection.close()
+    clear_tenant_caches()
+    yield path
+    clear_tenant_caches()
+
+
+@pytest.fixture
+def transactions(db_path):
+    """
+    O livro de fill_ledger como sai de load_data_from_db (valores em centavos).
+    """
+    from utils.db_utils import load_data_from_db
+
+    return load_data_from_db(db_path)
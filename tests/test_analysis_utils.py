@@ -0,0 +1,87 @@
+import pandas as pd
+import pytest
+from utils.analysis_utils import (
+    aggregate_by_period, calcular_totais_ultimos_periodos, calculate_monthly_profit, calculate_salary_expenses,
+    comparar_calcular_total, format_period_labels,
+)
+
+
+def _expected_totals(data, freq, num_periods, anchor):
+    """
+    Referência em pandas: soma por início de período (to_period) nos períodos pedidos.
+    """
+    starts = data["data"].dt.to_period(freq).dt.start_time
+    last = pd.Timestamp(anchor).to_period(freq).start_time
+    periods = [(pd.Timestamp(last).to_period(freq) - offset).start_time for offset in range(num_periods)]
+    totals = data.groupby(starts)[["credito", "debito"]].sum()
+    return [
+        (period, totals["credito"].get(period, 0) / 100, totals["debito"].get(period, 0) / 100)
+        for period in periods
+    ]
+
+
+@pytest.mark.parametrize("freq", ["W", "M", "Y"])
+@pytest.mark.parametrize("num_periods, anchor", [(3, None), (1, "2024-02-15"), (6, "2024-03-31"), (2, "2025-01-01")])
+def test_last_periods_match_pandas(transactions, freq, num_periods, anchor):
+    totals = calcular_totais_ultimos_periodos(transactions, freq, num_periods, anchor)
+
+    expected = _expected_totals(transactions, freq, num_periods, anchor or transactions["data"].max())
+    assert list(zip(totals["periodo"], totals["credito"], totals["debito"])) == expected
+    assert (totals["saldo"] == totals["credito"] - totals["debito"]).all()
+
+
+def test_comparar_calcular_total_labels_each_frequency(transactions):
+    semanas, meses, anos = comparar_calcular_total(transactions, num_periods=2)
+
+    assert semanas["Semana"].tolist() == [pd.Timestamp("2024-03-04"), pd.Timestamp("2024-02-26")]
+    assert meses["Mês"].tolist() == [pd.Timestamp("2024-03-01"), pd.Timestamp("2024-02-01")]
+    assert meses["debito"].tolist() == [319.75, 1700.0]
+    assert anos["Ano"].tolist() == [2024, 2023]
+    assert anos["credito"].tolist() == [4250.25, 0.0]
+
+
+def test_last_periods_of_an_empty_frame(transactions):
+    totals = calcular_totais_ultimos_periodos(transactions.iloc[:0], "M")
+
+    assert totals.empty and list(totals.columns) == ["periodo", "credito", "debito", "saldo"]
+
+
+
+LABEL_FORMATS = {"W": "%Y-%m-%d", "M": "%Y-%m", "Y": "%Y"}
+
+
+@pytest.mark.parametrize("freq", ["W", "M", "Y"])
+def test_aggregate_by_period_matches_groupby(transactions, freq):
+    totals = aggregate_by_period(transactions, freq)
+
+    periods = transactions["data"].dt.to_period(freq)
+    expected = transactions.groupby(periods).agg(
+        credito=("credito", "sum"), debito=("debito", "sum"), quantidade=("id", "size")
+    )
+    assert totals["credito"].tolist() == expected["credito"].tolist()
+    assert totals["debito"].tolist() == expected["debito"].tolist()
+    assert totals["quantidade"].tolist() == expected["quantidade"].tolist()
+    assert (totals["lucro"] == totals["credito"] - totals["debito"]).all()
+    assert list(format_period_labels(totals["codigo"], freq)) == [
+        period.start_time.strftime(LABEL_FORMATS[freq]) for period in expected.index
+    ]
+
+
+def test_aggregate_by_period_with_mask_and_gaps(transactions):
+    mask = (transactions["banco"] == "CAIXA") & (transactions["data"].dt.month != 2)
+
+    totals = aggregate_by_period(transactions, "M", mask=mask.to_numpy())
+
+    assert list(format_period_labels(totals["codigo"], "M")) == ["2024-01", "2024-03"]
+    assert totals["credito"].tolist() == [300000, 0]
+    assert totals["debito"].tolist() == [0, 30000]
+    assert aggregate_by_period(transactions, "M", mask=[False] * len(transactions)).empty
+
+
+def test_monthly_profit_and_salary_are_labelled_in_reais(transactions):
+    profit = calculate_monthly_profit(transactions)
+    salary = calculate_salary_expenses(transactions)
+
+    assert profit["Mês"].tolist() == ["2024-01", "2024-02", "2024-03"]
+    assert profit["Lucro"].tolist() == [3919.5, -1449.75, -319.75]
+    assert salary.to_dict("list") == {"Mês": ["2024-02"], "Gastos com Funcionários": [500.0]}
@@ -0,0 +1,83 @@
+import pandas as pd
+from utils.classifier import DESCRIPTION_RULES, MIN_CONFIDENCE, Rule, classify_transactions, normalize_description
+
+RULES = (
+    Rule("PANASONIC", "Receita com serviços", "Panasonic", 0.9, "credito"),
+    Rule("SALARIO", "Despesa com pessoal", "Salário", 0.9, "debito"),
+    Rule("PIX", "Receita com serviços", "Outras", 0.75, "credito"),
+    Rule("PIX ENVIADO", "Despesa com pessoal", "Salário", 0.4, "debito"),
+    Rule("PAG", "Despesas administrativas", "Outras", 0.6),
+)
+
+NO_DECISIONS = pd.DataFrame(columns=["chave", "tipo", "conta", "subconta", "confianca"])
+
+
+def _rows(*rows):
+    return pd.DataFrame(
+        [(descricao, credito, conta, None) for descricao, credito, conta in rows],
+        columns=["descricao", "credito", "conta", "subconta"],
+    )
+
+
+def test_normalize_description():
+    values = pd.Series(["Pag. Luz/Gás 0312", None, "  pix   recebido "])
+
+    assert normalize_description(values).tolist() == ["PAG LUZ/GAS", "", "PIX RECEBIDO"]
+
+
+def test_earlier_rule_wins_wherever_it_appears():
+    result = classify_transactions(_rows(("PIX RECEBIDO PANASONIC", 10, None)), NO_DECISIONS, RULES)
+
+    assert result[["conta", "subconta", "classificacao"]].iloc[0].tolist() == [
+        "Receita com serviços", "Panasonic", "regra",
+    ]
+    assert result["confianca"].iloc[0] == 0.9
+
+
+def test_rules_are_restricted_to_their_movement_type():
+    result = classify_transactions(
+        _rows(("PIX RECEBIDO", 10, None), ("PAGAMENTO SALARIO", 0, None), ("PAG BOLETO", 10, None)),
+        NO_DECISIONS, RULES,
+    )
+
+    assert result["subconta"].tolist() == ["Outras", "Salário", "Outras"]
+    assert result["conta"].tolist() == ["Receita com serviços", "Despesa com pessoal", "Despesas administrativas"]
+
+
+def test_manual_rows_are_kept():
+    result = classify_transactions(_rows(("PIX RECEBIDO", 10, "Receitas financeiras")), NO_DECISIONS, RULES)
+
+    assert result[["conta", "classificacao", "confianca"]].iloc[0].tolist() == ["Receitas financeiras", "manual", 1.0]
+
+
+def test_past_decisions_come_before_rules():
+    decisions = pd.DataFrame({
+        "chave": ["PIX RECEBIDO"], "tipo": ["credito"], "conta": ["Receitas financeiras"],
+        "subconta": ["Rendimentos"], "confianca": [0.8],
+    })
+
+    result = classify_transactions(_rows(("Pix recebido", 10, None)), decisions, RULES)
+
+    assert result[["conta", "subconta", "classificacao"]].iloc[0].tolist() == [
+        "Receitas financeiras", "Rendimentos", "historico",
+    ]
+
+
+def test_low_confidence_rules_and_decisions_are_not_applied():
+    decisions = pd.DataFrame({
+        "chave": ["TRANSFERENCIA"], "tipo": ["debito"], "conta": ["Outras Despesas"],
+        "subconta": [None], "confianca": [MIN_CONFIDENCE / 2],
+    })
+
+    result = classify_transactions(
+        _rows(("PIX ENVIADO FULANO", 0, None), ("TRANSFERENCIA", 0, None), ("PIX ENVIADO PAG", 0, None)),
+        decisions, RULES,
+    )
+
+    # Sem a regra fraca de PIX ENVIADO, vale a próxima que casa ("PAG") ou nenhuma
+    assert result["conta"].tolist() == [None, None, "Despesas administrativas"]
+    assert result["classificacao"].tolist() == [None, None, "regra"]
+
+
+def test_description_rules_are_above_the_minimum_confidence():
+    assert all(rule.confianca >= MIN_CONFIDENCE for rule in DESCRIPTION_RULES)
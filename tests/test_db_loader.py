@@ -0,0 +1,65 @@
+from tests.conftest import load, statement
+
+JANUARY = (
+    ("2024-01-02", "PIX RECEBIDO CLIENTE", 100.00, 0, 100.00, "Receita com serviços", "Outras"),
+    ("2024-01-02", "PIX RECEBIDO CLIENTE", 100.00, 0, 200.00, "Receita com serviços", "Outras"),
+    ("2024-01-05", "PAG AGUA", 0, 30.00, 170.00, "Despesas administrativas", "Água"),
+)
+
+
+def _transactions(conn):
+    return conn.execute(
+        "SELECT id, data, descricao, credito, debito, saldo, conta, file_path FROM transactions ORDER BY id"
+    ).fetchall()
+
+
+def test_identical_rows_on_the_same_day_are_distinct(conn):
+    result = load(conn, statement(*JANUARY))
+
+    assert result["inserted"] == 3
+    assert conn.execute("SELECT COUNT(DISTINCT natural_key) FROM bank_transactions").fetchone() == (3,)
+
+
+def test_unchanged_source_is_skipped(conn):
+    load(conn, statement(*JANUARY), content_hash="v1")
+
+    assert load(conn, statement(*JANUARY), content_hash="v1")["skipped"]
+
+
+def test_reload_updates_in_place_and_keeps_ids(conn):
+    load(conn, statement(*JANUARY), content_hash="v1")
+    before = _transactions(conn)
+
+    changed = list(JANUARY)
+    changed[2] = ("2024-01-05", "PAG AGUA", 0, 30.00, 171.00, "Despesas administrativas", "Água")
+    result = load(conn, statement(*changed), content_hash="v2")
+
+    after = _transactions(conn)
+    assert (result["inserted"], result["updated"], result["deleted"]) == (0, 1, 0)
+    assert [row[0] for row in after] == [row[0] for row in before]
+    assert after[2][5] == 17100
+
+
+def test_rows_removed_from_the_source_are_deleted(conn):
+    load(conn, statement(*JANUARY), content_hash="v1")
+    load(conn, statement(("2024-02-01", "PIX RECEBIDO", 50.00, 0, 50.00), file_path="data/raw/outro.xlsx"))
+
+    result = load(conn, statement(*JANUARY[:2]), content_hash="v2")
+
+    assert result["deleted"] == 1
+    assert [row[2] for row in _transactions(conn)] == ["PIX RECEBIDO CLIENTE", "PIX RECEBIDO CLIENTE", "PIX RECEBIDO"]
+    # O índice de busca e os totais acompanham a remoção
+    assert conn.execute("SELECT COUNT(*) FROM transactions_fts WHERE transactions_fts MATCH 'AGUA'").fetchone() == (0,)
+    assert conn.execute(
+        "SELECT SUM(debito) FROM transaction_rollups WHERE granularity = 'month'"
+    ).fetchone() == (0,)
+
+
+def test_same_transaction_from_another_source_is_not_duplicated(conn):
+    load(conn, statement(*JANUARY), content_hash="v1")
+
+    result = load(conn, statement(*JANUARY, file_path="data/raw/inter-copia.xlsx"))
+
+    assert result["inserted"] == 0
+    assert conn.execute("SELECT COUNT(*) FROM bank_transactions").fetchone() == (3,)
+    assert {row[7] for row in _transactions(conn)} == {"data/raw/inter-copia.xlsx"}
@@ -0,0 +1,50 @@
+import sqlite3
+from utils.db_migrations import MIGRATIONS, SCHEMA_VERSION, get_schema_version, migrate
+
+
+def _tables(conn):
+    return {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+
+
+def test_new_database_reaches_current_version(conn):
+    assert get_schema_version(conn) == SCHEMA_VERSION == len(MIGRATIONS)
+    assert {"bank_transactions", "transactions", "transaction_rollups", "transaction_facets",
+            "balance_breaks", "balance_checkpoints", "classification_decisions"} <= _tables(conn)
+
+
+def test_migrate_is_idempotent(conn):
+    assert migrate(conn) == SCHEMA_VERSION
+
+
+def test_original_table_is_converted():
+    conn = sqlite3.connect(":memory:")
+    MIGRATIONS[0](conn)
+    conn.executemany(
+        "INSERT INTO bank_transactions (data, descricao, documento, credito, debito, saldo, banco, conta, subconta, file_path)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            ("2024-01-02", "PIX RECEBIDO", "123.0", 10.5, 0, 10.5, "INTER", "Receita com serviços", "Outras",
+             "../data/raw/inter.xlsx"),
+            ("2024-01-03", "DARF", None, 0, 2.25, 8.25, "INTER", "Despesas tributárias ", "Outras",
+             "../data/raw/inter.xlsx"),
+        ],
+    )
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+
+    assert migrate(conn) == SCHEMA_VERSION
+    rows = conn.execute(
+        "SELECT data, documento, credito, debito, saldo, conta, file_path FROM transactions ORDER BY id"
+    ).fetchall()
+    assert rows == [
+        (19724, "123", 1050, 0, 1050, "Receita com serviços", "data/raw/inter.xlsx"),
+        (19725, None, 0, 225, 825, "Despesas tributárias", "data/raw/inter.xlsx"),
+    ]
+    # Totais, facetas e decisões manuais saem das linhas já migradas
+    assert conn.execute(
+        "SELECT SUM(credito), SUM(debito), SUM(quantidade) FROM transaction_rollups WHERE granularity = 'year'"
+    ).fetchone() == (1050, 225, 2)
+    assert conn.execute(
+        "SELECT valor FROM transaction_facets WHERE facet = 'conta' ORDER BY valor"
+    ).fetchall() == [("Despesas tributárias",), ("Receita com serviços",)]
+    assert conn.execute("SELECT COUNT(*) FROM classification_decisions").fetchone() == (2,)
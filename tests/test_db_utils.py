@@ -0,0 +1,234 @@
+from datetime import date
+import pandas as pd
+import pytest
+from tests.conftest import load, statement
+from utils.db_utils import (
+    TransactionFilter, aggregate_transactions, build_aggregate_query, build_page_query, build_search_query,
+    connect, load_data_from_db, query_transactions,
+)
+
+
+def test_load_data_from_db_types_the_ledger(db_path):
+    data = load_data_from_db(db_path)
+
+    assert len(data) == 8
+    assert pd.api.types.is_datetime64_any_dtype(data["data"])
+    assert str(data["credito"].dtype) == "Int64"
+    assert data["credito"].sum() == 425025
+    assert isinstance(data["banco"].dtype, pd.CategoricalDtype)
+
+
+def test_load_data_from_db_returns_copies(db_path):
+    data = load_data_from_db(db_path)
+    data.loc[:, "credito"] = 0
+
+    assert load_data_from_db(db_path)["credito"].sum() == 425025
+
+
+def test_load_data_from_db_filters(db_path):
+    data = load_data_from_db(db_path, columns=["data", "banco", "credito"], bancos=["CAIXA"], years=[2024])
+
+    assert list(data.columns) == ["data", "banco", "credito"]
+    assert data["banco"].astype(str).unique().tolist() == ["CAIXA"]
+    assert len(data) == 3
+
+
+def test_cached_ledger_follows_new_transactions(db_path):
+    assert len(load_data_from_db(db_path)) == 8
+
+    conn = connect(db_path)
+    load(conn, statement(("2024-04-01", "PIX RECEBIDO", 10.00, 0, None), file_path="data/raw/novo.xlsx"))
+    conn.close()
+
+    assert len(load_data_from_db(db_path)) == 9
+
+
+@pytest.mark.parametrize("filters", [
+    None,
+    TransactionFilter(banco="INTER"),
+    TransactionFilter(conta=("Receita com serviços", "Despesa com pessoal")),
+    TransactionFilter(start_date=date(2024, 1, 1), end_date=date(2024, 2, 29), banco=("INTER", "CAIXA")),
+    TransactionFilter(start_date=date(2024, 1, 10), end_date=date(2024, 2, 15)),
+    TransactionFilter(banco="NAO EXISTE"),
+])
+@pytest.mark.parametrize("period", [None, "week", "month", "year"])
+def test_aggregates_in_sqlite_match_pandas(ledger, filters, period):
+    sql, params = build_aggregate_query(filters, period, ("banco", "conta"))
+    aggregated = pd.read_sql(sql, ledger, params=params)
+
+    rows = pd.read_sql("SELECT data, banco, conta, credito, debito FROM transactions", ledger)
+    if filters is not None:
+        if filters.banco is not None:
+            rows = rows[rows["banco"].isin([filters.banco] if isinstance(filters.banco, str) else filters.banco)]
+        if filters.conta is not None:
+            rows = rows[rows["conta"].isin(filters.conta)]
+        if filters.start_date is not None:
+            rows = rows[rows["data"] >= (pd.Timestamp(filters.start_date) - pd.Timestamp("1970-01-01")).days]
+        if filters.end_date is not None:
+            rows = rows[rows["data"] <= (pd.Timestamp(filters.end_date) - pd.Timestamp("1970-01-01")).days]
+    dates = pd.to_datetime(rows["data"], unit="D")
+    starts = {
+        "week": dates.dt.to_period("W").dt.start_time,
+        "month": dates.dt.to_period("M").dt.start_time,
+        "year": dates.dt.to_period("Y").dt.start_time,
+    }
+    keys = ["banco", "conta"]
+    if period:
+        rows = rows.assign(data=(starts[period] - pd.Timestamp("1970-01-01")).dt.days)
+        keys = ["data"] + keys
+    expected = rows.groupby(keys, as_index=False)[["credito", "debito"]].sum()
+
+    got = aggregated[keys + ["credito", "debito"]].sort_values(keys).reset_index(drop=True)
+    expected = expected.sort_values(keys).reset_index(drop=True)
+    pd.testing.assert_frame_equal(got, expected, check_dtype=False)
+
+
+def test_aggregate_transactions_returns_typed_totals(db_path):
+    totals = aggregate_transactions(TransactionFilter(banco="INTER"), "month", ("conta",), db_path=db_path)
+
+    assert pd.api.types.is_datetime64_any_dtype(totals["data"])
+    assert totals["credito"].dtype == "int64"
+    assert totals.groupby("data")["debito"].sum().tolist() == [8050, 50000, 1975]
+
+
+def test_query_transactions_filters_in_sqlite(db_path):
+    filters = TransactionFilter(start_date=date(2024, 2, 1), conta=("Receita com serviços",))
+
+    rows = query_transactions(filters, db_path=db_path)
+
+    assert rows["descricao"].tolist() == ["PIX RECEBIDO CLIENTE B"]
+    assert rows["credito"].tolist() == [25025]
+
+
+def _page(conn, filters=None, cursor=None, direction="next", descending=False, limit=4):
+    sql, params = build_page_query(filters, cursor, direction, descending, limit)
+    rows = conn.execute(sql, params).fetchall()
+    return rows[::-1] if direction == "previous" else rows
+
+
+def _walk(conn, descending=False):
+    pages, cursor = [], None
+    while True:
+        page = _page(conn, cursor=cursor, descending=descending)
+        if not page:
+            return pages
+        pages.append([row[0] for row in page])
+        cursor = (page[-1][1], page[-1][0])
+
+
+@pytest.fixture
+def paged(conn):
+    # Dez linhas, várias no mesmo dia: a ordem depende do id para desempatar
+    days = ["2024-01-01"] * 3 + ["2024-01-02"] * 4 + ["2024-01-03"] * 3
+    load(conn, statement(*((day, f"LINHA {n}", n + 1, 0, None) for n, day in enumerate(days))))
+    return conn
+
+
+def test_keyset_pages_cover_every_row_once(paged):
+    pages = _walk(paged)
+
+    assert [len(page) for page in pages] == [4, 4, 2]
+    assert sum(pages, []) == list(range(1, 11))
+
+
+def test_descending_pages_are_the_reverse(paged):
+    assert sum(_walk(paged, descending=True), []) == list(range(10, 0, -1))
+
+
+def test_previous_page_mirrors_next(paged):
+    first = _page(paged)
+    second = _page(paged, cursor=(first[-1][1], first[-1][0]))
+
+    back = _page(paged, cursor=(second[0][1], second[0][0]), direction="previous")
+
+    assert back == first
+    # Sem cursor, "previous" traz a última página
+    assert [row[0] for row in _page(paged, direction="previous")] == [7, 8, 9, 10]
+
+
+def test_pages_respect_filters(ledger):
+    filters = TransactionFilter(banco="CAIXA")
+
+    assert [row[7] for row in _page(ledger, filters, limit=10)] == ["CAIXA"] * 3
+
+
+def test_search_ranks_closer_matches_first(conn):
+    load(conn, statement(
+        ("2024-01-01", "PAGAMENTO BOLETO ENERGIA", 0, 10, None),
+        ("2024-01-02", "PIX ENVIADO", 0, 20, None),
+        ("2024-01-03", "ENERGIA ENERGIA COPEL", 0, 30, None),
+        ("2024-01-04", "PIX RECEBIDO ENERGIA SOLAR", 40, 0, None),
+    ))
+
+    sql, params = build_search_query(TransactionFilter(descricao="energia"))
+    found = [row[2] for row in conn.execute(sql, params)]
+
+    assert found[0] == "ENERGIA ENERGIA COPEL"
+    assert set(found) == {"PAGAMENTO BOLETO ENERGIA", "ENERGIA ENERGIA COPEL", "PIX RECEBIDO ENERGIA SOLAR"}
+
+
+def test_search_matches_prefixes_and_other_filters(conn):
+    load(conn, statement(
+        ("2024-01-01", "PIX RECEBIDO CLIENTE", 10, 0, None),
+        ("2024-03-01", "PIX RECEBIDO OUTRO", 20, 0, None),
+        ("2024-03-02", "PIX ENVIADO", 0, 5, None),
+    ))
+
+    filters = TransactionFilter(descricao="pix receb", start_date=date(2024, 2, 1))
+    sql, params = build_search_query(filters)
+
+    assert [row[2] for row in conn.execute(sql, params)] == ["PIX RECEBIDO OUTRO"]
+
+
+def test_search_index_follows_reloads(conn):
+    load(conn, statement(("2024-01-01", "PAG AGUA SANEPAR", 0, 10, None)))
+    load(conn, statement(("2024-01-01", "PAG LUZ COPEL", 0, 10, None)))
+
+    def search(term):
+        sql, params = build_search_query(TransactionFilter(descricao=term))
+        return [row[2] for row in conn.execute(sql, params)]
+
+    assert search("sanepar") == []
+    assert search("copel") == ["PAG LUZ COPEL"]
+
+
+def test_facet_values_skip_nulls_and_merge_subaccounts(db_path):
+    from utils.db_utils import get_facet_values
+
+    connection = connect(db_path)
+    load(connection, statement(("2025-01-05", "SEM CLASSIFICACAO", 0, 1, None), file_path="data/raw/novo.xlsx"))
+    connection.close()
+
+    assert get_facet_values("ano", db_path=db_path) == [2024, 2025]
+    assert get_facet_values("banco", db_path=db_path) == ["CAIXA", "INTER"]
+    assert None not in get_facet_values("conta", db_path=db_path)
+    subaccounts = get_facet_values("subconta", counts=True, db_path=db_path)
+    assert subaccounts["valor"].is_unique and subaccounts.set_index("valor").loc["Outras", "quantidade"] == 3
+    assert get_facet_values("subconta", conta="Receita com serviços", db_path=db_path) == ["Outras", "Panasonic"]
+
+
+def test_connect_migrates_each_file_once(tmp_path, monkeypatch):
+    from utils import db_utils
+
+    migrated = []
+    monkeypatch.setattr(db_utils, "migrate", lambda conn: migrated.append(conn))
+    monkeypatch.chdir(tmp_path)
+
+    connect("novo.db").close()
+    connect(str(tmp_path / "novo.db")).close()
+
+    assert len(migrated) == 1
+
+
+def test_fingerprint_changes_on_every_write(db_path):
+    from utils.db_utils import get_db_fingerprint
+
+    connection = connect(db_path)
+    before = get_db_fingerprint(db_path)
+    # Remover uma linha não muda o maior id: só o estado dos arquivos denuncia a escrita
+    with connection:
+        connection.execute("DELETE FROM bank_transactions WHERE id = 1")
+    after = get_db_fingerprint(db_path)
+    connection.close()
+
+    assert after != before and after[-1] == before[-1]
@@ -0,0 +1,83 @@
+import numpy as np
+from forecast.engine import refresh_forecasts
+from forecast.models import FORECAST_MONTHS, candidate_orders, fit_series
+from forecast.series import build_series, read_monthly_totals, series_signature
+from forecast.store import read_forecasts, stale_series
+from tests.conftest import load, statement
+from utils.db_utils import connect
+
+JAN_2024 = (2024 - 1970) * 12
+
+
+def test_series_end_at_their_own_last_month(ledger):
+    series = build_series(read_monthly_totals(ledger))
+
+    assert series[("total", "", "", "credito")][0] == JAN_2024
+    assert series[("total", "", "", "credito")][1].tolist() == [400000, 25025, 0]
+    # Banco sem movimento em fevereiro e março fica com zeros nesses meses
+    assert series[("banco", "", "CAIXA", "credito")][1].tolist() == [300000, 0, 0]
+    # A conta só tem fevereiro: a série começa e termina nele
+    first, values = series[("conta", "", "Despesa com pessoal", "debito")]
+    assert (first, values.tolist()) == (JAN_2024 + 1, [50000])
+    liquido = series[("subconta", "Receita com serviços", "Outras", "liquido")]
+    assert liquido[1].tolist() == [100000, 25025]
+
+
+def test_signature_changes_with_new_or_rewritten_months():
+    values = np.array([1, 2, 3])
+
+    assert series_signature(10, values) == series_signature(10, values.copy())
+    assert series_signature(10, values) != series_signature(10, np.array([1, 2, 3, 0]))
+    assert series_signature(10, values) != series_signature(11, values)
+    assert series_signature(10, values) != series_signature(10, np.array([1, 2, 4]))
+
+
+def test_warm_start_searches_only_neighbours():
+    grid = candidate_orders(36, 1)
+    previous = ((1, 1, 1), (1, 1, 1, 12))
+
+    assert len(grid) == 6 and all(seasonal[3] == 12 for _, seasonal in grid)
+    assert candidate_orders(12, 0) == [((0, 0, 1), (0, 0, 0, 0)), ((1, 0, 0), (0, 0, 0, 0)), ((1, 0, 1), (0, 0, 0, 0))]
+    assert candidate_orders(36, 1, previous) == [previous, ((0, 1, 1), (1, 1, 1, 12)), ((1, 1, 0), (1, 1, 1, 12)),
+                                                 ((1, 1, 1), (0, 1, 1, 12))]
+
+
+def test_fit_series_forecasts_the_next_months():
+    months = np.arange(24)
+    values = (100000 + 5000 * np.sin(months * np.pi / 6) + 300 * months).astype("int64")
+    task = {"key": ("total", "", "", "credito"), "inicio": JAN_2024, "values": values,
+            "assinatura": "x", "previous": None}
+
+    result = fit_series(task)
+
+    assert result["ultimo_mes"] == JAN_2024 + 23
+    assert [row[0] for row in result["forecast"]] == [JAN_2024 + 24 + step for step in range(FORECAST_MONTHS)]
+    assert all(lower <= mean <= upper and lower >= 0 for _, mean, lower, upper in result["forecast"])
+
+    warm = fit_series({**task, "previous": result})
+    assert (warm["order"], warm["seasonal_order"]) == (result["order"], result["seasonal_order"])
+
+
+def test_short_series_are_skipped():
+    result = fit_series({"key": ("total", "", "", "debito"), "inicio": 0, "values": np.ones(5, dtype="int64"),
+                         "assinatura": "x", "previous": None})
+
+    assert result["skipped"] and "forecast" not in result
+
+
+def test_refresh_keeps_unchanged_series(db_path):
+    first = refresh_forecasts(db_path, max_workers=1)
+    assert first["mantidas"] == 0 and first["ajustadas"] + first["ignoradas"] > 0
+
+    again = refresh_forecasts(db_path, max_workers=1)
+    assert again == {"ajustadas": 0, "ignoradas": 0, "mantidas": first["ajustadas"] + first["ignoradas"], "removidas": 0}
+
+    conn = connect(db_path)
+    try:
+        load(conn, statement(("2024-04-02", "TARIFA", 0, 5, None), file_path="data/raw/abril.xlsx"))
+        _, _, stale = stale_series(conn)
+        assert ("banco", "", "INTER", "debito") in stale
+        assert ("banco", "", "CAIXA", "debito") not in stale
+        assert read_forecasts(conn).empty
+    finally:
+        conn.close()
@@ -0,0 +1,102 @@
+import pandas as pd
+import pytest
+from ingest.parsers import (
+    OUTPUT_COLUMNS, CaixaParser, CredCreaParser, InterParser, get_parser, parse_amount, parse_statement,
+)
+from tests.conftest import INTER_ROWS, write_workbook
+
+
+def test_parse_amount():
+    values = pd.Series(["1.234,56", "R$ -10,00", "822,25 D", "5.736,61 C", "", None], dtype=object)
+
+    assert parse_amount(values).tolist()[:4] == [1234.56, -10.0, -822.25, 5736.61]
+    assert parse_amount(values).isna().tolist()[4:] == [True, True]
+    assert parse_amount(pd.Series([1, 2.5])).tolist() == [1.0, 2.5]
+
+
+@pytest.mark.parametrize("file_name, parser", [
+    ("BANCO CAIXA - 2023.xlsx", CaixaParser),
+    ("BANCO CRED CREA -2022.xlsx", CredCreaParser),
+    ("data/raw/BANCO INTER-2024.xlsx", InterParser),
+])
+def test_get_parser_by_file_name(file_name, parser):
+    assert isinstance(get_parser(file_name), parser)
+
+
+def test_get_parser_rejects_unknown_banks():
+    with pytest.raises(ValueError):
+        get_parser("BANCO DESCONHECIDO.xlsx")
+
+
+def _parse(parser, rows):
+    header, *body = rows
+    return parser.parse_rows(header, pd.DataFrame.from_records(body), "extrato.xlsx")
+
+
+def test_caixa_amounts_come_from_valor_when_unlabeled():
+    statement = _parse(CaixaParser(), [
+        ("Data Mov.", "Nr. Doc.", "Histórico", "Valor", "Saldo", "CRÉDITO", "DÉBITO", "CONTA"),
+        ("05/01/2022", 0, "SALDO ANTERIOR", 0, "5.306,43 C", None, None, None),
+        ("05/01/2022", 122021, "DB CEST PJ", "69,00 D", "5.237,43 C", None, 69, "Despesas financeiras"),
+        ("07/01/2022", 341, "CRED TED PANASONIC", "5.736,61 C", "10.974,04 C", None, None, None),
+    ])
+
+    assert list(statement.columns) == OUTPUT_COLUMNS
+    assert statement["descricao"].tolist() == ["DB CEST PJ", "CRED TED PANASONIC"]
+    assert statement["credito"].tolist() == [0.0, 5736.61]
+    assert statement["debito"].tolist() == [69.0, 0.0]
+    assert statement["saldo"].tolist() == [5237.43, 10974.04]
+    assert statement["conta"].tolist() == ["Despesas financeiras", None]
+    assert (statement["banco"] == "CAIXA").all()
+
+
+def test_cred_crea_debits_become_positive():
+    statement = _parse(CredCreaParser(), [
+        ("DATA", "DESCRIÇÃO", None, "DOCUMENTO", "CRÉDITO", "DÉBITO", "SALDO", "CONTA"),
+        ("04/01/2023", "CREDITO TED", None, 33980074, 569.94, None, 1035.47, "Receita com serviços"),
+        ("05/01/2023", "PG.P/INTERNET - CONTA DE AGUA", None, 10003309, None, -170.01, 865.46, None),
+    ])
+
+    assert statement["credito"].tolist() == [569.94, 0.0]
+    assert statement["debito"].tolist() == [0.0, 170.01]
+    assert statement["documento"].tolist() == ["33980074", "10003309"]
+
+
+def test_inter_signed_value_and_junk_rows():
+    statement = _parse(InterParser(), INTER_ROWS[2:])
+
+    assert statement["descricao"].tolist() == ["PIX RECEBIDO CLIENTE", "PAGAMENTO FATURA CARTAO", "PAG AGUA"]
+    assert statement["credito"].tolist() == [250.5, 0.0, 0.0]
+    assert statement["debito"].tolist() == [0.0, 50.5, 200.0]
+    assert statement["data"].dt.strftime("%Y-%m-%d").tolist() == ["2024-01-02", "2024-01-03", "2024-01-05"]
+    assert statement["conta"].tolist() == ["Receita com serviços", None, "Despesas administrativas"]
+
+
+def test_parse_statement_reads_the_whole_file(tmp_path):
+    path = write_workbook(tmp_path / "BANCO INTER-2024.xlsx", INTER_ROWS)
+
+    statement = parse_statement(path, chunk_size=2)
+
+    assert len(statement) == 3
+    assert statement.index.tolist() == [0, 1, 2]
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_ingest_statements_loads_files_and_isolates_failures(tmp_path, max_workers):
+    from ingest.pipeline import ingest_statements
+    from utils.db_utils import clear_tenant_caches, load_data_from_db
+
+    inter = write_workbook(tmp_path / "BANCO INTER-2024.xlsx", INTER_ROWS)
+    broken = write_workbook(tmp_path / "BANCO CAIXA-2024.xlsx", [("sem cabeçalho",)])
+    db_path = str(tmp_path / "ingest.db")
+
+    results = {result["file_path"]: result for result in ingest_statements([inter, broken], db_path, max_workers)}
+
+    assert "error" in results[broken] and results[inter]["inserted"] == 3
+    clear_tenant_caches()
+    ledger = load_data_from_db(db_path)
+    assert ledger["descricao"].tolist() == ["PIX RECEBIDO CLIENTE", "PAGAMENTO FATURA CARTAO", "PAG AGUA"]
+
+    again = {result["file_path"]: result for result in ingest_statements([inter], db_path, max_workers)}
+    assert again[inter]["skipped"]
+    clear_tenant_caches()
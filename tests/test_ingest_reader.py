@@ -0,0 +1,41 @@
+import pandas as pd
+import pytest
+from ingest.reader import iter_statement_chunks
+from tests.conftest import INTER_ROWS, write_workbook
+
+
+def test_chunks_cover_the_statement_in_order(tmp_path):
+    path = write_workbook(tmp_path / "BANCO INTER-2024.xlsx", INTER_ROWS)
+
+    chunks = list(iter_statement_chunks(path, chunk_size=2))
+
+    assert [len(chunk) for chunk in chunks] == [1, 1, 1]
+    assert pd.concat(chunks)["descricao"].tolist() == [
+        "PIX RECEBIDO CLIENTE", "PAGAMENTO FATURA CARTAO", "PAG AGUA",
+    ]
+
+
+def test_header_is_found_after_an_indented_title(tmp_path):
+    rows = [(None,) + row for row in INTER_ROWS]
+    path = write_workbook(tmp_path / "BANCO INTER-2024.xlsx", rows)
+
+    chunks = list(iter_statement_chunks(path))
+
+    assert len(chunks) == 1 and len(chunks[0]) == 3
+
+
+def test_short_rows_are_padded_to_the_header(tmp_path):
+    rows = INTER_ROWS[:3] + [("04/01/2024", "TARIFA", "-10,00")]
+    path = write_workbook(tmp_path / "BANCO INTER-2024.xlsx", rows)
+
+    (chunk,) = iter_statement_chunks(path)
+
+    assert chunk["debito"].tolist() == [10.0]
+    assert chunk["saldo"].isna().all() and chunk["conta"].isna().all()
+
+
+def test_missing_header_raises(tmp_path):
+    path = write_workbook(tmp_path / "BANCO INTER-2024.xlsx", INTER_ROWS[:2])
+
+    with pytest.raises(ValueError, match="DATA LANÇAMENTO"):
+        list(iter_statement_chunks(path))
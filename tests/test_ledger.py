@@ -0,0 +1,86 @@
+import pandas as pd
+import pytest
+from utils import analysis_utils
+from utils.ledger import PreparedLedger, as_ledger
+
+
+@pytest.fixture
+def raw():
+    """
+    Transações como chegam de uma planilha: datas em texto e valores em reais.
+    """
+    return pd.DataFrame({
+        "data": ["2024-01-31", "2024-02-01", "2024-02-29"],
+        "credito": [10.5, None, 0.0],
+        "debito": ["0", "1.234,56", "0,10"],
+        "saldo": [10.5, None, -1224.16],
+        "banco": ["INTER", "CAIXA", "INTER"],
+        "conta": ["Receita com serviços", None, "Despesas financeiras"],
+    })
+
+
+def test_values_become_centavos_once(raw):
+    ledger = PreparedLedger(raw)
+
+    assert ledger.column("credito").tolist() == [1050, 0, 0]
+    assert ledger.column("debito").tolist() == [0, 123456, 10]
+    assert pd.isna(ledger.column("saldo")[1]) and ledger.column("saldo")[2] == -122416
+    assert ledger.column("mes").tolist() == [1, 2, 2]
+    assert ledger.period_codes("M").tolist() == [648, 649, 649]
+
+
+def test_source_frame_is_not_changed(raw):
+    before = raw.copy()
+
+    ledger = PreparedLedger(raw)
+    ledger.column("ano")
+    ledger.period_codes("W")
+
+    pd.testing.assert_frame_equal(raw, before)
+
+
+def test_columns_are_read_only_and_cached(raw):
+    ledger = PreparedLedger(raw)
+
+    assert ledger.column("ano") is ledger.column("ano")
+    with pytest.raises(ValueError):
+        ledger.column("credito")[0] = 1
+
+
+def test_text_columns_filter_and_group_by_codes(raw):
+    ledger = PreparedLedger(raw.astype({"banco": "category"}))
+
+    assert ledger.isin("banco", ["INTER"]).tolist() == [True, False, True]
+    assert ledger.matches("conta", lambda categories: categories.str.startswith("Despesas")).tolist() == [
+        False, False, True,
+    ]
+    inter = ledger.where(ledger.isin("banco", ["INTER"]))
+    assert isinstance(inter, PreparedLedger) and len(inter) == 2 and len(ledger) == 3
+    assert as_ledger(inter) is inter
+
+    # Linhas sem conta ficam fora do agrupamento
+    by_account = ledger.sum_by(["conta"], ["credito", "debito"])
+    assert by_account.to_dict("list") == {
+        "conta": ["Despesas financeiras", "Receita com serviços"], "credito": [0, 1050], "debito": [10, 0],
+    }
+
+
+@pytest.mark.parametrize("helper, args", [
+    ("calculate_monthly_profit", ()),
+    ("calculate_salary_expenses", ()),
+    ("comparar_calcular_total", ()),
+    ("prepare_credit_debit_data", ()),
+    ("prepare_account_data", ()),
+    ("prepare_profit_data", ()),
+    ("prepare_yearly_account_data", ()),
+    ("get_monthly_summary", ("debito",)),
+    ("prepare_yearly_data_for_line_chart", ("credito",)),
+    ("analyze_supplier_profitability", ()),
+])
+def test_analysis_helpers_do_not_mutate_their_input(transactions, helper, args):
+    before = transactions.copy()
+
+    getattr(analysis_utils, helper)(transactions, *args)
+    getattr(analysis_utils, helper)(PreparedLedger(transactions), *args)
+
+    pd.testing.assert_frame_equal(transactions, before)
@@ -0,0 +1,51 @@
+import pandas as pd
+from tests.conftest import load, statement
+from utils.db_utils import TransactionFilter, build_page_query, load_data_from_db
+from utils.lookups import decode_categorical, read_lookup
+
+
+def test_texts_are_stored_as_ids(ledger):
+    stored = ledger.execute("SELECT banco_id, conta_id FROM bank_transactions ORDER BY id LIMIT 1").fetchone()
+    banco, conta = ledger.execute(
+        "SELECT banco, conta FROM transactions ORDER BY id LIMIT 1"
+    ).fetchone()
+
+    assert all(isinstance(value, int) for value in stored)
+    assert read_lookup(ledger, "banco")[stored[0]] == banco == "INTER"
+    assert read_lookup(ledger, "conta")[stored[1]] == conta == "Receita com serviços"
+
+
+def test_ids_are_stable_across_reloads(ledger):
+    before = read_lookup(ledger, "conta")
+
+    load(ledger, statement(("2024-04-01", "NOVA CONTA", 1, 0, None, "Receitas financeiras", "Aplicação")))
+
+    after = read_lookup(ledger, "conta")
+    assert after.iloc[:len(before)].equals(before)
+    assert after.iloc[-1] == "Receitas financeiras"
+
+
+def test_filters_compare_ids(ledger):
+    sql, params = build_page_query(TransactionFilter(banco="CAIXA", conta=("Despesas tributárias",)), None, "next", False, 10)
+
+    assert "banco_id = (SELECT id FROM lookup_banco" in sql and "conta_id IN" in sql
+    assert [row[2] for row in ledger.execute(sql, params)] == ["DARF IRRF"]
+
+    sql, params = build_page_query(TransactionFilter(banco="NAO EXISTE"), None, "next", False, 10)
+    assert ledger.execute(sql, params).fetchall() == []
+
+
+def test_ledger_columns_come_back_as_categoricals(db_path):
+    ledger = load_data_from_db(db_path)
+
+    assert isinstance(ledger["banco"].dtype, pd.CategoricalDtype)
+    assert ledger["banco"].value_counts().to_dict() == {"INTER": 5, "CAIXA": 3}
+
+
+def test_decode_categorical_keeps_codes_and_nulls():
+    lookup = pd.Series(["A", "B", "C"], index=[1, 2, 3])
+
+    decoded = decode_categorical(pd.Series([3, None, 1]), lookup)
+
+    assert list(decoded.categories) == ["A", "B", "C"]
+    assert decoded.codes.tolist() == [2, -1, 0]
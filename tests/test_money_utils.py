@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+from utils.analysis_utils import aggregate_by_period
+from utils.money_utils import format_centavos, from_centavos, parse_brl_number, to_centavos
+
+
+def test_to_centavos_parses_brazilian_text_once():
+    values = pd.Series(["1.234,56", "0,10", "-7,5", "12", "abc", None], dtype=object)
+
+    assert to_centavos(values).tolist()[:4] == [123456, 10, -750, 1200]
+    assert to_centavos(values).isna().tolist()[4:] == [True, True]
+    assert to_centavos(pd.Series([0.1 + 0.2, 19.999])).tolist() == [30, 2000]
+    assert parse_brl_number(pd.Series([1, 2])).dtype == "float64"
+
+
+def test_from_and_format_centavos():
+    assert from_centavos(pd.Series([150, None], dtype="Int64")).tolist()[0] == 1.5
+    assert format_centavos(-123456789) == "R$ -1,234,567.89"
+    assert format_centavos(np.int64(5)) == "R$ 0.05"
+
+
+def test_money_is_stored_as_integers(ledger):
+    types = {row[1]: row[2] for row in ledger.execute("PRAGMA table_info(bank_transactions)")}
+    stored = ledger.execute("SELECT typeof(credito), typeof(debito) FROM bank_transactions").fetchall()
+
+    assert types["credito"] == types["debito"] == types["saldo"] == "INTEGER"
+    assert set(stored) == {("integer", "integer")}
+
+
+def test_sums_stay_exact_beyond_float_precision():
+    # 2**53 + 1 centavos não cabe num float64: a soma em float perderia o centavo
+    big = 2**53
+    frame = pd.DataFrame({
+        "data": pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-03"]),
+        "credito": pd.Series([big, 1, 1], dtype="int64"),
+        "debito": pd.Series([0, 0, 0], dtype="int64"),
+    })
+
+    totals = aggregate_by_period(frame, "M")
+
+    assert int(totals["credito"].iloc[0]) == big + 2
+    assert float(big) + 1 + 1 != big + 2
@@ -0,0 +1,49 @@
+import os
+import pandas as pd
+from utils.parquet_store import MANIFEST_NAME, export_snapshot, get_snapshot_version, read_snapshot
+
+
+def test_snapshot_round_trip(ledger, tmp_path):
+    store = str(tmp_path / "parquet")
+
+    assert get_snapshot_version(store) is None
+    assert export_snapshot(ledger, store) == 8
+
+    snapshot = read_snapshot(store).sort_values("id").reset_index(drop=True)
+    expected = pd.read_sql("SELECT * FROM transactions ORDER BY id", ledger)
+    assert snapshot["id"].tolist() == expected["id"].tolist()
+    assert snapshot["credito"].astype("int64").tolist() == expected["credito"].tolist()
+    assert snapshot["descricao"].tolist() == expected["descricao"].tolist()
+    assert snapshot["banco"].astype(str).tolist() == expected["banco"].tolist()
+    assert int(snapshot["credito"].sum()) == 425025
+
+
+def test_snapshot_filters_partitions_and_columns(ledger, tmp_path):
+    store = str(tmp_path / "parquet")
+    export_snapshot(ledger, store)
+
+    inter = read_snapshot(store, columns=["id", "banco", "debito"], bancos=["INTER"], years=[2024])
+
+    assert list(inter.columns) == ["id", "banco", "debito"]
+    assert set(inter["banco"].astype(str)) == {"INTER"}
+    assert len(inter) == 5
+    assert read_snapshot(store, years=[1999]).empty
+
+
+def test_export_keeps_two_versions_and_foreign_files(ledger, tmp_path):
+    store = tmp_path / "parquet"
+    (store / "raw").mkdir(parents=True)
+    (store / "raw" / "extrato.xlsx").write_bytes(b"x")
+    (store / "notes.txt").write_text("notas")
+    (store / "version-notes").mkdir()
+
+    versions = []
+    for _ in range(3):
+        export_snapshot(ledger, str(store))
+        versions.append(get_snapshot_version(str(store)))
+
+    assert len(set(versions)) == 3
+    assert sorted(os.listdir(store)) == sorted(
+        [MANIFEST_NAME, "notes.txt", "raw", "version-notes", versions[1], versions[2]]
+    )
+    assert (store / "raw" / "extrato.xlsx").exists()
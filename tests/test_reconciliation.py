@@ -0,0 +1,72 @@
+import warnings
+import pandas as pd
+from tests.conftest import load, statement
+from utils.reconciliation import check_running_balance, read_balance_breaks, reconcile_balances
+
+
+def _check(*rows):
+    frame = pd.DataFrame(
+        [(n, day, descricao, None, credito, debito, saldo, file_path)
+         for n, (day, descricao, credito, debito, saldo, file_path) in enumerate(rows)],
+        columns=["id", "data", "descricao", "documento", "credito", "debito", "saldo", "file_path"],
+    )
+    return check_running_balance(frame)["tipo"].tolist()
+
+
+def test_matching_balances_have_no_breaks():
+    assert _check(
+        (1, "PIX", 1000, 0, 1000, "a"),
+        (2, "PAG", 0, 300, 700, "a"),
+        (2, "TARIFA", 0, 50, None, "a"),
+        (3, "PIX", 100, 0, 750, "a"),
+    ) == [None] * 4
+
+
+def test_break_types():
+    assert _check(
+        (1, "PIX", 1000, 0, 1000, "a"),
+        (1, "SALDO ANTERIOR", 0, 0, 1000, "a"),
+        (2, "PAG", 0, 300, 700, "a"),
+        (2, "PAG", 0, 300, 700, "a"),
+        (80, "PIX", 100, 0, 900, "a"),
+        (81, "PIX", 100, 0, 900, "b"),
+        (82, "PIX", 50, 0, 1060, "b"),
+        (82, "PAG", 0, 10, 940, "b"),
+        (83, "PIX", 10, 0, 1000, "b"),
+    ) == [None, "saldo_anterior", None, "duplicada", "lacuna", "lacuna", "ordem", "ordem", "divergencia"]
+
+
+def test_first_row_after_a_checkpoint_is_checked_against_it(conn):
+    load(conn, statement(
+        ("2024-01-05", "PIX RECEBIDO", 1000.00, 0, 1000.00),
+        ("2024-01-20", "PAG AGUA", 0, 100.00, 900.00),
+        ("2024-02-01", "PIX RECEBIDO", 100.00, 0, 1000.00),
+    ))
+    assert conn.execute("SELECT data FROM balance_checkpoints").fetchall() == [(19742,)]
+
+    # Extrato de outro arquivo logo depois do checkpoint, com saldo que não fecha: a
+    # conciliação recomeça em janeiro e precisa comparar a linha nova com a do checkpoint
+    load(conn, statement(("2024-01-25", "PIX RECEBIDO", 50.00, 0, 2000.00), file_path="data/raw/inter-2.xlsx"))
+    incremental = read_balance_breaks(conn)
+
+    conn.execute("DELETE FROM balance_checkpoints")
+    conn.execute("DELETE FROM balance_breaks")
+    reconcile_balances(conn)
+    full = read_balance_breaks(conn)
+
+    assert incremental["tipo"].tolist() == ["lacuna", "lacuna"]
+    pd.testing.assert_frame_equal(incremental, full)
+
+
+def test_statement_without_informed_balances(conn):
+    # Sem nenhum saldo, a coluna vem do SQLite como object e não há base para conferir
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        load(conn, statement(
+            ("2024-01-05", "PIX RECEBIDO", 1000.00, 0, None),
+            ("2024-01-20", "PAG AGUA", 0, 100.00, None),
+            ("2024-02-01", "PIX RECEBIDO", 100.00, 0, None),
+        ))
+
+    assert conn.execute("SELECT COUNT(*) FROM balance_checkpoints").fetchone() == (0,)
+    assert read_balance_breaks(conn).empty
@@ -0,0 +1,58 @@
+import pandas as pd
+import pytest
+from tests.conftest import load, statement
+from utils.analysis_utils import aggregate_by_period
+from utils.rollups import choose_rollup_granularity, refresh_rollups
+
+ROLLUP_QUERY = (
+    "SELECT granularity, data, banco_id, conta_id, subconta_id, credito, debito, quantidade"
+    " FROM transaction_rollups ORDER BY 1, 2, 3, 4, 5"
+)
+
+
+def _ledger_frame(conn):
+    frame = pd.read_sql("SELECT data, banco, conta, subconta, credito, debito, saldo FROM transactions", conn)
+    return frame.assign(data=pd.to_datetime(frame["data"], unit="D"))
+
+
+@pytest.mark.parametrize("freq, granularity", [("W", "week"), ("M", "month"), ("Y", "year")])
+def test_rollups_match_the_ledger(ledger, freq, granularity):
+    expected = aggregate_by_period(_ledger_frame(ledger), freq)
+    rollups = pd.read_sql(
+        "SELECT data, SUM(credito) AS credito, SUM(debito) AS debito, SUM(quantidade) AS quantidade"
+        " FROM transaction_rollups WHERE granularity = ? GROUP BY data ORDER BY data",
+        ledger,
+        params=(granularity,),
+    )
+
+    assert rollups["credito"].tolist() == expected["credito"].tolist()
+    assert rollups["debito"].tolist() == expected["debito"].tolist()
+    assert rollups["quantidade"].tolist() == expected["quantidade"].tolist()
+
+
+def test_incremental_refresh_matches_full_rebuild(ledger):
+    load(ledger, statement(
+        ("2024-01-15", "PAG AGUA SANEPAR", 0, 80.50, 919.50, "Despesas administrativas", "Água"),
+        ("2024-03-05", "TARIFA PACOTE", 0, 19.75, 650.00, "Despesas financeiras", "Despesas bancárias"),
+        ("2024-04-01", "PIX RECEBIDO CLIENTE C", 10.00, 0, 660.00, "Receita com serviços", "Outras"),
+    ))
+    incremental = ledger.execute(ROLLUP_QUERY).fetchall()
+
+    refresh_rollups(ledger)
+
+    assert ledger.execute(ROLLUP_QUERY).fetchall() == incremental
+
+
+@pytest.mark.parametrize("period, start, end, granularity", [
+    ("month", None, None, "month"),
+    ("month", "2024-01-01", "2024-03-31", "month"),
+    ("month", "2024-01-10", "2024-03-31", "day"),
+    ("year", "2024-01-01", "2024-06-30", "month"),
+    ("week", "2024-01-01", "2024-01-14", "week"),
+    (None, "2024-02-01", "2024-02-29", "month"),
+])
+def test_choose_rollup_granularity(period, start, end, granularity):
+    def to_day(value):
+        return None if value is None else (pd.Timestamp(value) - pd.Timestamp("1970-01-01")).days
+
+    assert choose_rollup_granularity(period, to_day(start), to_day(end)) == granularity
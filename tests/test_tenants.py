@@ -0,0 +1,68 @@
+import json
+import os
+import pytest
+from streamlit.testing.v1 import AppTest
+from utils import db_utils, tenants
+from utils.db_utils import connect, load_data_from_db
+from utils.tenants import Tenant, get_tenant, load_tenants, tenant_db_path
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "pages")
+
+
+def _add_tenant(tenants_dir, slug, **config):
+    (tenants_dir / slug).mkdir(parents=True)
+    (tenants_dir / slug / "tenant.json").write_text(json.dumps(config), encoding="utf-8")
+
+
+def test_tenants_come_from_their_folders(tmp_path):
+    _add_tenant(tmp_path, "beta", nome="Beta", gestor="Ana", imagem="logo.png")
+    _add_tenant(tmp_path, "alfa")
+    (tmp_path / "sem-config").mkdir()
+    _add_tenant(tmp_path, "Invalido")
+
+    found = load_tenants(str(tmp_path))
+
+    assert [tenant.slug for tenant in found] == ["eceel", "alfa", "beta"]
+    assert found[1].nome == "alfa" and found[1].gestor is None
+    assert found[2].db_path == str(tmp_path / "beta" / "bank_data.db")
+    assert found[2].imagem == str(tmp_path / "beta" / "logo.png")
+    assert get_tenant("beta", str(tmp_path)).gestor == "Ana"
+    with pytest.raises(ValueError):
+        get_tenant("gama", str(tmp_path))
+
+
+def test_folder_with_the_default_slug_replaces_it(tmp_path):
+    _add_tenant(tmp_path, "eceel", nome="ECEEL nova")
+
+    assert [tenant.nome for tenant in load_tenants(str(tmp_path))] == ["ECEEL nova"]
+
+
+@pytest.mark.parametrize("slug", ["../fora", "A", "", "-x"])
+def test_invalid_slugs_are_rejected(tmp_path, slug):
+    with pytest.raises(ValueError):
+        tenant_db_path(slug, str(tmp_path))
+
+
+def test_each_database_keeps_its_own_cache(db_path, tmp_path, monkeypatch):
+    other = str(tmp_path / "outra.db")
+    connect(other).close()
+
+    assert len(load_data_from_db(db_path)) == 8
+    assert load_data_from_db(other).empty
+    assert len(load_data_from_db(db_path)) == 8
+
+    # Passando do limite, o banco usado há mais tempo perde o cache
+    monkeypatch.setattr(db_utils, "CACHED_TENANTS", 1)
+    load_data_from_db(other)
+    assert list(db_utils._tenant_caches) == [other]
+
+
+@pytest.mark.parametrize("page", ["dashboard_page", "bank_page", "historic_page"])
+def test_pages_warn_on_an_empty_tenant(tmp_path, monkeypatch, page):
+    empty = Tenant(slug="vazia", nome="Vazia", db_path=str(tmp_path / "vazia.db"))
+    monkeypatch.setattr(tenants, "load_tenants", lambda: (empty,))
+
+    app = AppTest.from_file(os.path.join(PAGES_DIR, f"{page}.py"), default_timeout=60).run()
+
+    assert not app.exception
+    assert [warning.value for warning in app.warning] == ["Ainda não há transações carregadas para Vazia."]
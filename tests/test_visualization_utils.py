@@ -0,0 +1,103 @@
+import json
+import pandas as pd
+import pytest
+from utils import visualization_utils
+from utils.visualization_utils import (
+    MAX_CHART_POINTS, clear_chart_cache, create_credit_debit_chart, create_profit_chart, downsample, to_long_format,
+)
+
+
+@pytest.fixture(autouse=True)
+def empty_chart_cache():
+    clear_chart_cache()
+    yield
+    clear_chart_cache()
+
+
+def _monthly(months, **columns):
+    labels = pd.period_range("1900-01", periods=months, freq="M").astype(str)
+    return pd.DataFrame({"year_month": labels, **{name: [value] * months for name, value in columns.items()}})
+
+
+def test_downsample_keeps_small_data_as_is():
+    data = _monthly(12, credito=1.0)
+
+    assert downsample(data, "year_month", ["credito"], max_points=12) is data
+
+
+def test_downsample_sums_neighbouring_periods():
+    data = _monthly(1000, credito=1.0, debito=2.0)
+
+    binned = downsample(data, "year_month", ["credito", "debito"], max_points=100)
+
+    assert len(binned) == 100
+    assert list(binned.columns) == ["year_month", "credito", "debito"]
+    assert binned["credito"].sum() == 1000 and binned["debito"].sum() == 2000
+    assert binned["year_month"].iloc[:2].tolist() == ["1900-01", "1900-11"]
+
+
+def test_downsample_counts_points_of_every_series():
+    data = pd.concat([_monthly(300, Valor=1.0).assign(Tipo=tipo) for tipo in ("credito", "debito")])
+
+    binned = downsample(data, "year_month", ["Valor"], by=["Tipo"], max_points=200)
+
+    assert binned.groupby("Tipo").size().tolist() == [100, 100]
+    assert binned.groupby("Tipo")["Valor"].sum().tolist() == [300, 300]
+
+
+def test_to_long_format_keeps_only_chart_columns():
+    data = _monthly(2, credito=1.0, debito=2.0, extra="x")
+
+    long = to_long_format(data, "year_month", ["credito", "debito"])
+
+    assert list(long.columns) == ["year_month", "Tipo", "Valor"]
+    assert long["Valor"].tolist() == [1.0, 1.0, 2.0, 2.0]
+
+
+def test_charts_receive_aggregated_minimal_data(monkeypatch):
+    monkeypatch.setattr(visualization_utils, "RECORD_SPEC_SIZES", True)
+    grouped = _monthly(5000, credito=1.0, debito=2.0, ano=2024)
+
+    chart = create_credit_debit_chart(grouped)
+
+    assert list(chart.data.columns) == ["year_month", "Tipo", "Valor"]
+    assert len(chart.data) <= 2 * MAX_CHART_POINTS
+    assert chart.data.groupby("Tipo")["Valor"].sum().tolist() == [5000, 10000]
+    assert 0 < visualization_utils.SPEC_SIZES["create_credit_debit_chart"] < 100_000
+
+
+def test_profit_chart_is_downsampled():
+    profit = pd.DataFrame({"Mês": [f"{index:05d}" for index in range(2000)], "Lucro": 1.0, "extra": 0})
+
+    chart = create_profit_chart(profit)
+
+    assert len(chart.data) <= MAX_CHART_POINTS and list(chart.data.columns) == ["Mês", "Lucro"]
+
+
+def test_builders_are_memoized_on_the_data(monkeypatch):
+    monkeypatch.setattr(visualization_utils, "CHART_CACHE_SIZE", 2)
+    profits = [pd.DataFrame({"Mês": ["2024-01", "2024-02"], "Lucro": [value, 2.0]}) for value in (1.0, 3.0, 5.0)]
+
+    first = create_profit_chart(profits[0])
+    assert create_profit_chart(profits[0].copy()) is first
+    assert create_profit_chart(profits[1]) is not first
+    create_profit_chart(profits[2])
+
+    # A entrada menos usada saiu do cache ao passar do limite
+    assert create_profit_chart(profits[0]) is not first
+    assert visualization_utils.chart_cache_info() == {"hits": 1, "misses": 4, "size": 2, "max_size": 2}
+
+
+def test_spec_is_built_once_and_rendered_with_the_public_api(monkeypatch):
+    rendered = []
+    monkeypatch.setattr(visualization_utils.st, "vega_lite_chart", lambda **kwargs: rendered.append(kwargs))
+    chart = create_profit_chart(pd.DataFrame({"Mês": ["2024-01", "2024-02"], "Lucro": [1.0, 2.0]}))
+
+    visualization_utils.render_chart(chart, use_container_width=True)
+    visualization_utils.render_chart(chart, use_container_width=True)
+
+    spec = visualization_utils.chart_spec(chart)
+    assert rendered == [{"spec": spec, "use_container_width": True}] * 2
+    assert rendered[0]["spec"] is rendered[1]["spec"]
+    assert list(spec["datasets"].values()) == [[{"Mês": "2024-01", "Lucro": 1.0}, {"Mês": "2024-02", "Lucro": 2.0}]]
+    assert visualization_utils.spec_size(chart) == len(json.dumps(spec, separators=(",", ":")))